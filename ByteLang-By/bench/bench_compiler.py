@@ -0,0 +1,170 @@
+"""
+Compiler parse cache benchmark
+
+Times a cold `bytelang.Compiler.run` of a program (the path of `python -m bytelang compile`),
+every measurement in a separate interpreter so that no parse is reused in memory:
+
+    python bench/bench_compiler.py --sizes 100K,1M --output bench.json
+
+Modes:
+    parse   no parse cache
+    miss    parse cache enabled, empty cache directory (parse and store)
+    hit     parse cache enabled, every module stored by a previous run
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+from typing import Final
+from typing import Sequence
+
+from corpus import CORPORA
+from corpus import generate
+
+_ROOT: Final = Path(__file__).resolve().parents[1]
+
+_MODES: Final = ("parse", "miss", "hit")
+
+_SIZES: Final = "100K,1M"
+
+_MODULES: Final = 8
+"""Modules of a program, each a corpus of its own seed"""
+
+_UNITS: Final = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+def _parseSize(text: str) -> int:
+    text = text.strip().upper()
+
+    if text[-1:] in _UNITS:
+        return int(text[:-1]) * _UNITS[text[-1]]
+
+    return int(text)
+
+
+def _measure(mode: str, directory: Path) -> dict[str, Any]:
+    """Time of one cold run over the modules of directory"""
+    from bytelang import Compiler
+
+    sources = {path.stem: path.read_text("utf-8") for path in sorted(directory.glob("*.bl"))}
+    compiler = Compiler(cache=mode != "parse")
+
+    begin = time.perf_counter()
+    results = compiler.run(sources)
+    seconds = time.perf_counter() - begin
+
+    return {"seconds": seconds, "diagnostics": sum(len(result.diagnostics) for result in results.values())}
+
+
+def _spawn(mode: str, directory: Path, cache: Path, timeout: float) -> dict[str, Any]:
+    environment = dict(os.environ, PYTHONPATH=str(_ROOT / "src"), BYTELANG_CACHE_DIR=str(cache))
+    command = (sys.executable, __file__, "--worker", mode, str(directory))
+
+    try:
+        process = subprocess.run(command, env=environment, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"error": f"timeout after {timeout}s"}
+
+    if process.returncode != 0:
+        lines = process.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit code {process.returncode}"}
+
+    return json.loads(process.stdout)
+
+
+def _write(directory: Path, kind: str, size: int, seed: int) -> int:
+    """Program of `_MODULES` corpus modules of `size` bytes in total, return its size"""
+    written = 0
+
+    for index in range(_MODULES):
+        path = directory / f"module{index}.bl"
+        path.write_text(generate(kind, size // _MODULES, seed + index), "utf-8")
+        written += path.stat().st_size
+
+    return written
+
+
+def run(kinds: Sequence[str], sizes: Sequence[int], *, repeat: int, timeout: float, seed: int) -> dict[str, Any]:
+    """Run every mode on every corpus, best of `repeat` runs"""
+    results = list[dict[str, Any]]()
+
+    with tempfile.TemporaryDirectory() as temporary:
+        root = Path(temporary)
+
+        for kind in kinds:
+            for size in sizes:
+                directory = root / f"{kind}-{size}"
+                cache = root / f"{kind}-{size}.cache"
+                directory.mkdir()
+                actual = _write(directory, kind, size, seed)
+
+                for mode in _MODES:
+                    best = None
+
+                    for _ in range(repeat):
+                        if mode == "miss":
+                            shutil.rmtree(cache, ignore_errors=True)
+
+                        result = _spawn(mode, directory, cache, timeout)
+
+                        if best is None or "error" in result or result["seconds"] < best["seconds"]:
+                            best = result
+
+                        if "error" in result:
+                            break
+
+                    text = f"error: {best['error']}" if "error" in best else f"{best['seconds']:8.3f} s"
+                    print(f"{kind:>8} {actual:>11} {mode:>6}: {text}", file=sys.stderr)
+                    results.append({"corpus": kind, "size": actual, "mode": mode, **best})
+
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "seed": seed,
+        "repeat": repeat,
+        "modules": _MODULES,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpora", default=",".join(CORPORA), help="corpus kinds (default: %(default)s)")
+    parser.add_argument("--sizes", default=_SIZES, help="corpus sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="cold runs per measurement, best is reported")
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds per run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="JSON results file (default: stdout)")
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "DIRECTORY"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        mode, directory = args.worker
+        json.dump(_measure(mode, Path(directory)), sys.stdout)
+        return
+
+    report = run(
+        args.corpora.split(","),
+        tuple(map(_parseSize, args.sizes.split(","))),
+        repeat=args.repeat,
+        timeout=args.timeout,
+        seed=args.seed,
+    )
+    text = json.dumps(report, indent=2)
+
+    if args.output is None:
+        print(text)
+    else:
+        args.output.write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
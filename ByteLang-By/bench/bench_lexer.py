@@ -0,0 +1,198 @@
+"""
+Lexer throughput benchmark
+
+Every measurement runs in a separate interpreter so that peak memory
+and import state of one implementation do not affect the other:
+
+    python bench/bench_lexer.py --sizes 1K,1M --output bench.json
+
+Implementations:
+    lexer        `bytelang.Lexer.scan` over text
+    lexer-bytes  `bytelang.Lexer.scan` over UTF-8 bytes
+    tokenizer    ByteLang-Py `Tokenizer.run` baseline (Python 3.12+)
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Final
+from typing import Sequence
+
+from corpus import CORPORA
+from corpus import generate
+
+_ROOT: Final = Path(__file__).resolve().parents[1]
+
+_PATHS: Final = {
+    "lexer": _ROOT / "src",
+    "lexer-bytes": _ROOT / "src",
+    "tokenizer": _ROOT.parent / "garbage" / "ByteLang-Py" / "src",
+}
+"""Import path of each implementation"""
+
+_SIZES: Final = "1K,10K,100K,1M,10M,100M"
+
+_UNITS: Final = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+def _parseSize(text: str) -> int:
+    text = text.strip().upper()
+
+    if text[-1:] in _UNITS:
+        return int(text[:-1]) * _UNITS[text[-1]]
+
+    return int(text)
+
+
+def _lexer(source: str, binary: bool) -> Callable[[], int]:
+    from bytelang import Lexer
+
+    lexer = Lexer()
+    data = source.encode() if binary else source
+    return lambda: len(lexer.scan(data))
+
+
+def _tokenizer(source: str) -> Callable[[], int]:
+    from bytelang.core.key_word import Keyword
+    from bytelang.core.tokenizer import Tokenizer
+
+    keywords = tuple(Keyword(name, "") for name in ("import", "pub", "const", "var", "fn", "macro", "struct", "as"))
+    tokenizer = Tokenizer(keywords)
+
+    # Baseline grammar has `#` comments only
+    source = source.replace("//", "#")
+
+    def run() -> int:
+        result = tokenizer.run(StringIO(source))
+        return len(result.unwrap().getItems()) if result.is_ok() else -1
+
+    return run
+
+
+def _measure(implementation: str, path: Path, repeat: int) -> dict[str, Any]:
+    """Best-of-`repeat` time and traced peak memory of one implementation"""
+    source = path.read_text("utf-8")
+    size = len(source.encode())
+
+    if implementation == "tokenizer":
+        run = _tokenizer(source)
+    else:
+        run = _lexer(source, implementation == "lexer-bytes")
+
+    best = float("inf")
+    tokens = 0
+
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        tokens = run()
+        best = min(best, time.perf_counter() - begin)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "tokens": tokens,
+        "seconds": best,
+        "tokens_per_second": tokens / best if tokens >= 0 else None,
+        "bytes_per_second": size / best,
+        "peak_memory": peak,
+    }
+
+
+def _spawn(implementation: str, path: Path, repeat: int, timeout: float) -> dict[str, Any]:
+    environment = dict(os.environ, PYTHONPATH=str(_PATHS[implementation]))
+    command = (sys.executable, __file__, "--worker", implementation, str(path), "--repeat", str(repeat))
+
+    try:
+        process = subprocess.run(command, env=environment, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"error": f"timeout after {timeout}s"}
+
+    if process.returncode != 0:
+        lines = process.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit code {process.returncode}"}
+
+    return json.loads(process.stdout)
+
+
+def _format(result: dict[str, Any]) -> str:
+    if "error" in result:
+        return f"error: {result['error']}"
+
+    tokens_rate = result["tokens_per_second"]
+    tokens = f"{tokens_rate / 1e6:8.3f} Mtok/s" if tokens_rate is not None else "       - Mtok/s"
+    return f"{tokens} {result['bytes_per_second'] / (1 << 20):8.2f} MiB/s {result['peak_memory'] / (1 << 20):9.2f} MiB peak"
+
+
+def run(kinds: Sequence[str], sizes: Sequence[int], implementations: Sequence[str], *, repeat: int, timeout: float, seed: int) -> dict[str, Any]:
+    """Run every implementation on every corpus"""
+    results = list[dict[str, Any]]()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in kinds:
+            for size in sizes:
+                path = Path(directory) / f"{kind}-{size}.bl"
+                path.write_text(generate(kind, size, seed), "utf-8")
+                actual = path.stat().st_size
+
+                for implementation in implementations:
+                    result = _spawn(implementation, path, repeat, timeout)
+                    print(f"{kind:>8} {actual:>11} {implementation:>11}: {_format(result)}", file=sys.stderr)
+                    results.append({"corpus": kind, "size": actual, "implementation": implementation, **result})
+
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "seed": seed,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpora", default=",".join(CORPORA), help="corpus kinds (default: %(default)s)")
+    parser.add_argument("--sizes", default=_SIZES, help="corpus sizes (default: %(default)s)")
+    parser.add_argument("--implementations", default=",".join(_PATHS), help="default: %(default)s")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per measurement, best is reported")
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds per measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="JSON results file (default: stdout)")
+    parser.add_argument("--worker", nargs=2, metavar=("IMPLEMENTATION", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        implementation, path = args.worker
+        json.dump(_measure(implementation, Path(path), args.repeat), sys.stdout)
+        return
+
+    report = run(
+        args.corpora.split(","),
+        tuple(map(_parseSize, args.sizes.split(","))),
+        args.implementations.split(","),
+        repeat=args.repeat,
+        timeout=args.timeout,
+        seed=args.seed,
+    )
+    text = json.dumps(report, indent=2)
+
+    if args.output is None:
+        print(text)
+    else:
+        args.output.write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
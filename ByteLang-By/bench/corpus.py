@@ -0,0 +1,108 @@
+"""Synthetic `.bl` corpora for lexer benchmarks"""
+from random import Random
+from typing import Callable
+from typing import Final
+from typing import Iterator
+from typing import Mapping
+
+_PRIMITIVES: Final = ("u8", "i8", "u16", "i16", "u32", "i32", "f32", "f64")
+
+
+def _literal(rng: Random) -> str:
+    kind = rng.randrange(6)
+
+    if kind == 0:
+        return f"0x{rng.randrange(0x10000):X}"
+
+    if kind == 1:
+        return f"0b{rng.randrange(0x100):b}"
+
+    if kind == 2:
+        return f"'{rng.choice('abcXYZ019')}'"
+
+    if kind == 3:
+        return f"{rng.random() * 1000:.3f}"
+
+    if kind == 4:
+        return f"{rng.randrange(1, 99)}e-{rng.randrange(1, 30)}"
+
+    return str(rng.randrange(100000))
+
+
+def _tables(rng: Random) -> Iterator[str]:
+    """Constant-heavy data tables"""
+    index = 0
+
+    while True:
+        size = rng.choice((8, 16, 64, 256))
+        primitive = rng.choice(_PRIMITIVES)
+        values = ", ".join(_literal(rng) for _ in range(size))
+        yield f"pub const table_{index}: [{size}]{primitive} = {{{values}}}\n\n"
+        index += 1
+
+
+def _structs(rng: Random) -> Iterator[str]:
+    """Deep struct and generic declarations"""
+    index = 0
+
+    while True:
+        depth = rng.randrange(1, 6)
+        fields = "\n".join(f"    f{i}: {'*' * rng.randrange(3)}{rng.choice(_PRIMITIVES)}," for i in range(rng.randrange(2, 8)))
+        nested = "".join(f"Box{index}_{level}(" for level in range(depth)) + "T" + ")" * depth
+
+        yield (
+            f"fn macro Point{index}(T: type) type struct {{\n"
+            f"    x: T,\n"
+            f"    y: T,\n"
+            f"    inner: [{rng.randrange(1, 64)}][{rng.randrange(1, 64)}]{nested},\n"
+            f"{fields}\n"
+            f"\n"
+            f"    const Self = Point{index}(T)\n"
+            f"\n"
+            f"    pub fn macro zero() Self {{x: 0, y: 0}}\n"
+            f"\n"
+            f"    pub fn distance(self: *Self, other: Self) T = ...\n"
+            f"}}\n"
+            f"\n"
+            f"var p{index}: Point{index}(i32) = Point{index}(i32).zero()\n\n"
+        )
+        index += 1
+
+
+_WORDS: Final = (
+    "Регистровая", "математика", "Управление", "стеком", "памятью", "процедура", "результат",
+    "value", "pointer", "stack", "restore", "call", "return",
+)
+
+
+def _comments(rng: Random) -> Iterator[str]:
+    """Comment-heavy sources (Cyrillic and Latin)"""
+    index = 0
+
+    while True:
+        comment = "\n".join(
+            "// " + " ".join(rng.choice(_WORDS) for _ in range(rng.randrange(3, 12)))
+            for _ in range(rng.randrange(1, 6))
+        )
+        yield f"{comment}\npub fn op_{index}(target: *i16, value: i16) = {index}\n\n"
+        index += 1
+
+
+CORPORA: Final[Mapping[str, Callable[[Random], Iterator[str]]]] = {
+    "tables": _tables,
+    "structs": _structs,
+    "comments": _comments,
+}
+
+
+def generate(kind: str, size: int, seed: int = 0) -> str:
+    """Corpus of at least `size` UTF-8 bytes made of whole declarations"""
+    parts = list[str]()
+    written = 0
+
+    for part in CORPORA[kind](Random(seed)):
+        parts.append(part)
+        written += len(part.encode())
+
+        if written >= size:
+            return "".join(parts)
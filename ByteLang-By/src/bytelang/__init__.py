@@ -1,3 +1,64 @@
 """
 ByteLang
-"""
\ No newline at end of file
+"""
+
+from bytelang._arena import NodeArena
+from bytelang._arena import NodeKind
+from bytelang._ast import ArrayType
+from bytelang._ast import BinaryOp
+from bytelang._ast import Block
+from bytelang._ast import Call
+from bytelang._ast import Cast
+from bytelang._ast import Constant
+from bytelang._ast import Declaration
+from bytelang._ast import Expression
+from bytelang._ast import Field
+from bytelang._ast import Function
+from bytelang._ast import Identifier
+from bytelang._ast import Import
+from bytelang._ast import Index
+from bytelang._ast import Initializer
+from bytelang._ast import InitializerItem
+from bytelang._ast import LazyBlock
+from bytelang._ast import Literal
+from bytelang._ast import Member
+from bytelang._ast import Module
+from bytelang._ast import Native
+from bytelang._ast import Node
+from bytelang._ast import Statement
+from bytelang._ast import Struct
+from bytelang._ast import StructItem
+from bytelang._ast import UnaryOp
+from bytelang._ast import Variable
+from bytelang._buffer import TokenBuffer
+from bytelang._builder import Builder
+from bytelang._builder import TreeBuilder
+from bytelang._bundle import Bundle
+from bytelang._bundle import ModuleSource
+from bytelang._compiler import CompiledModule
+from bytelang._compiler import Compiler
+from bytelang._compiler import Interface
+from bytelang._compiler import Program
+from bytelang._diagnostic import Diagnostic
+from bytelang._diagnostic import Diagnostics
+from bytelang._evaluator import ArrayOf
+from bytelang._evaluator import EvaluationError
+from bytelang._evaluator import Evaluator
+from bytelang._evaluator import PointerTo
+from bytelang._evaluator import Primitive
+from bytelang._evaluator import Record
+from bytelang._evaluator import Type
+from bytelang._evaluator import Value
+from bytelang._lexer import Lexer
+from bytelang._lexer import LexerError
+from bytelang._operator import Operator
+from bytelang._parse_cache import ParseCache
+from bytelang._parser import ParseError
+from bytelang._parser import Parser
+from bytelang._position import LineIndex
+from bytelang._reachability import Reachability
+from bytelang._server import Server
+from bytelang._server import callServer
+from bytelang._symbol import SymbolTable
+from bytelang._syntax_tree import SyntaxTree
+from bytelang._token import Token
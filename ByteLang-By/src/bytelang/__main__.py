@@ -0,0 +1,63 @@
+"""
+python -m bytelang serve [--socket PATH] [--cache]
+python -m bytelang compile PATH... [--output FILE] [--jobs N] [--server PATH] [--cache]
+"""
+
+import sys
+from argparse import ArgumentParser
+
+from bytelang._compiler import Compiler
+from bytelang._server import Server
+from bytelang._server import callServer
+
+
+def main(arguments: list[str]) -> int:
+    parser = ArgumentParser(prog="python -m bytelang")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="compile server, JSON lines on a Unix socket or stdio")
+    serve.add_argument("--socket", help="Unix socket path (stdio if not given)")
+    serve.add_argument("--cache", action="store_true", help="keep parsed modules in the on-disk cache directory")
+
+    compile_ = commands.add_parser("compile", help="compile modules and link their data")
+    compile_.add_argument("paths", nargs="+", help=".bl files (or bundles) and directories of them")
+    compile_.add_argument("--output", help="file of linked data")
+    compile_.add_argument("--jobs", type=int, default=1, help="compiling processes (0 - all cores)")
+    compile_.add_argument("--server", help="socket of a running server to compile on")
+    compile_.add_argument("--cache", action="store_true", help="keep parsed modules in the on-disk cache directory (not with --server)")
+
+    options = parser.parse_args(arguments)
+
+    if options.command == "serve":
+        server = Server(Compiler(cache=options.cache))
+
+        try:
+            if options.socket is None:
+                server.serveStream(sys.stdin, sys.stdout)
+            else:
+                server.serveSocket(options.socket)
+
+        finally:
+            server.compiler.close()
+
+        return 0
+
+    params = {"paths": [str(path) for path in options.paths], "output": options.output, "jobs": options.jobs or None}
+
+    if options.server is not None:
+        response = callServer(options.server, "compile", **params)
+    else:
+        response = Server(Compiler(cache=options.cache)).handle({"method": "compile", "params": params})
+
+    if "error" in response:
+        print(response["error"], file=sys.stderr)
+        return 2
+
+    for diagnostic in response["result"]["diagnostics"]:
+        print(diagnostic, file=sys.stderr)
+
+    return 1 if response["result"]["diagnostics"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,580 @@
+from array import array
+from bisect import bisect_left
+from enum import IntEnum
+from enum import auto
+from gc import disable
+from gc import enable
+from gc import isenabled
+from itertools import pairwise
+from struct import Struct
+from struct import calcsize
+from struct import error as StructError
+from sys import byteorder
+from typing import Callable
+from typing import Final
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Sequence
+from typing import final
+
+from bytelang._ast import LazyBlock
+from bytelang._buffer import TokenBuffer
+from bytelang._builder import Builder
+from bytelang._builder import N
+from bytelang._operator import Operator
+from bytelang._token import Token
+
+
+class NodeKind(IntEnum):
+    """Kind of arena node"""
+
+    identifier = 0
+    literal = auto()
+    native = auto()
+    initializer_item = auto()
+    initializer = auto()
+    call = auto()
+    index = auto()
+    member = auto()
+    unary_op = auto()
+    binary_op = auto()
+    cast = auto()
+    array_type = auto()
+    struct = auto()
+    field = auto()
+    import_ = auto()
+    constant = auto()
+    variable = auto()
+    block = auto()
+    lazy_block = auto()
+    function = auto()
+    module = auto()
+
+
+_OPERATORS: Final = tuple(Operator)
+
+_NONE: Final = -1
+
+_MAGIC: Final = b"BLA<" if byteorder == "little" else b"BLA>"
+
+_HEADER: Final = Struct("=4sIi6I4x")
+"""magic, format, root, node count, line count, value count, text size, integer count, real count (8-byte aligned)"""
+
+_STRING: Final = Token.Type.literal_string.value
+
+_TOKEN_TYPES: Final = {t.value: t for t in Token.Type}
+"""Literal token type of its value (flags of a literal node)"""
+
+_REALS: Final = frozenset(t.value for t in (Token.Type.literal_number_real, Token.Type.literal_number_real_exp))
+
+_INLINE: Final = 0x80
+"""Flag of an integer literal whose payload is its value"""
+
+_INLINE_MAX: Final = 0x7FFFFFFF
+"""Largest integer stored in a payload"""
+
+
+@final
+class NodeArena(Builder[int]):
+    """
+    Columnar AST: a node is an integer index into typed arrays
+
+    `kinds[i]` - NodeKind, `first_child[i]` and `next_sibling[i]` - node indices (-1 - none),
+    `payloads[i]` - id of the node's name or literal value (-1 - none),
+    `flags[i]` - PUBLIC | MACRO, operator index (`Operator`) or literal token type (`Token.Type.value`),
+    Declarations (the only nodes with a line) are listed in `line_nodes` / `line_numbers`.
+
+    Children are in source order, an absent optional child has no node: flag `ABSENT << n` marks
+    the n-th child from the end absent, so with them put back each kind has a fixed child layout
+    (as the fields of the matching `bytelang._ast` class): call - callee, arguments...; function - parameters..., result, body, native.
+    Payload of a lazy_block node is an index in `lazy_blocks`.
+    Names and string literals are UTF-8 in one `text` buffer, value `v` is `text[value_offsets[v]:value_offsets[v + 1]]`,
+    names are stored once, strings (mostly unique) are not looked up.
+    Payload of a numeric literal is an index in `integers` (integer, character) or `reals`,
+    an integer up to 2**31 - 1 is the payload itself (flag 0x80 next to the token type):
+    values are decoded once by the lexer, readers take them as they are.
+    """
+
+    PUBLIC: Final = 1
+    MACRO: Final = 2
+    ABSENT: Final = 4
+    """Flag of an absent last child (of constant, variable, array_type or function), shifted left by its place from the end"""
+    FORMAT: Final = 3
+    """Version of the `dump` layout"""
+
+    def __init__(self) -> None:
+        self.kinds: Final = array("B")
+        self.first_child: Final = array("i")
+        self.next_sibling: Final = array("i")
+        self.payloads: Final = array("i")
+        self.flags: Final = array("B")
+        self.line_nodes: Final = array("I")
+        self.line_numbers: Final = array("I")
+        self.text: Final = bytearray()
+        self.value_offsets: Final = array("I", (0,))
+        self.integers: Final = array("Q")
+        self.reals: Final = array("d")
+        self._name_ids: Final = dict[str, int]()
+        self.lazy_blocks: Final = list[LazyBlock]()
+        self.root = _NONE
+        """Module node, -1 until built"""
+
+    # Reading
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of node arrays in bytes"""
+        columns = (
+            self.kinds, self.first_child, self.next_sibling, self.payloads, self.flags, self.line_nodes, self.line_numbers, self.value_offsets,
+            self.integers, self.reals
+        )
+        return len(self.text) + sum(column.itemsize * len(column) for column in columns)
+
+    def kind(self, node: int) -> NodeKind:
+        """Kind of node"""
+        return NodeKind(self.kinds[node])
+
+    def children(self, node: int) -> Iterator[int]:
+        """Child nodes in source order"""
+        next_sibling = self.next_sibling
+        child = self.first_child[node]
+
+        while child != _NONE:
+            yield child
+            child = next_sibling[child]
+
+    def deferred(self, node: int) -> LazyBlock:
+        """Token range of lazy_block node"""
+        return self.lazy_blocks[self.payloads[node]]
+
+    def value(self, node: int) -> Optional[str]:
+        """Name of node (None - unnamed, see `literalValue` for literals)"""
+        payload = self.payloads[node]
+
+        if payload == _NONE or self.kinds[node] == NodeKind.literal:
+            return None
+
+        offsets = self.value_offsets
+        return str(self.text[offsets[payload]:offsets[payload + 1]], "utf-8")
+
+    def line(self, node: int) -> int:
+        """Line of declaration node (0 - other nodes)"""
+        position = bisect_left(self.line_nodes, node)
+
+        if position < len(self.line_nodes) and self.line_nodes[position] == node:
+            return self.line_numbers[position]
+
+        return 0
+
+    def operator(self, node: int) -> Operator:
+        """Operator of unary_op or binary_op node"""
+        return _OPERATORS[self.flags[node]]
+
+    def literalType(self, node: int) -> Token.Type:
+        """Token type of literal node"""
+        return Token.Type(self.flags[node] & ~_INLINE)
+
+    def literalValue(self, node: int) -> int | float | bytes:
+        """Decoded value of literal node"""
+        payload = self.payloads[node]
+        flags = self.flags[node]
+
+        if flags == _STRING:
+            offsets = self.value_offsets
+            return bytes(self.text[offsets[payload]:offsets[payload + 1]])
+
+        if flags in _REALS:
+            return self.reals[payload]
+
+        if flags & _INLINE:
+            return payload
+
+        return self.integers[payload]
+
+    def walk(self, node: Optional[int] = None) -> Iterator[int]:
+        """Nodes of subtree (whole tree by default) in preorder"""
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        node = self.root if node is None else node
+        yield node
+
+        child = first_child[node]
+        stack = [child] if child != _NONE else []
+
+        while stack:
+            node = stack.pop()
+            yield node
+
+            sibling = next_sibling[node]
+
+            if sibling != _NONE:
+                stack.append(sibling)
+
+            child = first_child[node]
+
+            if child != _NONE:
+                stack.append(child)
+
+    def replay(self, builder: Builder[N], node: Optional[int] = None) -> N:
+        """
+        Rebuild subtree (whole tree by default) with another builder, without recursion
+
+        Children are rebuilt before their parent (reverse preorder), each kind by a function of a table.
+        The cyclic garbage collector is paused meanwhile: nodes are acyclic,
+        collections triggered by building them would only walk the growing tree.
+        """
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        kinds = self.kinds
+        rebuild = self._rebuilders(builder)
+        built = dict[int, Optional[N]]()
+        order = list(self.walk(node))
+        collecting = isenabled()
+        disable()
+
+        try:
+            for current in reversed(order):
+                children = []
+                child = first_child[current]
+
+                while child != _NONE:
+                    children.append(built.pop(child))
+                    child = next_sibling[child]
+
+                built[current] = rebuild[kinds[current]](current, children)
+
+        except IndexError:
+            raise ValueError("unknown node kind") from None
+
+        finally:
+            if collecting:
+                enable()
+
+        return built[order[0]]
+
+    def _rebuilders(self, builder: Builder[N]) -> tuple[Callable[[int, list[Optional[N]]], Optional[N]], ...]:
+        """Function of each node kind (by value): node, its rebuilt children -> node of builder"""
+        flags = self.flags
+        value = self.value
+        literal = self.literalValue
+        lines = dict(zip(self.line_nodes, self.line_numbers))
+        public = self.PUBLIC
+        macro = self.MACRO
+        lazy_blocks = self.lazy_blocks
+        payloads = self.payloads
+
+        def lazyBlock(node: int, _: list[Optional[N]]) -> N:
+            block = lazy_blocks[payloads[node]]
+            return builder.lazyBlock(block.tokens, block.start, block.end)
+
+        def slots(node: int, children: list[Optional[N]]) -> list[Optional[N]]:
+            """Children with the absent ones put back as None"""
+            absent = flags[node] // self.ABSENT
+
+            for place in range(absent.bit_length()):
+                if absent >> place & 1:
+                    children.insert(len(children) - place, None)
+
+            return children
+
+        def function(node: int, children: list[Optional[N]]) -> N:
+            children = slots(node, children)
+            result, body, native = children[-3:]
+            return builder.function(
+                value(node), children[:-3], result, body, native, bool(flags[node] & public), bool(flags[node] & macro), lines.get(node, 0)
+            )
+
+        rebuilders = {
+            NodeKind.identifier: lambda node, children: builder.identifier(value(node)),
+            NodeKind.literal: lambda node, children: builder.literal(_TOKEN_TYPES[flags[node] & ~_INLINE], literal(node)),
+            NodeKind.native: lambda node, children: builder.native(),
+            NodeKind.initializer_item: lambda node, children: builder.initializerItem(value(node), children[0]),
+            NodeKind.initializer: lambda node, children: builder.initializer(children),
+            NodeKind.call: lambda node, children: builder.call(children[0], children[1:]),
+            NodeKind.index: lambda node, children: builder.index(children[0], children[1]),
+            NodeKind.member: lambda node, children: builder.member(children[0], value(node)),
+            NodeKind.unary_op: lambda node, children: builder.unaryOp(_OPERATORS[flags[node]], children[0]),
+            NodeKind.binary_op: lambda node, children: builder.binaryOp(_OPERATORS[flags[node]], children[0], children[1]),
+            NodeKind.cast: lambda node, children: builder.cast(children[0], children[1]),
+            NodeKind.array_type: lambda node, children: builder.arrayType(*slots(node, children)),
+            NodeKind.struct: lambda node, children: builder.struct(children),
+            NodeKind.field: lambda node, children: builder.field(value(node), children[0], bool(flags[node] & public)),
+            NodeKind.import_: lambda node, children: builder.importDeclaration(value(node), lines.get(node, 0)),
+            NodeKind.constant: lambda node, children: builder.constant(
+                value(node), *slots(node, children), bool(flags[node] & public), lines.get(node, 0)
+            ),
+            NodeKind.variable: lambda node, children: builder.variable(
+                value(node), *slots(node, children), bool(flags[node] & public), lines.get(node, 0)
+            ),
+            NodeKind.block: lambda node, children: builder.block(children),
+            NodeKind.lazy_block: lazyBlock,
+            NodeKind.function: function,
+            NodeKind.module: lambda node, children: builder.module(children),
+        }
+        return tuple(rebuilders[kind] for kind in NodeKind)
+
+    # Serialization
+
+    def dump(self) -> bytes:
+        """
+        Columns as one binary image: header, 8-byte, 4-byte, then byte columns (native byte order)
+        Lazy blocks refer to tokens and are not stored, an arena with them can not be dumped.
+        """
+        if self.lazy_blocks:
+            raise ValueError("arena with lazy blocks can not be dumped")
+
+        header = _HEADER.pack(
+            _MAGIC, self.FORMAT, self.root,
+            len(self.kinds), len(self.line_nodes), len(self.value_offsets), len(self.text), len(self.integers), len(self.reals)
+        )
+        columns = (
+            self.integers, self.reals,
+            self.first_child, self.next_sibling, self.payloads, self.line_nodes, self.line_numbers, self.value_offsets,
+            self.kinds, self.flags, self.text
+        )
+        return header + b"".join(map(bytes, columns))
+
+    @classmethod
+    def load(cls, data: bytes | memoryview) -> "NodeArena":
+        """
+        Arena over an image made by `dump` (bytes, mmap) without copying it
+
+        Columns are read-only views of `data`, which stays referenced by them,
+        to build more nodes on top of it extend a new arena with it.
+        """
+        view = memoryview(data)
+
+        try:
+            magic, version, root, nodes, lines, values, text, integers, reals = _HEADER.unpack_from(view)
+
+        except StructError:
+            raise ValueError("truncated node arena image") from None
+
+        if magic != _MAGIC or version != cls.FORMAT:
+            raise ValueError("not a node arena image of this format")
+
+        sizes = (
+            (integers, "Q"), (reals, "d"),
+            (nodes, "i"), (nodes, "i"), (nodes, "i"), (lines, "I"), (lines, "I"), (values, "I"),
+            (nodes, "B"), (nodes, "B"), (text, "B")
+        )
+
+        if len(view) != _HEADER.size + sum(count * calcsize(code) for count, code in sizes):
+            raise ValueError("truncated node arena image")
+
+        columns = list[memoryview]()
+        offset = _HEADER.size
+
+        for count, code in sizes:
+            end = offset + count * calcsize(code)
+            columns.append(view[offset:end].cast(code))
+            offset = end
+
+        arena = cls()
+        integers, reals, first_child, next_sibling, payloads, line_nodes, line_numbers, value_offsets, kinds, flags, text = columns
+        vars(arena).update(
+            integers=integers,
+            reals=reals,
+            kinds=kinds,
+            first_child=first_child,
+            next_sibling=next_sibling,
+            payloads=payloads,
+            flags=flags,
+            line_nodes=line_nodes,
+            line_numbers=line_numbers,
+            text=text,
+            value_offsets=value_offsets,
+            root=root,
+        )
+        return arena
+
+    # Building
+
+    def extend(self, other: "NodeArena", nodes: Iterable[int]) -> list[int]:
+        """Append all nodes of `other` (built separately), return `nodes` of it as nodes of this arena"""
+        shift = len(self.kinds)
+        value_shift = len(self.value_offsets) - 1
+        text_shift = len(self.text)
+        lazy_shift = len(self.lazy_blocks)
+        integer_shift = len(self.integers)
+        real_shift = len(self.reals)
+        lazy_block = NodeKind.lazy_block
+        literal = NodeKind.literal
+        payloads = self.payloads
+
+        self.kinds.extend(other.kinds)
+        self.first_child.extend(_NONE if child == _NONE else child + shift for child in other.first_child)
+        self.next_sibling.extend(_NONE if sibling == _NONE else sibling + shift for sibling in other.next_sibling)
+
+        for kind, flags, payload in zip(other.kinds, other.flags, other.payloads):
+            if payload == _NONE or (kind == literal and flags & _INLINE):
+                pass
+            elif kind == lazy_block:
+                payload += lazy_shift
+            elif kind != literal or flags == _STRING:
+                payload += value_shift
+            elif flags in _REALS:
+                payload += real_shift
+            else:
+                payload += integer_shift
+
+            payloads.append(payload)
+
+        self.flags.extend(other.flags)
+        self.line_nodes.extend(node + shift for node in other.line_nodes)
+        self.line_numbers.extend(other.line_numbers)
+        self.text.extend(other.text)
+        self.value_offsets.extend(offset + text_shift for offset in other.value_offsets[1:])
+        self.integers.extend(other.integers)
+        self.reals.extend(other.reals)
+        self.lazy_blocks.extend(other.lazy_blocks)
+
+        for name, value in other._name_ids.items():
+            self._name_ids.setdefault(name, value + value_shift)
+
+        return [node + shift for node in nodes]
+
+    def _add(
+            self,
+            kind: NodeKind,
+            children: Sequence[Optional[int]] = (),
+            value: Optional[str] = None,
+            flags: int = 0,
+            line: int = 0
+    ) -> int:
+        if None in children:
+            flags |= sum(self.ABSENT << place for place, child in enumerate(reversed(children)) if child is None)
+            children = [child for child in children if child is not None]
+
+        next_sibling = self.next_sibling
+
+        for child, sibling in pairwise(children):
+            next_sibling[child] = sibling
+
+        payload = _NONE
+
+        if value is not None:
+            payload = self._name_ids.get(value, _NONE)
+
+            if payload == _NONE:
+                payload = len(self.value_offsets) - 1
+                self.text += value.encode()
+                self.value_offsets.append(len(self.text))
+                self._name_ids[value] = payload
+
+        node = len(self.kinds)
+        self.kinds.append(kind)
+        self.first_child.append(children[0] if children else _NONE)
+        next_sibling.append(_NONE)
+        self.payloads.append(payload)
+        self.flags.append(flags)
+
+        if line:
+            self.line_nodes.append(node)
+            self.line_numbers.append(line)
+
+        return node
+
+    @classmethod
+    def _declarationFlags(cls, public: bool, macro: bool = False) -> int:
+        return (cls.PUBLIC if public else 0) | (cls.MACRO if macro else 0)
+
+    def identifier(self, name: str) -> int:
+        return self._add(NodeKind.identifier, value=name)
+
+    def literal(self, token_type: Token.Type, value: int | float | bytes) -> int:
+        node = self._add(NodeKind.literal, flags=token_type.value)
+
+        if token_type.value == _STRING:
+            self.payloads[node] = len(self.value_offsets) - 1
+            self.text += value
+            self.value_offsets.append(len(self.text))
+
+        elif token_type.value in _REALS:
+            self.payloads[node] = len(self.reals)
+            self.reals.append(value)
+
+        elif value <= _INLINE_MAX:
+            self.payloads[node] = value
+            self.flags[node] |= _INLINE
+
+        else:
+            self.payloads[node] = len(self.integers)
+            self.integers.append(value)
+
+        return node
+
+    def native(self) -> int:
+        return self._add(NodeKind.native)
+
+    def initializerItem(self, name: Optional[str], value: int) -> int:
+        return self._add(NodeKind.initializer_item, (value,), name)
+
+    def initializer(self, items: Sequence[int]) -> int:
+        return self._add(NodeKind.initializer, items)
+
+    def call(self, callee: int, arguments: Sequence[int]) -> int:
+        return self._add(NodeKind.call, (callee, *arguments))
+
+    def index(self, target: int, index: int) -> int:
+        return self._add(NodeKind.index, (target, index))
+
+    def member(self, target: int, name: str) -> int:
+        return self._add(NodeKind.member, (target,), name)
+
+    def unaryOp(self, operator: Operator, operand: int) -> int:
+        return self._add(NodeKind.unary_op, (operand,), flags=_OPERATORS.index(operator))
+
+    def binaryOp(self, operator: Operator, left: int, right: int) -> int:
+        return self._add(NodeKind.binary_op, (left, right), flags=_OPERATORS.index(operator))
+
+    def cast(self, value: int, value_type: int) -> int:
+        return self._add(NodeKind.cast, (value, value_type))
+
+    def arrayType(self, length: Optional[int], element: int) -> int:
+        return self._add(NodeKind.array_type, (length, element))
+
+    def struct(self, items: Sequence[int]) -> int:
+        return self._add(NodeKind.struct, items)
+
+    def field(self, name: str, value_type: int, public: bool) -> int:
+        return self._add(NodeKind.field, (value_type,), name, self._declarationFlags(public))
+
+    def importDeclaration(self, name: str, line: int) -> int:
+        return self._add(NodeKind.import_, value=name, line=line)
+
+    def constant(self, name: str, value_type: Optional[int], value: int, public: bool, line: int) -> int:
+        return self._add(NodeKind.constant, (value_type, value), name, self._declarationFlags(public), line)
+
+    def variable(self, name: str, value_type: int, value: Optional[int], public: bool, line: int) -> int:
+        return self._add(NodeKind.variable, (value_type, value), name, self._declarationFlags(public), line)
+
+    def block(self, statements: Sequence[int]) -> int:
+        return self._add(NodeKind.block, statements)
+
+    def lazyBlock(self, tokens: TokenBuffer, start: int, end: int) -> int:
+        node = self._add(NodeKind.lazy_block)
+        self.payloads[node] = len(self.lazy_blocks)
+        self.lazy_blocks.append(LazyBlock(tokens=tokens, start=start, end=end))
+        return node
+
+    def function(
+            self,
+            name: str,
+            parameters: Sequence[int],
+            result: Optional[int],
+            body: Optional[int],
+            native: Optional[int],
+            public: bool,
+            macro: bool,
+            line: int
+    ) -> int:
+        return self._add(NodeKind.function, (*parameters, result, body, native), name, self._declarationFlags(public, macro), line)
+
+    def module(self, declarations: Sequence[int]) -> int:
+        self.root = self._add(NodeKind.module, declarations)
+        return self.root
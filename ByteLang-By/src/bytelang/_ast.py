@@ -0,0 +1,229 @@
+from dataclasses import dataclass
+from typing import Optional
+from typing import Union
+from typing import final
+
+from bytelang._buffer import TokenBuffer
+from bytelang._operator import Operator
+from bytelang._token import Token
+
+
+class Node:
+    """AST node"""
+
+
+# Expressions
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Identifier(Node):
+    """Name"""
+
+    name: str
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Literal(Node):
+    """Literal of its token type, the value is decoded by the lexer (string: bytes with escapes applied)"""
+
+    type: Token.Type
+    value: int | float | bytes
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Native(Node):
+    """ ... - implemented by the executor """
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class InitializerItem(Node):
+    """Item of initializer list: `value` or `name: value`"""
+
+    name: Optional[str]
+    value: "Expression"
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Initializer(Node):
+    """ {a, b} or {x: a, y: b} """
+
+    items: tuple[InitializerItem, ...]
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Call(Node):
+    """ callee(arguments) """
+
+    callee: "Expression"
+    arguments: tuple["Expression", ...]
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Index(Node):
+    """ target[index] """
+
+    target: "Expression"
+    index: "Expression"
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Member(Node):
+    """ target.name """
+
+    target: "Expression"
+    name: str
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class UnaryOp(Node):
+    """ -operand, *operand """
+
+    operator: Operator
+    operand: "Expression"
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class BinaryOp(Node):
+    """ left + right """
+
+    operator: Operator
+    left: "Expression"
+    right: "Expression"
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Cast(Node):
+    """ value as type """
+
+    value: "Expression"
+    type: "Expression"
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class ArrayType(Node):
+    """ [length]element, []element - slice """
+
+    length: Optional["Expression"]
+    element: "Expression"
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Struct(Node):
+    """ struct {...} - type value """
+
+    items: tuple["StructItem", ...]
+
+
+Expression = Union[Identifier, Literal, Native, Initializer, Call, Index, Member, UnaryOp, BinaryOp, Cast, ArrayType, Struct]
+
+
+# Declarations
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Field(Node):
+    """ name: type """
+
+    name: str
+    type: Expression
+    public: bool = False
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Import(Node):
+    """ import name """
+
+    name: str
+    line: int
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Constant(Node):
+    """ const name = value """
+
+    name: str
+    type: Optional[Expression]
+    value: Expression
+    public: bool = False
+    line: int
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Variable(Node):
+    """ var name: type = value """
+
+    name: str
+    type: Expression
+    value: Optional[Expression]
+    public: bool = False
+    line: int
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Block(Node):
+    """ {statements} """
+
+    statements: tuple["Statement", ...]
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class LazyBlock(Node):
+    """Block not parsed yet: its tokens are `tokens[start:end]` (braces included)"""
+
+    tokens: TokenBuffer
+    start: int
+    end: int
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Function(Node):
+    """
+    fn name(parameters) result body
+
+    Body is a block (LazyBlock if skimmed), an expression (macro) or None if the function is native,
+    then `native` is the executor's function index (or Native).
+    """
+
+    name: str
+    parameters: tuple[Field, ...]
+    result: Optional[Expression]
+    body: Optional[Block | LazyBlock | Expression]
+    native: Optional[Expression] = None
+    public: bool = False
+    macro: bool = False
+    line: int
+
+
+Declaration = Union[Import, Constant, Variable, Function]
+
+StructItem = Union[Field, Constant, Variable, Function]
+
+Statement = Union[Constant, Variable, Expression]
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Module(Node):
+    """Source file"""
+
+    declarations: tuple[Declaration, ...]
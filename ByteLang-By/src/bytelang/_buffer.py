@@ -0,0 +1,133 @@
+from array import array
+from functools import cached_property
+from typing import Final
+from typing import Iterator
+from typing import Optional
+from typing import Sequence
+from typing import final
+from typing import overload
+
+from bytelang._diagnostic import Diagnostic
+from bytelang._position import LineIndex
+from bytelang._symbol import SymbolTable
+from bytelang._token import Token
+
+_TYPES: Final[Sequence[Optional[Token.Type]]] = (None, *Token.Type)
+"""Token type by code (Token.Type.value)"""
+
+_WITH_LEXEME: Final = frozenset((
+    Token.Type.literal_string,
+    Token.Type.literal_number_integer,
+    Token.Type.literal_number_integer_character,
+    Token.Type.literal_number_integer_hex,
+    Token.Type.literal_number_integer_bin,
+    Token.Type.literal_number_real,
+    Token.Type.literal_number_real_exp,
+    Token.Type.identifier,
+    Token.Type.keyword,
+))
+
+
+@final
+class TokenBuffer(Sequence[Token]):
+    """
+    Compact token container (struct of arrays)
+
+    Token `i` is `kinds[i]` (Token.Type.value), `starts[i]`, `ends[i]` (offsets in source).
+    Numeric literals are decoded at lex time: `integers[i]` (integer and character), `reals[i]` (real).
+    For identifiers and keywords `integers[i]` is the id of the name in `symbols`.
+    Token objects are created only on indexing, a parser may walk the arrays by index instead.
+    Line and column are resolved through `lines` only when a token is materialised,
+    `origin` is the position of the first source character (source may be a part of a file).
+    Source may be raw UTF-8 (bytes, memoryview, mmap): offsets are then byte offsets
+    and lexemes are decoded on request.
+    """
+
+    def __init__(self, source: str | bytes | memoryview, *, symbols: SymbolTable, origin: tuple[int, int] = (1, 0)) -> None:
+        self.source: Final = source
+        self.symbols: Final = symbols
+        self.origin: Final = origin
+        self.kinds: Final = array("B")
+        self.starts: Final = array("I")
+        self.ends: Final = array("I")
+        self.integers: Final = array("Q")
+        self.reals: Final = array("d")
+        self.errors: Final = list[Diagnostic]()
+        self.truncated = False
+        """Lexing stopped after the error budget was spent"""
+
+    @cached_property
+    def lines(self) -> LineIndex:
+        """Line start index of source"""
+        return LineIndex.of(self.source)
+
+    def locate(self, offset: int) -> tuple[int, int]:
+        """Line and column of source offset"""
+        line, col = self.lines.resolve(offset)
+        origin_line, origin_col = self.origin
+        return line + origin_line - 1, col + origin_col if line == 1 else col
+
+    def position(self, index: int) -> tuple[int, int]:
+        """Line and column of token"""
+        return self.locate(self.starts[index])
+
+    def section(self, begin: int, end: int, *, origin: Optional[tuple[int, int]] = None) -> "TokenBuffer":
+        """
+        Buffer of tokens from `begin` to `end` over the source between them (names keep their ids in `symbols`)
+        :param origin: position of its first source character (default - its place in this source)
+        """
+        base = self.starts[begin]
+        stop = self.starts[end] if end < len(self) else len(self.source)
+        text = self.source[base:stop]
+        section = TokenBuffer(
+            text if isinstance(text, (str, bytes)) else bytes(text),
+            symbols=self.symbols,
+            origin=self.locate(base) if origin is None else origin
+        )
+        section.kinds.extend(self.kinds[begin:end])
+        section.starts.extend(start - base for start in self.starts[begin:end])
+        section.ends.extend(end - base for end in self.ends[begin:end])
+        section.integers.extend(self.integers[begin:end])
+        section.reals.extend(self.reals[begin:end])
+        return section
+
+    def kind(self, index: int) -> Token.Type:
+        """Type of token"""
+        return _TYPES[self.kinds[index]]
+
+    def symbol(self, index: int) -> int:
+        """Symbol id of identifier or keyword"""
+        return self.integers[index]
+
+    def lexeme(self, index: int) -> str:
+        """Source text of token"""
+        text = self.source[self.starts[index]:self.ends[index]]
+        return text if isinstance(text, str) else str(text, "utf-8")
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @overload
+    def __getitem__(self, index: int) -> Token: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Token]: ...
+
+    def __getitem__(self, index: int | slice) -> Token | Sequence[Token]:
+        if isinstance(index, slice):
+            return tuple(self[i] for i in range(*index.indices(len(self))))
+
+        return self._make(index)
+
+    def __iter__(self) -> Iterator[Token]:
+        return map(self._make, range(len(self)))
+
+    def _make(self, index: int) -> Token:
+        token_type = _TYPES[self.kinds[index]]
+        line, col = self.position(index)
+        return Token(
+            type=token_type,
+            line=line,
+            col=col,
+            lexeme=self.lexeme(index) if token_type in _WITH_LEXEME else None
+        )
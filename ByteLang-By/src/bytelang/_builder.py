@@ -0,0 +1,230 @@
+from abc import ABC
+from abc import abstractmethod
+from typing import Generic
+from typing import Optional
+from typing import Sequence
+from typing import TypeVar
+from typing import final
+
+from bytelang._ast import ArrayType
+from bytelang._ast import BinaryOp
+from bytelang._ast import Block
+from bytelang._ast import Call
+from bytelang._ast import Cast
+from bytelang._ast import Constant
+from bytelang._ast import Field
+from bytelang._ast import Function
+from bytelang._ast import Identifier
+from bytelang._ast import Import
+from bytelang._ast import Index
+from bytelang._ast import Initializer
+from bytelang._ast import InitializerItem
+from bytelang._ast import LazyBlock
+from bytelang._ast import Literal
+from bytelang._ast import Member
+from bytelang._ast import Module
+from bytelang._ast import Native
+from bytelang._ast import Node
+from bytelang._ast import Struct
+from bytelang._ast import UnaryOp
+from bytelang._ast import Variable
+from bytelang._buffer import TokenBuffer
+from bytelang._operator import Operator
+from bytelang._token import Token
+
+N = TypeVar("N")
+"""Node handle of a builder"""
+
+
+class Builder(ABC, Generic[N]):
+    """
+    Parser output: creates a node from its already built children
+
+    The parser does not depend on the node representation,
+    a builder may make objects (TreeBuilder) or rows of arrays (NodeArena).
+    """
+
+    # Expressions
+
+    @abstractmethod
+    def identifier(self, name: str) -> N:
+        """name"""
+
+    @abstractmethod
+    def literal(self, token_type: Token.Type, value: int | float | bytes) -> N:
+        """Literal of decoded value"""
+
+    @abstractmethod
+    def native(self) -> N:
+        """ ... """
+
+    @abstractmethod
+    def initializerItem(self, name: Optional[str], value: N) -> N:
+        """`value` or `name: value`"""
+
+    @abstractmethod
+    def initializer(self, items: Sequence[N]) -> N:
+        """ {items} """
+
+    @abstractmethod
+    def call(self, callee: N, arguments: Sequence[N]) -> N:
+        """ callee(arguments) """
+
+    @abstractmethod
+    def index(self, target: N, index: N) -> N:
+        """ target[index] """
+
+    @abstractmethod
+    def member(self, target: N, name: str) -> N:
+        """ target.name """
+
+    @abstractmethod
+    def unaryOp(self, operator: Operator, operand: N) -> N:
+        """ -operand """
+
+    @abstractmethod
+    def binaryOp(self, operator: Operator, left: N, right: N) -> N:
+        """ left + right """
+
+    @abstractmethod
+    def cast(self, value: N, value_type: N) -> N:
+        """ value as type """
+
+    @abstractmethod
+    def arrayType(self, length: Optional[N], element: N) -> N:
+        """ [length]element """
+
+    @abstractmethod
+    def struct(self, items: Sequence[N]) -> N:
+        """ struct {items} """
+
+    # Declarations
+
+    @abstractmethod
+    def field(self, name: str, value_type: N, public: bool) -> N:
+        """ name: type """
+
+    @abstractmethod
+    def importDeclaration(self, name: str, line: int) -> N:
+        """ import name """
+
+    @abstractmethod
+    def constant(self, name: str, value_type: Optional[N], value: N, public: bool, line: int) -> N:
+        """ const name: type = value """
+
+    @abstractmethod
+    def variable(self, name: str, value_type: N, value: Optional[N], public: bool, line: int) -> N:
+        """ var name: type = value """
+
+    @abstractmethod
+    def block(self, statements: Sequence[N]) -> N:
+        """ {statements} """
+
+    @abstractmethod
+    def lazyBlock(self, tokens: TokenBuffer, start: int, end: int) -> N:
+        """Skimmed block, `tokens[start:end]`"""
+
+    @abstractmethod
+    def function(
+            self,
+            name: str,
+            parameters: Sequence[N],
+            result: Optional[N],
+            body: Optional[N],
+            native: Optional[N],
+            public: bool,
+            macro: bool,
+            line: int
+    ) -> N:
+        """ fn name(parameters) result body """
+
+    @abstractmethod
+    def module(self, declarations: Sequence[N]) -> N:
+        """Source file"""
+
+
+@final
+class TreeBuilder(Builder[Node]):
+    """Builds frozen dataclass nodes (`bytelang._ast`)"""
+
+    def identifier(self, name: str) -> Node:
+        return Identifier(name=name)
+
+    def literal(self, token_type: Token.Type, value: int | float | bytes) -> Node:
+        return Literal(type=token_type, value=value)
+
+    def native(self) -> Node:
+        return Native()
+
+    def initializerItem(self, name: Optional[str], value: Node) -> Node:
+        return InitializerItem(name=name, value=value)
+
+    def initializer(self, items: Sequence[Node]) -> Node:
+        return Initializer(items=tuple(items))
+
+    def call(self, callee: Node, arguments: Sequence[Node]) -> Node:
+        return Call(callee=callee, arguments=tuple(arguments))
+
+    def index(self, target: Node, index: Node) -> Node:
+        return Index(target=target, index=index)
+
+    def member(self, target: Node, name: str) -> Node:
+        return Member(target=target, name=name)
+
+    def unaryOp(self, operator: Operator, operand: Node) -> Node:
+        return UnaryOp(operator=operator, operand=operand)
+
+    def binaryOp(self, operator: Operator, left: Node, right: Node) -> Node:
+        return BinaryOp(operator=operator, left=left, right=right)
+
+    def cast(self, value: Node, value_type: Node) -> Node:
+        return Cast(value=value, type=value_type)
+
+    def arrayType(self, length: Optional[Node], element: Node) -> Node:
+        return ArrayType(length=length, element=element)
+
+    def struct(self, items: Sequence[Node]) -> Node:
+        return Struct(items=tuple(items))
+
+    def field(self, name: str, value_type: Node, public: bool) -> Node:
+        return Field(name=name, type=value_type, public=public)
+
+    def importDeclaration(self, name: str, line: int) -> Node:
+        return Import(name=name, line=line)
+
+    def constant(self, name: str, value_type: Optional[Node], value: Node, public: bool, line: int) -> Node:
+        return Constant(name=name, type=value_type, value=value, public=public, line=line)
+
+    def variable(self, name: str, value_type: Node, value: Optional[Node], public: bool, line: int) -> Node:
+        return Variable(name=name, type=value_type, value=value, public=public, line=line)
+
+    def block(self, statements: Sequence[Node]) -> Node:
+        return Block(statements=tuple(statements))
+
+    def lazyBlock(self, tokens: TokenBuffer, start: int, end: int) -> Node:
+        return LazyBlock(tokens=tokens, start=start, end=end)
+
+    def function(
+            self,
+            name: str,
+            parameters: Sequence[Node],
+            result: Optional[Node],
+            body: Optional[Node],
+            native: Optional[Node],
+            public: bool,
+            macro: bool,
+            line: int
+    ) -> Node:
+        return Function(
+            name=name,
+            parameters=tuple(parameters),
+            result=result,
+            body=body,
+            native=native,
+            public=public,
+            macro=macro,
+            line=line
+        )
+
+    def module(self, declarations: Sequence[Node]) -> Node:
+        return Module(declarations=tuple(declarations))
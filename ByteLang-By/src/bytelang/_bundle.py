@@ -0,0 +1,190 @@
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from dataclasses import replace
+from itertools import compress
+from itertools import repeat
+from os import cpu_count
+from typing import Final
+from typing import Iterable
+from typing import Mapping
+from typing import Optional
+from typing import Sequence
+from typing import final
+
+from bytelang._ast import Module
+from bytelang._buffer import TokenBuffer
+from bytelang._diagnostic import Diagnostics
+from bytelang._lexer import Lexer
+from bytelang._parser import Parser
+from bytelang._symbol import SymbolTable
+from bytelang._token import Token
+
+_MARKER: Final = r"^//!([A-Za-z_][A-Za-z0-9_]*)\.bl[ \t\r]*$"
+_TEXT_MARKER: Final = re.compile(_MARKER, re.MULTILINE)
+_BINARY_MARKER: Final = re.compile(_MARKER.encode(), re.MULTILINE)
+_IDENTIFIER: Final = Token.Type.identifier.value
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class ModuleSource:
+    """Virtual source of a module inside a bundle"""
+
+    name: str
+    """Module name (marker without `.bl`)"""
+    source: str | bytes
+    offset: int
+    """Offset of the first source unit in the bundle"""
+    line: int
+    """Line of the first source unit in the bundle"""
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Bundle:
+    """Several modules packed into one file, each starts after a `//!name.bl` line"""
+
+    modules: Sequence[ModuleSource]
+
+    def __post_init__(self) -> None:
+        names = set[str]()
+
+        for module in self.modules:
+            if module.name in names:
+                raise ValueError(f"module '{module.name}' is defined twice in the bundle")
+
+            names.add(module.name)
+
+    @classmethod
+    def split(cls, source: str | bytes, name: str = "") -> "Bundle":
+        """
+        Find module boundaries with one scan
+        :param name: name of the text before the first marker (dropped if blank)
+        """
+        marker = _TEXT_MARKER if isinstance(source, str) else _BINARY_MARKER
+        newline = "\n" if isinstance(source, str) else b"\n"
+
+        modules = list[ModuleSource]()
+        begin = 0
+        line = 1
+
+        for match in marker.finditer(source):
+            if begin or source[:match.start()].strip():
+                modules.append(ModuleSource(name=name, source=source[begin:match.start()], offset=begin, line=line))
+
+            line += source.count(newline, begin, match.end()) + 1
+            begin = match.end() + 1
+            name = match.group(1) if isinstance(source, str) else str(match.group(1), "ascii")
+
+        if begin or source.strip():
+            modules.append(ModuleSource(name=name, source=source[begin:], offset=begin, line=line))
+
+        return cls(modules=modules)
+
+    def lex(self, lexer: Lexer, *, jobs: Optional[int] = None) -> Mapping[str, TokenBuffer]:
+        """
+        Lex modules in a process pool (in this process if `jobs` is 1)
+
+        Token positions are bundle positions: line and column through the buffer origin,
+        offsets are relative to `ModuleSource.offset`. All modules share one symbol table,
+        a worker sends back the names it interned and its identifier ids are mapped into the table.
+        """
+        jobs = jobs or cpu_count() or 1
+        symbols = lexer.symbols()
+
+        if jobs == 1 or len(self.modules) < 2:
+            return {module.name: _lex(lexer, module, symbols) for module in self.modules}
+
+        with ProcessPoolExecutor(min(jobs, len(self.modules))) as executor:
+            chunks = executor.map(
+                _lexColumns,
+                repeat(lexer),
+                (module.source for module in self.modules),
+                chunksize=_chunkSize(len(self.modules), jobs)
+            )
+
+            return {
+                module.name: _assemble(module, symbols, *columns)
+                for module, columns in zip(self.modules, chunks)
+            }
+
+    def parse(self, parser: Parser, *, jobs: Optional[int] = None, diagnostics: Optional[Diagnostics] = None) -> Mapping[str, Module]:
+        """
+        Lex and parse modules in a process pool (in this process if `jobs` is 1)
+
+        Declaration lines are bundle lines, workers send back the module trees (and their errors) only.
+        :param diagnostics: see `Parser.parse`, errors of the modules in bundle order,
+        lexer errors of a module are merged into its parse errors by position
+        """
+        jobs = jobs or cpu_count() or 1
+        report = diagnostics is not None
+        limit = None if diagnostics is None else diagnostics.limit
+
+        if jobs == 1 or len(self.modules) < 2:
+            parts = (_parseTokens(parser, tokens, report, limit) for tokens in self.lex(parser.lexer, jobs=1).values())
+            return _collect(self.modules, parts, diagnostics)
+
+        with ProcessPoolExecutor(min(jobs, len(self.modules))) as executor:
+            parts = executor.map(_parse, repeat(parser), self.modules, repeat(report), repeat(limit), chunksize=_chunkSize(len(self.modules), jobs))
+            return _collect(self.modules, parts, diagnostics)
+
+
+def _chunkSize(modules: int, jobs: int) -> int:
+    return max(1, modules // (jobs * 4))
+
+
+def _lex(lexer: Lexer, module: ModuleSource, symbols: SymbolTable) -> TokenBuffer:
+    tokens = lexer.scan(module.source, symbols)
+    return _assemble(module, symbols, (), tokens.kinds, tokens.starts, tokens.ends, tokens.integers, tokens.reals, tokens.errors)
+
+
+def _lexColumns(lexer: Lexer, source: str | bytes) -> tuple:
+    """Lex in a worker, send back columns and interned names only (the source is already in the parent)"""
+    tokens = lexer.scan(source)
+    symbols = tokens.symbols
+    return symbols.names[symbols.keyword_count:], tokens.kinds, tokens.starts, tokens.ends, tokens.integers, tokens.reals, tokens.errors
+
+
+def _parse(parser: Parser, module: ModuleSource, report: bool, limit: Optional[int]) -> tuple[Module, Optional[Diagnostics]]:
+    return _parseTokens(parser, _lex(parser.lexer, module, parser.lexer.symbols()), report, limit)
+
+
+def _parseTokens(parser: Parser, tokens: TokenBuffer, report: bool, limit: Optional[int]) -> tuple[Module, Optional[Diagnostics]]:
+    """Module of tokens and its own sink (None unless `report`), lexer errors merged into it"""
+    diagnostics = Diagnostics(limit) if report else None
+    return parser.parse(tokens, diagnostics=diagnostics), diagnostics
+
+
+def _collect(modules: Sequence[ModuleSource], parts: Iterable[tuple[Module, Optional[Diagnostics]]], diagnostics: Optional[Diagnostics]) -> dict[str, Module]:
+    """Modules by name, errors of their sinks recorded in `diagnostics` in module order"""
+    parsed = dict[str, Module]()
+
+    for module, (tree, errors) in zip(modules, parts):
+        parsed[module.name] = tree
+
+        if diagnostics is not None and errors is not None:
+            diagnostics.extend(errors)
+
+    return parsed
+
+
+def _assemble(module: ModuleSource, symbols: SymbolTable, names, kinds, starts, ends, integers, reals, errors) -> TokenBuffer:
+    """Token buffer at the module's place in the bundle, identifiers of `names` (a worker's table) mapped into `symbols`"""
+    tokens = TokenBuffer(module.source, symbols=symbols, origin=(module.line, 0))
+    tokens.kinds.extend(kinds)
+    tokens.starts.extend(starts)
+    tokens.ends.extend(ends)
+    tokens.integers.extend(integers)
+    tokens.reals.extend(reals)
+    tokens.errors.extend(replace(error, line=error.line + module.line - 1) for error in errors)
+
+    if names:
+        ids = list(range(symbols.keyword_count))
+        ids.extend(map(symbols.intern, names))
+        column = tokens.integers
+
+        for index in compress(range(len(kinds)), map(_IDENTIFIER.__eq__, kinds)):
+            column[index] = ids[column[index]]
+
+    return tokens
@@ -0,0 +1,56 @@
+from mmap import ACCESS_READ
+from mmap import mmap
+from os import environ
+from os import getpid
+from os import replace
+from pathlib import Path
+from typing import Final
+from typing import Optional
+
+_ENVIRONMENT: Final = "BYTELANG_CACHE_DIR"
+
+
+def cacheDirectory() -> Optional[Path]:
+    """
+    Directory of on-disk caches
+    `$BYTELANG_CACHE_DIR` (empty - caching disabled), `$XDG_CACHE_HOME/bytelang` or `~/.cache/bytelang`
+    """
+    if (path := environ.get(_ENVIRONMENT)) is not None:
+        return Path(path) if path else None
+
+    if xdg := environ.get("XDG_CACHE_HOME"):
+        return Path(xdg) / "bytelang"
+
+    return Path.home() / ".cache" / "bytelang"
+
+
+def mapCache(name: str) -> Optional[bytes | mmap]:
+    """Cached entry mapped read-only (read if it can not be mapped) or None"""
+    if (directory := cacheDirectory()) is None:
+        return None
+
+    try:
+        with open(directory / name, "rb") as file:
+            try:
+                return mmap(file.fileno(), 0, access=ACCESS_READ)
+
+            except (OSError, ValueError):
+                return file.read()
+
+    except OSError:
+        return None
+
+
+def writeCache(name: str, data: bytes) -> None:
+    """Store entry atomically, a failure only means a miss next time"""
+    if (directory := cacheDirectory()) is None:
+        return
+
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        temporary = directory / f".{name}.{getpid()}"
+        temporary.write_bytes(data)
+        replace(temporary, directory / name)
+
+    except OSError:
+        pass
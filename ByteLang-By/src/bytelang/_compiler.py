@@ -0,0 +1,550 @@
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from dataclasses import replace
+from hashlib import blake2b
+from itertools import groupby
+from os import cpu_count
+from typing import Final
+from typing import Mapping
+from typing import Optional
+from typing import final
+
+from bytelang._ast import Constant
+from bytelang._ast import Declaration
+from bytelang._ast import Function
+from bytelang._ast import Import
+from bytelang._ast import LazyBlock
+from bytelang._ast import Module
+from bytelang._ast import Struct
+from bytelang._ast import Variable
+from bytelang._buffer import TokenBuffer
+from bytelang._builder import TreeBuilder
+from bytelang._diagnostic import Diagnostic
+from bytelang._diagnostic import Diagnostics
+from bytelang._evaluator import ArrayOf
+from bytelang._evaluator import EvaluationError
+from bytelang._evaluator import Evaluator
+from bytelang._evaluator import PointerTo
+from bytelang._evaluator import Primitive
+from bytelang._evaluator import Record
+from bytelang._evaluator import Type
+from bytelang._evaluator import Value
+from bytelang._lexer import Binary
+from bytelang._lexer import LexerError
+from bytelang._parse_cache import ParseCache
+from bytelang._parser import Parser
+from bytelang._parser import GRAMMAR_VERSION
+from bytelang._reachability import Key
+from bytelang._reachability import Reachability
+from bytelang._token import Token
+
+_LEXER_ERRORS: Final = 100
+"""Error budget given to a parser's lexer which has none: lexer errors of a module become its diagnostics"""
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Interface:
+    """What importers see of a module"""
+
+    constants: Mapping[str, Value]
+    """Values of public constants"""
+    variables: Mapping[str, Type]
+    """Types of public variables"""
+    functions: frozenset[str]
+    """Names of public functions"""
+    digest: str
+    """Hash of all the above: importers are compiled again only if it changes"""
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class CompiledModule:
+    """Semantic result of a module"""
+
+    name: str
+    imports: tuple[str, ...]
+    """Imported modules of the program"""
+    constants: Mapping[str, Value]
+    data: bytes
+    """Initial values of module variables packed in declaration order"""
+    symbols: Mapping[str, int]
+    """Offset of each variable in data"""
+    interface: Interface
+    diagnostics: tuple[Diagnostic, ...]
+    """Errors of parsing and evaluation, declarations with errors are left out"""
+    key: str
+    """Hash of source, compiler settings and interfaces of imports the result was made from"""
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Program:
+    """Linked program"""
+
+    data: bytes
+    """Data of modules in compile order"""
+    symbols: Mapping[str, int]
+    """Offset of `module.variable` in data"""
+
+
+def _parseModule(parser: Parser, cache: Optional[ParseCache], source: str | Binary | TokenBuffer) -> tuple[Module, tuple[Diagnostic, ...]]:
+    """Module of source (or of its tokens) and its parse errors, through the parse cache if there is one (a lexer error leaves it empty)"""
+    diagnostics = Diagnostics()
+
+    try:
+        if cache is None:
+            module = parser.parse(source, diagnostics=diagnostics)
+        else:
+            module = cache.parse(source, diagnostics=diagnostics).replay(TreeBuilder())
+
+    except LexerError as error:
+        module = Module(declarations=())
+        diagnostics.report(error.line, error.col, "{}", error.message)
+
+    if cache is None and parser.lazy_bodies:
+        module = _expand(parser, module, diagnostics)
+
+    return module, tuple(diagnostics)
+
+
+def _expand(parser: Parser, module: Module, diagnostics: Diagnostics) -> Module:
+    """
+    Module whose skimmed bodies reachable from public declarations, constants and variables are parsed
+
+    Other bodies stay LazyBlock, their errors are not reported.
+    A declaration with a broken reachable body (its own or of a method) is reported and left out.
+    """
+    roots = [
+        ("", declaration.name) for declaration in module.declarations
+        if not isinstance(declaration, Import) and (declaration.public or isinstance(declaration, (Constant, Variable)))
+    ]
+    reached = Reachability(parser=parser).reach({"": module}, roots, diagnostics)
+    broken = {path.partition(".")[0] for (_, path), node in reached.items() if isinstance(node, Function) and isinstance(node.body, LazyBlock)}
+    declarations = list[Declaration]()
+
+    for declaration in module.declarations:
+        if isinstance(declaration, Import):
+            declarations.append(declaration)
+            continue
+
+        if declaration.name in broken:
+            continue
+
+        declaration = reached.get(("", declaration.name), declaration)
+
+        if isinstance(declaration, Constant) and isinstance(declaration.value, Struct):
+            declaration = replace(declaration, value=_methods(declaration.name, declaration.value, reached))
+
+        elif isinstance(declaration, Function) and isinstance(declaration.body, Struct):
+            declaration = replace(declaration, body=_methods(declaration.name, declaration.body, reached))
+
+        declarations.append(declaration)
+
+    return Module(declarations=tuple(declarations))
+
+
+def _methods(name: str, struct: Struct, reached: Mapping[Key, Declaration]) -> Struct:
+    """Struct of declaration `name` with the reached methods"""
+    return replace(struct, items=tuple(reached.get(("", f"{name}.{item.name}"), item) if isinstance(item, Function) else item for item in struct.items))
+
+
+def _compileModule(
+        parser: Parser,
+        evaluator: Evaluator,
+        cache: Optional[ParseCache],
+        name: str,
+        source: str | bytes | TokenBuffer,
+        imports: Mapping[str, Interface],
+        key: str,
+        cycle: frozenset[str]
+) -> CompiledModule:
+    """Parse and compile a module in a worker, only the result is sent back"""
+    module, errors = _parseModule(parser, cache, source)
+    return Compiler(parser, evaluator).compile(name, module, imports, key, errors, cycle)
+
+
+def _fingerprint(value: object) -> str:
+    """Hash of compile-time value (nested values are walked with a stack, mapping keys in sorted order)"""
+    digest = blake2b(digest_size=16)
+    stack = [value]
+
+    while stack:
+        value = stack.pop()
+
+        if isinstance(value, Primitive):
+            digest.update(f"P{value.name}:{value.format};".encode())
+
+        elif isinstance(value, ArrayOf):
+            digest.update(f"A{value.length};".encode())
+            stack.append(value.element)
+
+        elif isinstance(value, PointerTo):
+            digest.update(b"*")
+            stack.append(value.target)
+
+        elif isinstance(value, Record):
+            digest.update(f"R{len(value.fields)};".encode())
+            stack.extend(reversed(value.fields))
+
+        elif isinstance(value, (tuple, frozenset)):
+            items = value if isinstance(value, tuple) else sorted(value)
+            digest.update(f"T{len(items)};".encode())
+            stack.extend(reversed(items))
+
+        elif isinstance(value, Mapping):
+            digest.update(f"M{len(value)};".encode())
+            stack.extend(reversed(sorted(value.items())))
+
+        elif isinstance(value, str):
+            digest.update(f"S{len(value)};{value}".encode())
+
+        elif isinstance(value, bytes):
+            digest.update(f"B{len(value)};".encode())
+            digest.update(value)
+
+        elif isinstance(value, float):
+            digest.update(f"F{value.hex()};".encode())
+
+        else:
+            digest.update(f"{type(value).__name__[0]}{value!r};".encode())
+
+    return digest.hexdigest()
+
+
+@final
+class Compiler:
+    """
+    Compiles the modules of a program incrementally
+
+    Modules are compiled after the modules they import. A result is kept with its key:
+    a hash of the module source and of the interfaces of its imports, so after an edit
+    only the edited module and the importers of a changed interface are compiled again.
+    Imports are found by a token pre-scan, so the graph is known before any module is parsed.
+    Function bodies are skimmed and only those reachable from what a module exports or evaluates
+    are parsed and checked (with the parse cache every body is parsed: an arena stores no skimmed body).
+    Source errors never stop a run: they are diagnostics of their module,
+    imports closing a cycle are left out of the graph and reported by the importing modules.
+    """
+
+    def __init__(self, parser: Optional[Parser] = None, evaluator: Optional[Evaluator] = None, *, cache: bool = False) -> None:
+        parser = parser or Parser(lazy_bodies=True)
+
+        if parser.lexer.error_budget is None:
+            parser = replace(parser, lexer=replace(parser.lexer, error_budget=_LEXER_ERRORS))
+
+        self.parser: Final = parser
+        self.evaluator: Final = evaluator or Evaluator()
+        self.cache: Final = ParseCache(parser=parser) if cache else None
+        """Parse cache of modules (None - disabled): a module parsed before by any process is read from its arena image"""
+        self._settings: Final = (
+            f"grammar {GRAMMAR_VERSION}, keywords {sorted(parser.lexer.keywords)}, "
+            f"error budget {parser.lexer.error_budget}, {self.evaluator!r}"
+        )
+        self._scanned = dict[str, tuple[str, tuple[str, ...]]]()
+        """Module name: source digest, imported names"""
+        self._tokens = dict[str, TokenBuffer]()
+        """Module name: tokens of the scan of this run, parsed instead of the source"""
+        self._parsed = dict[str, tuple[str, Module, tuple[Diagnostic, ...]]]()
+        """Module name: source digest, module, parse errors"""
+        self._results = dict[str, CompiledModule]()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._workers = 0
+
+    def close(self) -> None:
+        """Stop worker processes of parallel runs (a later parallel run starts them again)"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def graph(self, sources: Mapping[str, str | Binary]) -> dict[str, tuple[str, ...]]:
+        """Imports of each module (names of other modules of the program)"""
+        return {
+            name: tuple(imported for imported in self._scan(name, source)[1] if imported in sources)
+            for name, source in sources.items()
+        }
+
+    @staticmethod
+    def order(graph: Mapping[str, tuple[str, ...]]) -> list[str]:
+        """Modules in compile order: each after its imports, otherwise by name"""
+        order = list[str]()
+        state = dict[str, bool]()
+        """False - in progress, True - done"""
+
+        for root in sorted(graph):
+            stack = [(root, False)]
+
+            while stack:
+                name, ready = stack.pop()
+
+                if ready:
+                    state[name] = True
+                    order.append(name)
+                    continue
+
+                if name in state:
+                    if not state[name]:
+                        raise ValueError(f"import cycle through '{name}'")
+
+                    continue
+
+                state[name] = False
+                stack.append((name, True))
+                stack.extend((imported, False) for imported in reversed(graph[name]) if state.get(imported) is not True)
+
+        return order
+
+    @staticmethod
+    def cycles(graph: Mapping[str, tuple[str, ...]]) -> list[tuple[str, ...]]:
+        """Import cycles: groups of modules importing each other, a module importing itself is one too (names sorted)"""
+        index = dict[str, int]()
+        low = dict[str, int]()
+        path = list[str]()
+        """Visited modules whose group is not closed yet"""
+        cycles = list[tuple[str, ...]]()
+
+        for root in sorted(graph):
+            if root in index:
+                continue
+
+            stack = [(root, 0)]
+
+            while stack:
+                name, child = stack.pop()
+
+                if child == 0:
+                    index[name] = low[name] = len(index)
+                    path.append(name)
+
+                if child < len(graph[name]):
+                    stack.append((name, child + 1))
+                    imported = graph[name][child]
+
+                    if imported not in index:
+                        stack.append((imported, 0))
+                    elif imported in low:
+                        low[name] = min(low[name], index[imported])
+
+                    continue
+
+                if stack:
+                    parent = stack[-1][0]
+                    low[parent] = min(low[parent], low[name])
+
+                if low[name] == index[name]:
+                    group = path[path.index(name):]
+                    del path[path.index(name):]
+
+                    for member in group:
+                        del low[member]
+
+                    if len(group) > 1 or name in graph[name]:
+                        cycles.append(tuple(sorted(group)))
+
+        return cycles
+
+    def run(self, sources: Mapping[str, str | Binary], *, jobs: Optional[int] = 1) -> dict[str, CompiledModule]:
+        """
+        Results of all modules in compile order, unchanged ones are reused from the previous runs
+        :param jobs: processes compiling modules of a wave (None - all cores).
+        A wave is the modules whose imports are all compiled, workers get tokens (or sources) and imported interfaces
+        and send back results only, the results do not depend on `jobs`. Workers are kept for later runs until `close`,
+        modules parsed in this process before (only their imports changed) are compiled in it.
+        """
+        graph = self.graph(sources)
+        cycles = {name: frozenset(cycle) for cycle in self.cycles(graph) for name in cycle}
+        graph = {name: tuple(imported for imported in imports if imported not in cycles.get(name, ())) for name, imports in graph.items()}
+        order = self.order(graph)
+        depth = dict[str, int]()
+
+        for name in order:
+            depth[name] = max((depth[imported] + 1 for imported in graph[name]), default=0)
+
+        results = dict[str, CompiledModule]()
+
+        for _, wave in groupby(sorted(order, key=depth.__getitem__), depth.__getitem__):
+            stale = dict[str, tuple[dict[str, Interface], str, frozenset[str]]]()
+
+            for name in wave:
+                imports = {imported: results[imported].interface for imported in graph[name]}
+                key = self.key(self._scanned[name][0], imports)
+                cached = self._results.get(name)
+
+                if cached is not None and cached.key == key:
+                    results[name] = cached
+                else:
+                    stale[name] = imports, key, cycles.get(name, frozenset())
+
+            unparsed = [name for name in stale if self._parsed.get(name, ("",))[0] != self._scanned[name][0]]
+            futures = dict[str, Future]()
+
+            if jobs != 1 and len(unparsed) >= 2:
+                executor = self._pool(jobs or cpu_count() or 1)
+                futures = {
+                    name: executor.submit(_compileModule, self.parser, self.evaluator, self.cache, name, self._portable(name, sources[name]), *stale[name])
+                    for name in unparsed
+                }
+
+            for name, (imports, key, cycle) in stale.items():
+                if name in futures:
+                    results[name] = futures[name].result()
+                else:
+                    _, module, errors = self._parse(name, sources[name])
+                    results[name] = self.compile(name, module, imports, key, errors, cycle)
+
+        self._tokens.clear()
+        self._results = {name: results[name] for name in order}
+        self._scanned = {name: self._scanned[name] for name in order}
+        self._parsed = {name: parsed for name, parsed in self._parsed.items() if name in results}
+        return dict(self._results)
+
+    @staticmethod
+    def link(results: Mapping[str, CompiledModule]) -> Program:
+        """Program of module results: data in the order of `results`, symbols qualified by module"""
+        data = bytearray()
+        symbols = dict[str, int]()
+
+        for name, result in results.items():
+            symbols.update((f"{name}.{symbol}", len(data) + offset) for symbol, offset in result.symbols.items())
+            data += result.data
+
+        return Program(data=bytes(data), symbols=symbols)
+
+    def key(self, digest: str, imports: Mapping[str, Interface]) -> str:
+        """Key of a result: source digest, compiler settings and digests of imported interfaces"""
+        key = blake2b(f"{self._settings}\n{digest}\n".encode(), digest_size=16)
+
+        for name in sorted(imports):
+            key.update(f"{name} {imports[name].digest}\n".encode())
+
+        return key.hexdigest()
+
+    def compile(
+            self,
+            name: str,
+            module: Module,
+            imports: Mapping[str, Interface],
+            key: str,
+            errors: tuple[Diagnostic, ...] = (),
+            cycle: frozenset[str] = frozenset()
+    ) -> CompiledModule:
+        """
+        Evaluate constants and variables of a parsed module against interfaces of its imports
+        :param cycle: modules of its import cycle (see `cycles`), imports of them are reported and left out
+        """
+        diagnostics = Diagnostics()
+        diagnostics.extend(errors)
+        scope = {imported: interface.constants for imported, interface in imports.items()}
+
+        for declaration in module.declarations:
+            if isinstance(declaration, Import) and declaration.name in cycle:
+                diagnostics.report(declaration.line, 0, "import cycle through '{}'", declaration.name)
+
+            elif isinstance(declaration, Import) and declaration.name not in imports:
+                diagnostics.report(declaration.line, 0, "unknown module '{}'", declaration.name)
+
+        constants = self.evaluator.constants(module, diagnostics, scope)
+        scope = {**self.evaluator.builtins(), **scope, **constants}
+        data = bytearray()
+        symbols = dict[str, int]()
+        variables = dict[str, Type]()
+
+        for declaration in module.declarations:
+            if not isinstance(declaration, Variable):
+                continue
+
+            try:
+                value_type = self.evaluator.evaluateType(declaration.type, scope)
+
+                if declaration.value is None:
+                    image = bytes(self.evaluator.sizeOf(value_type))
+                else:
+                    image = self.evaluator.pack(value_type, self.evaluator.evaluate(declaration.value, scope))
+
+            except EvaluationError as error:
+                diagnostics.report(declaration.line, 0, "{}: {}", declaration.name, error.message)
+                continue
+
+            symbols[declaration.name] = len(data)
+            data += image
+
+            if declaration.public:
+                variables[declaration.name] = value_type
+
+        public = frozenset(declaration.name for declaration in module.declarations if not isinstance(declaration, Import) and declaration.public)
+        exported = {constant: value for constant, value in constants.items() if constant in public}
+        functions = frozenset(declaration.name for declaration in module.declarations if isinstance(declaration, Function) and declaration.public)
+
+        return CompiledModule(
+            name=name,
+            imports=tuple(imports),
+            constants=constants,
+            data=bytes(data),
+            symbols=symbols,
+            interface=Interface(
+                constants=exported,
+                variables=variables,
+                functions=functions,
+                digest=_fingerprint((exported, variables, functions))
+            ),
+            diagnostics=tuple(diagnostics),
+            key=key
+        )
+
+    def _pool(self, workers: int) -> ProcessPoolExecutor:
+        """Worker processes, started again only if their count changes"""
+        if self._executor is None or self._workers != workers:
+            self.close()
+            self._executor = ProcessPoolExecutor(workers)
+            self._workers = workers
+
+        return self._executor
+
+    def _scan(self, name: str, source: str | Binary) -> tuple[str, tuple[str, ...]]:
+        """
+        Source digest and imports of module (`import name` starting a top-level declaration), reused while the source is the same
+        The tokens are kept for the parse of the module in this run. A source the lexer rejects has no imports, its parse reports the error.
+        """
+        digest = blake2b(source.encode() if isinstance(source, str) else source, digest_size=16).hexdigest()
+        scanned = self._scanned.get(name)
+
+        if scanned is None or scanned[0] != digest:
+            try:
+                tokens = self.parser.lexer.scan(source)
+
+            except LexerError:
+                scanned = self._scanned[name] = digest, ()
+                return scanned
+
+            keyword = tokens.symbols.get("import")
+            identifier = Token.Type.identifier.value
+            imports = dict[str, None]()
+
+            for index in self.parser.boundaries(tokens):
+                if tokens.integers[index] == keyword and index + 1 < len(tokens) and tokens.kinds[index + 1] == identifier:
+                    imports[tokens.lexeme(index + 1)] = None
+
+            scanned = self._scanned[name] = digest, tuple(imports)
+            self._tokens[name] = tokens
+
+        return scanned
+
+    def _parse(self, name: str, source: str | Binary) -> tuple[str, Module, tuple[Diagnostic, ...]]:
+        """Parsed module, reused while its source is the same"""
+        digest = self._scanned[name][0]
+        parsed = self._parsed.get(name)
+
+        if parsed is None or parsed[0] != digest:
+            parsed = self._parsed[name] = digest, *_parseModule(self.parser, self.cache, self._tokens.pop(name, source))
+
+        return parsed
+
+    def _portable(self, name: str, source: str | Binary) -> str | bytes | TokenBuffer:
+        """What a worker parses the module from: its scanned tokens if they can be sent, otherwise the source as str or bytes"""
+        tokens = self._tokens.pop(name, None)
+
+        if tokens is not None and isinstance(tokens.source, (str, bytes)):
+            return tokens
+
+        return source if isinstance(source, (str, bytes)) else bytes(source)
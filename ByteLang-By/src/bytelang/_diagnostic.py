@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+from heapq import merge
+from operator import itemgetter
+from typing import Final
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import final
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Diagnostic:
+    """Error of a source span"""
+
+    start: Optional[int] = None
+    """Source offset of the span (None - only the position is known)"""
+    end: Optional[int] = None
+    line: int
+    col: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.line}:{self.col}: {self.message}"
+
+
+_Record = tuple[Optional[int], Optional[int], int, int, str, tuple]
+"""start, end, line, col, message template, template arguments"""
+
+_POSITION: Final = itemgetter(2, 3)
+"""Line and column of a record"""
+
+
+@final
+class Diagnostics:
+    """
+    Error sink of a compilation unit
+
+    Producers report a message template with its arguments, one tuple per error:
+    messages are formatted and Diagnostic objects made only when they are read.
+    The success path of a producer returns plain values, errors do not travel with them.
+    """
+
+    def __init__(self, limit: Optional[int] = None) -> None:
+        self.limit: Final = limit
+        """Errors kept at most (None - all), producers stop once it is reached"""
+        self.truncated = False
+        """Some errors were dropped by the limit"""
+        self._records: Final = list[_Record]()
+
+    @property
+    def full(self) -> bool:
+        """Limit is reached"""
+        return self.limit is not None and len(self._records) >= self.limit
+
+    def report(self, line: int, col: int, template: str, *args: object, start: Optional[int] = None, end: Optional[int] = None) -> None:
+        """Record error, message is `template.format(*args)`"""
+        if self.full:
+            self.truncated = True
+            return
+
+        self._records.append((start, end, line, col, template, args))
+
+    def extend(self, diagnostics: "Iterable[Diagnostic] | Diagnostics") -> None:
+        """Record errors of other producer (lexer errors, sink of a worker) in their order"""
+        if isinstance(diagnostics, Diagnostics):
+            records = diagnostics._records
+            self.truncated |= diagnostics.truncated
+
+        else:
+            records = ((d.start, d.end, d.line, d.col, "{}", (d.message,)) for d in diagnostics)
+
+        for record in records:
+            if self.full:
+                self.truncated = True
+                return
+
+            self._records.append(record)
+
+    def merge(self, diagnostics: Iterable[Diagnostic]) -> None:
+        """
+        Record errors of other producer by position among the recorded ones (lexer errors of a parse)
+
+        Both are expected in source order, the limit keeps the first errors of the merged sequence.
+        """
+        records = ((d.start, d.end, d.line, d.col, "{}", (d.message,)) for d in diagnostics)
+        merged = list(merge(self._records, records, key=_POSITION))
+
+        if self.limit is not None and len(merged) > self.limit:
+            del merged[self.limit:]
+            self.truncated = True
+
+        self._records[:] = merged
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, index: int) -> Diagnostic:
+        start, end, line, col, template, args = self._records[index]
+        return Diagnostic(start=start, end=end, line=line, col=col, message=template.format(*args))
+
+    def __iter__(self) -> Iterator[Diagnostic]:
+        return map(self.__getitem__, range(len(self._records)))
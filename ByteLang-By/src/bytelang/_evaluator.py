@@ -0,0 +1,470 @@
+from dataclasses import dataclass
+from math import isfinite
+from struct import calcsize
+from struct import error as StructError
+from struct import pack
+from typing import Final
+from typing import Mapping
+from typing import Optional
+from typing import Union
+from typing import final
+
+from bytelang._ast import ArrayType
+from bytelang._ast import BinaryOp
+from bytelang._ast import Cast
+from bytelang._ast import Constant
+from bytelang._ast import Expression
+from bytelang._ast import Field
+from bytelang._ast import Identifier
+from bytelang._ast import Initializer
+from bytelang._ast import Literal
+from bytelang._ast import Member
+from bytelang._ast import Module
+from bytelang._ast import Node
+from bytelang._ast import Struct
+from bytelang._ast import UnaryOp
+from bytelang._diagnostic import Diagnostics
+from bytelang._operator import Operator
+from bytelang._reachability import references
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Primitive:
+    """Scalar type of the executor"""
+
+    name: str
+    format: str
+    """`struct` format character"""
+
+    @property
+    def size(self) -> int:
+        return calcsize(self.format)
+
+    @property
+    def integer(self) -> bool:
+        return self.format not in "fd"
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class ArrayOf:
+    """ [length]element, length None - slice """
+
+    length: Optional[int]
+    element: "Type"
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class PointerTo:
+    """ *target """
+
+    target: "Type"
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Record:
+    """Type made by `struct {...}`: its fields in layout order"""
+
+    fields: tuple[tuple[str, "Type"], ...]
+
+
+Type = Union[Primitive, ArrayOf, PointerTo, Record]
+
+Value = Union[int, float, bytes, tuple, Type, Mapping[str, "Value"]]
+"""Compile-time value: number, string, initializer (tuple of (name or None, value) items), type or imported module"""
+
+_PRIMITIVES: Final = {
+    primitive.name: primitive
+    for primitive in (
+        Primitive(name="u8", format="B"),
+        Primitive(name="i8", format="b"),
+        Primitive(name="u16", format="H"),
+        Primitive(name="i16", format="h"),
+        Primitive(name="u32", format="I"),
+        Primitive(name="i32", format="i"),
+        Primitive(name="u64", format="Q"),
+        Primitive(name="i64", format="q"),
+        Primitive(name="f32", format="f"),
+        Primitive(name="f64", format="d"),
+    )
+}
+
+
+class EvaluationError(Exception):
+    """Expression has no compile-time value or the value does not fit its type"""
+
+    def __init__(self, message: str, *, line: int = 0) -> None:
+        super().__init__(f"{line}: {message}" if line else message)
+        self.message = message
+        self.line = line
+
+
+def _operands(node: Node) -> Optional[tuple[Node, ...]]:
+    """Subexpressions evaluated before node, None for a leaf"""
+    if isinstance(node, (Identifier, Literal)):
+        return None
+
+    if isinstance(node, UnaryOp):
+        return node.operand,
+
+    if isinstance(node, Member):
+        return node.target,
+
+    if isinstance(node, BinaryOp):
+        return node.left, node.right
+
+    if isinstance(node, Cast):
+        return node.value, node.type
+
+    if isinstance(node, ArrayType):
+        return (node.element,) if node.length is None else (node.length, node.element)
+
+    if isinstance(node, Initializer):
+        return tuple(item.value for item in node.items)
+
+    if isinstance(node, Struct):
+        return tuple(item.type for item in node.items if isinstance(item, Field))
+
+    raise EvaluationError(f"{type(node).__name__} is not a constant expression")
+
+
+def _number(value: Value) -> int | float:
+    if isinstance(value, (int, float)):
+        return value
+
+    raise EvaluationError(f"expected number, got {value!r}")
+
+
+def _type(value: Value) -> Type:
+    if isinstance(value, (Primitive, ArrayOf, PointerTo, Record)):
+        return value
+
+    raise EvaluationError(f"expected type, got {value!r}")
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Evaluator:
+    """
+    Compile-time values of constant expressions and their binary images
+
+    Expressions are evaluated in postorder and values are packed in layout order from explicit work stacks,
+    so nesting of initializers and types (`{{{...}}}`, `[N][M][K]T`) costs no Python stack.
+    """
+
+    pointer: Primitive = _PRIMITIVES["u16"]
+    """Primitive of pointers and `usize` (executor's pointer_type)"""
+    byte_order: str = "<"
+    """`struct` byte order of packed values"""
+
+    def builtins(self) -> dict[str, Value]:
+        """Names known in every module: primitives and usize"""
+        return {**_PRIMITIVES, "usize": self.pointer}
+
+    def constants(
+            self,
+            module: Module,
+            diagnostics: Optional[Diagnostics] = None,
+            scope: Optional[Mapping[str, Value]] = None
+    ) -> dict[str, Value]:
+        """
+        Values of module constants, each evaluated after the constants it uses
+        :param diagnostics: None - raise EvaluationError on the first error,
+        otherwise errors are reported and failed constants (and constants using them) are left out,
+        constants of a cycle fail together
+        :param scope: names visible besides builtins (imported modules)
+        """
+        declarations = {declaration.name: declaration for declaration in module.declarations if isinstance(declaration, Constant)}
+        scope = {**self.builtins(), **(scope or {})}
+        values = dict[str, Value]()
+        order, cyclic = self._order(declarations)
+
+        for name in cyclic:
+            if diagnostics is None:
+                raise EvaluationError(f"{name}: circular constant", line=declarations[name].line)
+
+            diagnostics.report(declarations[name].line, 0, "{}: circular constant", name)
+
+        failed = set(cyclic)
+
+        for name in order:
+            declaration = declarations[name]
+
+            if name in failed or any(used in failed for used, _ in references(declaration)):
+                failed.add(name)
+                continue
+
+            try:
+                value = self.evaluate(declaration.value, scope)
+
+                if declaration.type is not None:
+                    self.pack(self.evaluateType(declaration.type, scope), value)
+
+            except EvaluationError as error:
+                if diagnostics is None:
+                    raise EvaluationError(f"{name}: {error.message}", line=declaration.line) from None
+
+                diagnostics.report(declaration.line, 0, "{}: {}", name, error.message)
+                failed.add(name)
+                continue
+
+            scope[name] = values[name] = value
+
+        return values
+
+    @staticmethod
+    def _order(declarations: Mapping[str, Constant]) -> tuple[list[str], dict[str, None]]:
+        """Constant names, each after the constants it uses (depth-first, without recursion), and names on cycles"""
+        order = list[str]()
+        state = dict[str, bool]()
+        """False - in progress, True - done"""
+        path = list[str]()
+        """Constants in progress: the current chain of uses"""
+        cyclic = dict[str, None]()
+
+        for root in declarations:
+            stack = [(root, False)]
+
+            while stack:
+                name, ready = stack.pop()
+
+                if ready:
+                    state[name] = True
+                    path.pop()
+                    order.append(name)
+                    continue
+
+                if name in state:
+                    if not state[name]:
+                        cyclic.update(dict.fromkeys(path[path.index(name):]))
+
+                    continue
+
+                state[name] = False
+                path.append(name)
+                stack.append((name, True))
+                stack.extend((used, False) for used, _ in references(declarations[name]) if used in declarations and state.get(used) is not True)
+
+        return order, cyclic
+
+    def evaluateType(self, expression: Expression, scope: Mapping[str, Value]) -> Type:
+        """Type of type expression, EvaluationError if its value is not a type"""
+        return _type(self.evaluate(expression, scope))
+
+    def evaluate(self, expression: Expression, scope: Mapping[str, Value]) -> Value:
+        """Value of constant expression, names are looked up in scope"""
+        values = list[Value]()
+        stack: list[tuple[Node, bool]] = [(expression, False)]
+
+        while stack:
+            node, ready = stack.pop()
+
+            if ready:
+                self._apply(node, values)
+                continue
+
+            operands = _operands(node)
+
+            if operands is None:
+                values.append(self._leaf(node, scope))
+                continue
+
+            stack.append((node, True))
+            stack.extend((operand, False) for operand in reversed(operands))
+
+        return values[0]
+
+    def _leaf(self, node: Identifier | Literal, scope: Mapping[str, Value]) -> Value:
+        if isinstance(node, Identifier):
+            if node.name not in scope:
+                raise EvaluationError(f"unknown name '{node.name}'")
+
+            return scope[node.name]
+
+        return node.value
+
+    def _apply(self, node: Node, values: list[Value]) -> None:
+        """Replace operands of node on top of values with its value"""
+        if isinstance(node, UnaryOp):
+            operand = values.pop()
+
+            if node.operator is Operator.star:
+                values.append(PointerTo(target=_type(operand)))
+
+            else:
+                values.append(-_number(operand))
+
+        elif isinstance(node, Member):
+            target = values.pop()
+
+            if not isinstance(target, Mapping) or node.name not in target:
+                raise EvaluationError(f"no constant '{node.name}' in {target!r}")
+
+            values.append(target[node.name])
+
+        elif isinstance(node, BinaryOp):
+            right = _number(values.pop())
+            left = _number(values.pop())
+            values.append(self._binary(node.operator, left, right))
+
+        elif isinstance(node, Cast):
+            value_type = _type(values.pop())
+            values.append(self._cast(_number(values.pop()), value_type))
+
+        elif isinstance(node, ArrayType):
+            element = _type(values.pop())
+            length = None if node.length is None else values.pop()
+
+            if length is not None and (not isinstance(length, int) or length < 0):
+                raise EvaluationError(f"array length must be a non-negative integer, got {length!r}")
+
+            values.append(ArrayOf(length=length, element=element))
+
+        elif isinstance(node, Initializer):
+            count = len(node.items)
+            items = values[len(values) - count:]
+            del values[len(values) - count:]
+            values.append(tuple((item.name, value) for item, value in zip(node.items, items)))
+
+        else:
+            fields = [item.name for item in node.items if isinstance(item, Field)]
+            count = len(fields)
+            types = values[len(values) - count:]
+            del values[len(values) - count:]
+            values.append(Record(fields=tuple(zip(fields, map(_type, types)))))
+
+    @staticmethod
+    def _binary(operator: Operator, left: int | float, right: int | float) -> int | float:
+        if operator is Operator.plus:
+            return left + right
+
+        if operator is Operator.minus:
+            return left - right
+
+        if operator is Operator.star:
+            return left * right
+
+        if right == 0:
+            raise EvaluationError("division by zero")
+
+        if isinstance(left, int) and isinstance(right, int):
+            quotient = abs(left) // abs(right)
+            return quotient if (left < 0) == (right < 0) else -quotient
+
+        return left / right
+
+    @staticmethod
+    def _cast(value: int | float, value_type: Type) -> int | float:
+        """Number converted to primitive: integers wrap to its width, reals are truncated (infinity and NaN fit no integer)"""
+        if not isinstance(value_type, Primitive):
+            raise EvaluationError(f"can not cast a number to {value_type!r}")
+
+        if not value_type.integer:
+            return float(value)
+
+        if isinstance(value, float) and not isfinite(value):
+            raise EvaluationError(f"{value} does not fit {value_type.name}")
+
+        bits = value_type.size * 8
+        value = int(value) & ((1 << bits) - 1)
+
+        if value_type.format.islower() and value >> (bits - 1):
+            value -= 1 << bits
+
+        return value
+
+    def sizeOf(self, value_type: Type) -> int:
+        """Size of packed value of type in bytes"""
+        size = 0
+        stack = [(value_type, 1)]
+
+        while stack:
+            value_type, count = stack.pop()
+
+            if isinstance(value_type, Primitive):
+                size += value_type.size * count
+
+            elif isinstance(value_type, PointerTo):
+                size += self.pointer.size * count
+
+            elif isinstance(value_type, ArrayOf):
+                if value_type.length is None:
+                    raise EvaluationError("slice has no constant size")
+
+                stack.append((value_type.element, count * value_type.length))
+
+            else:
+                stack.extend((field_type, count) for _, field_type in value_type.fields)
+
+        return size
+
+    def pack(self, value_type: Type, value: Value) -> bytes:
+        """Binary image of value of type: fields and items in order, without padding"""
+        image = bytearray()
+        stack = [(value_type, value)]
+
+        while stack:
+            value_type, value = stack.pop()
+
+            if isinstance(value_type, (Primitive, PointerTo)):
+                image += self._packScalar(self.pointer if isinstance(value_type, PointerTo) else value_type, value)
+
+            elif isinstance(value_type, ArrayOf):
+                length = value_type.length
+
+                if length is None:
+                    raise EvaluationError("slice has no constant size")
+
+                if isinstance(value, bytes):
+                    if value_type.element not in (_PRIMITIVES["u8"], _PRIMITIVES["i8"]) or len(value) > length:
+                        raise EvaluationError(f"string of {len(value)} bytes does not fit {length} items")
+
+                    image += value
+                    image += bytes(length - len(value))
+                    continue
+
+                if not isinstance(value, tuple) or len(value) != length or any(name is not None for name, _ in value):
+                    raise EvaluationError(f"expected {length} unnamed items, got {value!r}")
+
+                stack.extend((value_type.element, item) for _, item in reversed(value))
+
+            else:
+                stack.extend(reversed(self._fieldValues(value_type, value)))
+
+        return bytes(image)
+
+    def _packScalar(self, value_type: Primitive, value: Value) -> bytes:
+        if not isinstance(value, int) and not (isinstance(value, float) and not value_type.integer):
+            raise EvaluationError(f"expected {value_type.name}, got {value!r}")
+
+        try:
+            return pack(self.byte_order + value_type.format, value)
+
+        except StructError:
+            raise EvaluationError(f"{value} does not fit {value_type.name}") from None
+
+    @staticmethod
+    def _fieldValues(value_type: Record, value: Value) -> list[tuple[Type, Value]]:
+        """Values of record fields in layout order from positional or named items"""
+        if not isinstance(value, tuple):
+            raise EvaluationError(f"expected initializer, got {value!r}")
+
+        fields = value_type.fields
+        index = {name: i for i, (name, _) in enumerate(fields)}
+        values: list[Optional[tuple[Value]]] = [None] * len(fields)
+
+        for position, (name, item) in enumerate(value):
+            slot = position if name is None else index.get(name, -1)
+
+            if not 0 <= slot < len(fields) or values[slot] is not None:
+                raise EvaluationError(f"unexpected item {name or position}")
+
+            values[slot] = (item,)
+
+        if None in values:
+            raise EvaluationError(f"missing field '{fields[values.index(None)][0]}'")
+
+        return [(field_type, item[0]) for (_, field_type), item in zip(fields, values)]
@@ -1,2 +1,830 @@
+import marshal
+import re
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from dataclasses import replace
+from enum import IntEnum
+from enum import auto
+from functools import partial
+from hashlib import blake2b
+from mmap import mmap
+from string import ascii_letters
+from typing import Callable
+from typing import Final
+from typing import Iterable
+from typing import Iterator
+from typing import Mapping
+from typing import Optional
+from typing import Sequence
+from typing import TextIO
+from typing import final
+
+from bytelang._buffer import TokenBuffer
+from bytelang._diagnostic import Diagnostic
+from bytelang._symbol import SymbolTable
+from bytelang._token import Token
+
+
+class _CharClass(IntEnum):
+    """Character class - column of the transition table"""
+
+    other = 0
+    space = auto()
+    newline = auto()
+    zero = auto()
+    one = auto()
+    digit = auto()
+    x = auto()
+    b = auto()
+    e = auto()
+    hex = auto()
+    letter = auto()
+    quote_double = auto()
+    quote_single = auto()
+    backslash = auto()
+    dot = auto()
+    plus = auto()
+    minus = auto()
+    star = auto()
+    slash = auto()
+    comma = auto()
+    colon = auto()
+    semicolon = auto()
+    equals = auto()
+    round_open = auto()
+    round_close = auto()
+    square_open = auto()
+    square_close = auto()
+    figure_open = auto()
+    figure_close = auto()
+    utf8_tail = auto()
+    utf8_lead2 = auto()
+    utf8_lead3 = auto()
+    utf8_lead4 = auto()
+
+
+class _State(IntEnum):
+    """Scanner state - row of the transition table"""
+
+    error = 0
+    start = auto()
+    comment = auto()
+    identifier = auto()
+    zero = auto()
+    integer = auto()
+    hex_prefix = auto()
+    hex = auto()
+    bin_prefix = auto()
+    bin = auto()
+    real_dot = auto()
+    real = auto()
+    exp_mark = auto()
+    exp_sign = auto()
+    exp = auto()
+    string = auto()
+    string_escape = auto()
+    string_end = auto()
+    char_open = auto()
+    char_escape = auto()
+    char_tail3 = auto()
+    char_tail2 = auto()
+    char_tail1 = auto()
+    char_body = auto()
+    char_end = auto()
+    dot = auto()
+    dot_dot = auto()
+    ellipsis = auto()
+    slash = auto()
+    plus = auto()
+    minus = auto()
+    star = auto()
+    comma = auto()
+    colon = auto()
+    semicolon = auto()
+    equals = auto()
+    round_open = auto()
+    round_close = auto()
+    square_open = auto()
+    square_close = auto()
+    figure_open = auto()
+    figure_close = auto()
+
+
+_C = _CharClass
+_S = _State
+
+_DIGITS: Final = (_C.zero, _C.one, _C.digit)
+_HEX_DIGITS: Final = _DIGITS + (_C.b, _C.e, _C.hex)
+_LETTERS: Final = (_C.x, _C.b, _C.e, _C.hex, _C.letter)
+_WORD: Final = _LETTERS + _DIGITS
+_UTF8: Final = (_C.utf8_tail, _C.utf8_lead2, _C.utf8_lead3, _C.utf8_lead4)
+
+
+def _anyExcept(*excluded: _CharClass) -> Sequence[_CharClass]:
+    return tuple(c for c in _CharClass if c not in excluded)
+
+
+_CLASS_SPEC: Final[Sequence[tuple[str, _CharClass]]] = (
+    (" \t\r\f\v", _C.space),
+    ("\n", _C.newline),
+    ("0", _C.zero),
+    ("1", _C.one),
+    ("23456789", _C.digit),
+    ("xX", _C.x),
+    ("bB", _C.b),
+    ("eE", _C.e),
+    ("acdfACDF", _C.hex),
+    ("".join(sorted(set(ascii_letters + "_") - set("xXbBeEacdfACDF"))), _C.letter),
+    ('"', _C.quote_double),
+    ("'", _C.quote_single),
+    ("\\", _C.backslash),
+    (".", _C.dot),
+    ("+", _C.plus),
+    ("-", _C.minus),
+    ("*", _C.star),
+    ("/", _C.slash),
+    (",", _C.comma),
+    (":", _C.colon),
+    (";", _C.semicolon),
+    ("=", _C.equals),
+    ("(", _C.round_open),
+    (")", _C.round_close),
+    ("[", _C.square_open),
+    ("]", _C.square_close),
+    ("{", _C.figure_open),
+    ("}", _C.figure_close),
+)
+"""(ASCII characters, class). Other ASCII is `other`"""
+
+_TRANSITIONS: Final[Sequence[tuple[_State, Iterable[_CharClass], _State]]] = (
+    (_S.start, (_C.space, _C.newline), _S.start),
+
+    (_S.start, (_C.slash,), _S.slash),
+    (_S.slash, (_C.slash,), _S.comment),
+    (_S.comment, _anyExcept(_C.newline), _S.comment),
+
+    (_S.start, _LETTERS, _S.identifier),
+    (_S.identifier, _WORD, _S.identifier),
+
+    (_S.start, (_C.zero,), _S.zero),
+    (_S.start, (_C.one, _C.digit), _S.integer),
+    (_S.zero, _DIGITS, _S.integer),
+    (_S.zero, (_C.x,), _S.hex_prefix),
+    (_S.zero, (_C.b,), _S.bin_prefix),
+    (_S.zero, (_C.dot,), _S.real_dot),
+    (_S.zero, (_C.e,), _S.exp_mark),
+    (_S.integer, _DIGITS, _S.integer),
+    (_S.integer, (_C.dot,), _S.real_dot),
+    (_S.integer, (_C.e,), _S.exp_mark),
+    (_S.hex_prefix, _HEX_DIGITS, _S.hex),
+    (_S.hex, _HEX_DIGITS, _S.hex),
+    (_S.bin_prefix, (_C.zero, _C.one), _S.bin),
+    (_S.bin, (_C.zero, _C.one), _S.bin),
+    (_S.real_dot, _DIGITS, _S.real),
+    (_S.real, _DIGITS, _S.real),
+    (_S.real, (_C.e,), _S.exp_mark),
+    (_S.exp_mark, (_C.plus, _C.minus), _S.exp_sign),
+    (_S.exp_mark, _DIGITS, _S.exp),
+    (_S.exp_sign, _DIGITS, _S.exp),
+    (_S.exp, _DIGITS, _S.exp),
+
+    (_S.start, (_C.quote_double,), _S.string),
+    (_S.string, _anyExcept(_C.quote_double, _C.backslash, _C.newline), _S.string),
+    (_S.string, (_C.backslash,), _S.string_escape),
+    (_S.string_escape, _anyExcept(_C.newline), _S.string),
+    (_S.string, (_C.quote_double,), _S.string_end),
+
+    (_S.start, (_C.quote_single,), _S.char_open),
+    (_S.char_open, _anyExcept(_C.quote_single, _C.backslash, _C.newline, *_UTF8), _S.char_body),
+    (_S.char_open, (_C.utf8_lead2,), _S.char_tail1),
+    (_S.char_open, (_C.utf8_lead3,), _S.char_tail2),
+    (_S.char_open, (_C.utf8_lead4,), _S.char_tail3),
+    (_S.char_tail3, (_C.utf8_tail,), _S.char_tail2),
+    (_S.char_tail2, (_C.utf8_tail,), _S.char_tail1),
+    (_S.char_tail1, (_C.utf8_tail,), _S.char_body),
+    (_S.char_open, (_C.backslash,), _S.char_escape),
+    (_S.char_escape, _anyExcept(_C.newline), _S.char_body),
+    (_S.char_body, (_C.quote_single,), _S.char_end),
+
+    (_S.start, (_C.dot,), _S.dot),
+    (_S.dot, (_C.dot,), _S.dot_dot),
+    (_S.dot_dot, (_C.dot,), _S.ellipsis),
+
+    (_S.start, (_C.plus,), _S.plus),
+    (_S.start, (_C.minus,), _S.minus),
+    (_S.start, (_C.star,), _S.star),
+    (_S.start, (_C.comma,), _S.comma),
+    (_S.start, (_C.colon,), _S.colon),
+    (_S.start, (_C.semicolon,), _S.semicolon),
+    (_S.start, (_C.equals,), _S.equals),
+    (_S.start, (_C.round_open,), _S.round_open),
+    (_S.start, (_C.round_close,), _S.round_close),
+    (_S.start, (_C.square_open,), _S.square_open),
+    (_S.start, (_C.square_close,), _S.square_close),
+    (_S.start, (_C.figure_open,), _S.figure_open),
+    (_S.start, (_C.figure_close,), _S.figure_close),
+)
+"""(state, classes, next state)"""
+
+_ACCEPTS: Final[Mapping[_State, Optional[Token.Type]]] = {
+    _S.comment: None,
+    _S.identifier: Token.Type.identifier,
+    _S.zero: Token.Type.literal_number_integer,
+    _S.integer: Token.Type.literal_number_integer,
+    _S.hex: Token.Type.literal_number_integer_hex,
+    _S.bin: Token.Type.literal_number_integer_bin,
+    _S.real: Token.Type.literal_number_real,
+    _S.exp: Token.Type.literal_number_real_exp,
+    _S.string_end: Token.Type.literal_string,
+    _S.char_end: Token.Type.literal_number_integer_character,
+    _S.dot: Token.Type.operator_dot,
+    _S.ellipsis: Token.Type.delimiter_ellipsis,
+    _S.slash: Token.Type.operator_slash,
+    _S.plus: Token.Type.operator_plus,
+    _S.minus: Token.Type.operator_minus,
+    _S.star: Token.Type.operator_star,
+    _S.comma: Token.Type.delimiter_comma,
+    _S.colon: Token.Type.delimiter_colon,
+    _S.semicolon: Token.Type.delimiter_semicolon,
+    _S.equals: Token.Type.delimiter_assign,
+    _S.round_open: Token.Type.bracket_open_round,
+    _S.round_close: Token.Type.bracket_close_round,
+    _S.square_open: Token.Type.bracket_open_square,
+    _S.square_close: Token.Type.bracket_close_square,
+    _S.figure_open: Token.Type.bracket_open_figure,
+    _S.figure_close: Token.Type.bracket_close_figure,
+}
+"""Accepting states. None - skipped (comment). Blanks are a loop of the start state"""
+
+_REJECT: Final = 0
+_SKIP: Final = len(Token.Type) + 1
+
+
+_Tables = tuple[bytes, tuple[int, ...], tuple[int, ...], tuple[Optional[bytes], ...]]
+
+
+def _buildClassTable() -> bytes:
+    ascii_classes = [_C.other] * 0x80
+
+    for characters, c in _CLASS_SPEC:
+        for character in characters:
+            ascii_classes[ord(character)] = c
+
+    return bytes((
+        *ascii_classes,
+        *(_C.utf8_tail for _ in range(0x80, 0xC0)),
+        _C.other, _C.other,
+        *(_C.utf8_lead2 for _ in range(0xC2, 0xE0)),
+        *(_C.utf8_lead3 for _ in range(0xE0, 0xF0)),
+        *(_C.utf8_lead4 for _ in range(0xF0, 0xF5)),
+        *(_C.other for _ in range(0xF5, 0x100)),
+    ))
+
+
+def _buildTables() -> _Tables:
+    """
+    Class table and flat transition table indexed by `row + class`
+
+    States are stored pre-multiplied by the row width, so each step is a single lookup.
+    States looping on themselves get the set of their loop classes, consumed at once by a run matcher.
+    """
+    width = len(_CharClass)
+    table = [0] * (len(_State) * width)
+    accepts = [_REJECT] * len(table)
+    loops: list[Optional[bytes]] = [None] * len(table)
+
+    for state, classes, target in _TRANSITIONS:
+        for c in classes:
+            table[state * width + c] = target * width
+
+    for state, token_type in _ACCEPTS.items():
+        accepts[state * width] = _SKIP if token_type is None else token_type.value
+
+    for state in _State:
+        row = state * width
+
+        if state != _S.error and (loop := bytes(c for c in _CharClass if table[row + c] == row)):
+            loops[row] = loop
+
+    return _buildClassTable(), tuple(table), tuple(accepts), tuple(loops)
+
+
+def specKey() -> str:
+    """Hash of the token spec: character classes, transitions and accepting states"""
+    spec = (
+        len(_CharClass),
+        len(_State),
+        tuple((characters, int(c)) for characters, c in _CLASS_SPEC),
+        tuple((int(state), tuple(map(int, classes)), int(target)) for state, classes, target in _TRANSITIONS),
+        tuple((int(state), None if t is None else t.value) for state, t in _ACCEPTS.items()),
+    )
+    return blake2b(marshal.dumps(spec), digest_size=16).hexdigest()
+
+
+_CLASS_TABLE, _TABLE, _ACCEPT, _LOOPS = _buildTables()
+"""
+Class table: byte -> character class. Bytes above ASCII are UTF-8 sequence parts
+
+Text is encoded to ASCII with `?` (class `other`) for every non-ASCII character, keeping offsets in characters
+"""
+_RUN_MATCHERS: Final = {
+    loop: re.compile(b"[" + re.escape(loop) + b"]*").match
+    for loop in set(_LOOPS) - {None}
+}
+_RUNS: Final[Sequence[Optional[Callable]]] = tuple(_RUN_MATCHERS.get(loop) for loop in _LOOPS)
+_START: Final = _S.start * len(_CharClass)
+_SINGLE: Final = tuple(
+    _ACCEPT[target] if target and _ACCEPT[target] != _SKIP and not any(_TABLE[target:target + len(_CharClass)]) else _REJECT
+    for target in _TABLE[_START:_START + len(_CharClass)]
+)
+"""Token type by class of a character which is a whole token (no transition leaves its state)"""
+
+KEYWORDS: Final = frozenset((
+    "import",
+    "pub",
+    "const",
+    "var",
+    "fn",
+    "macro",
+    "struct",
+    "as",
+))
+"""Keywords of the language"""
+
+Binary = bytes | bytearray | memoryview | mmap
+"""Raw UTF-8 source"""
+
+_WINDOW: Final = 0x100000
+"""Bytes scanned at once in binary mode"""
+
+_RELEX_WINDOW: Final = 0x100
+"""Units scanned at once while relexing, doubled until the token stream resynchronises"""
+
+_LOOKAHEAD: Final = 2
+"""Longest run of non-accepting states after an accepting one (`1e+`, `..`)"""
+
+
+_ESCAPES: Final = {
+    "n": ord("\n"),
+    "t": ord("\t"),
+    "r": ord("\r"),
+    "0": 0,
+}
+
+
+_ESCAPE: Final = re.compile(r"\\(.)")
+
+
+def decodeString(lexeme: str | bytes) -> bytes:
+    """UTF-8 value of string literal, escapes applied"""
+    body = lexeme[1:-1] if isinstance(lexeme, str) else str(lexeme[1:-1], "utf-8")
+    return _ESCAPE.sub(lambda match: chr(_ESCAPES.get(match[1], ord(match[1]))), body).encode()
+
+
+def _decodeCharacter(lexeme: str | bytes) -> int:
+    body = lexeme[1:-1] if isinstance(lexeme, str) else str(lexeme[1:-1], "utf-8")
+
+    if body[0] == "\\":
+        return _ESCAPES.get(body[1], ord(body[1]))
+
+    return ord(body)
+
+
+_INTEGER_DECODERS: Final[Sequence[Optional[Callable[[str | bytes], int]]]] = tuple(
+    {
+        Token.Type.literal_number_integer: int,
+        Token.Type.literal_number_integer_hex: lambda lexeme: int(lexeme, 16),
+        Token.Type.literal_number_integer_bin: lambda lexeme: int(lexeme, 2),
+        Token.Type.literal_number_integer_character: _decodeCharacter,
+    }.get(token_type)
+    for token_type in (None, *Token.Type)
+)
+"""Integer literal value by token code"""
+
+_REAL_DECODERS: Final[Sequence[Optional[Callable[[str | bytes], float]]]] = tuple(
+    float if token_type in (Token.Type.literal_number_real, Token.Type.literal_number_real_exp) else None
+    for token_type in (None, *Token.Type)
+)
+"""Real literal value by token code"""
+
+_INTEGER_MAX: Final = (1 << 64) - 1
+
+_UNKNOWN_RUN: Final = re.compile(
+    b"[" + re.escape(bytes(c for c in _CharClass if not _TABLE[_START + c])) + b"]*"
+).match
+"""Run of characters which can not start a token"""
+
+_SNIPPET_LENGTH: Final = 32
+
+
+def _shift(offsets: array, delta: int) -> Iterable[int]:
+    return [offset + delta for offset in offsets] if delta else offsets
+
+
+class LexerError(Exception):
+    """Source contains a character sequence that is not a token"""
+
+    def __init__(self, message: str, *, line: int, col: int) -> None:
+        super().__init__(f"{line}:{col}: {message}")
+        self.message = message
+        self.line = line
+        self.col = col
+
+    def __reduce__(self):
+        return partial(LexerError, line=self.line, col=self.col), (self.message,)
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
 class Lexer:
-    """Lexer"""
+    """
+    Lexer - single-pass table-driven DFA
+
+    Each character costs one class lookup and one transition lookup,
+    runs of a self-looping state (blanks, comment, word, digits, string body) are consumed by one match.
+    Maximal munch: the scanner runs until the table rejects, then emits the last accepted token.
+    """
+
+    keywords: frozenset[str] = KEYWORDS
+    error_budget: Optional[int] = None
+    """
+    None - raise LexerError on the first error.
+    Otherwise a run of characters which can not start a token is one diagnostic in `TokenBuffer.errors`,
+    skipped by a single match, and lexing stops (`TokenBuffer.truncated`) after this many errors.
+    """
+
+    def symbols(self) -> SymbolTable:
+        """New symbol table of a compilation"""
+        return SymbolTable(self.keywords)
+
+    def run(self, source: str | Binary) -> Sequence[Token]:
+        """Split source into tokens"""
+        return list(self.scan(source))
+
+    def scan(self, source: str | Binary, symbols: Optional[SymbolTable] = None) -> TokenBuffer:
+        """
+        Split source into compact token buffer
+
+        Identifiers and keywords are interned into `symbols` (new table if not given),
+        `integers[i]` of such token is its symbol id.
+        Binary source (bytes, memoryview, mmap) is scanned as raw UTF-8 by windows, without decoding:
+        token offsets are byte offsets into it, lexemes are decoded only when requested.
+        """
+        tokens = TokenBuffer(source, symbols=self._checkSymbols(symbols))
+
+        if isinstance(source, str):
+            self._scan(
+                source,
+                source.encode("ascii", "replace").translate(_CLASS_TABLE),
+                tokens,
+                final=True,
+                budget=self.error_budget
+            )
+            return tokens
+
+        end = len(source)
+        window = _WINDOW
+        begin = 0
+
+        while begin < end and not tokens.truncated:
+            text = bytes(source[begin:begin + window])
+            final = begin + len(text) == end
+            budget = None if self.error_budget is None else self.error_budget - len(tokens.errors)
+            consumed = self._scan(text, text.translate(_CLASS_TABLE), tokens, final=final, base=begin, budget=budget)
+
+            if consumed == begin:
+                window *= 2
+
+            begin = consumed
+
+        return tokens
+
+    def tokens(
+            self,
+            source: TextIO,
+            symbols: Optional[SymbolTable] = None,
+            *,
+            errors: Optional[list[Diagnostic]] = None,
+            chunk_size: int = 0x10000
+    ) -> Iterator[Token]:
+        """Pull tokens from a stream read by fixed-size chunks (see `windows`)"""
+        for window in self.windows(source, symbols, errors=errors, chunk_size=chunk_size):
+            yield from window
+
+    def windows(
+            self,
+            source: TextIO,
+            symbols: Optional[SymbolTable] = None,
+            *,
+            errors: Optional[list[Diagnostic]] = None,
+            chunk_size: int = 0x10000
+    ) -> Iterator[TokenBuffer]:
+        """
+        Lex a stream read by fixed-size chunks into one token buffer per chunk
+
+        A token unfinished at the end of a chunk is carried over to the next one,
+        so memory depends on the chunk size and the longest token only.
+        Source of a buffer is the text its tokens were lexed from: sources of consecutive buffers
+        are consecutive parts of the stream, `origin` is the position of the part.
+        :param errors: receives diagnostics if `error_budget` is set (offsets are relative to the buffer)
+        """
+        symbols = self._checkSymbols(symbols)
+        budget = self.error_budget
+        carry = ""
+        origin = (1, 0)
+
+        while True:
+            chunk = source.read(chunk_size)
+            final = not chunk
+            text = carry + chunk
+
+            tokens = TokenBuffer(text, symbols=symbols, origin=origin)
+            consumed = self._scan(text, text.encode("ascii", "replace").translate(_CLASS_TABLE), tokens, final=final, budget=budget)
+
+            if tokens.errors:
+                budget -= len(tokens.errors)
+
+                if errors is not None:
+                    errors.extend(tokens.errors)
+
+            if final or tokens.truncated:
+                yield tokens
+                return
+
+            window = TokenBuffer(text[:consumed], symbols=symbols, origin=origin)
+            window.kinds.extend(tokens.kinds)
+            window.starts.extend(tokens.starts)
+            window.ends.extend(tokens.ends)
+            window.integers.extend(tokens.integers)
+            window.reals.extend(tokens.reals)
+            window.errors.extend(tokens.errors)
+            yield window
+
+            origin = tokens.locate(consumed)
+            carry = text[consumed:]
+
+    def relex(self, tokens: TokenBuffer, offset: int, removed: int, inserted: str | bytes) -> tuple[TokenBuffer, range]:
+        """
+        Update tokens after replacing `removed` source units at `offset` with `inserted`
+
+        Scanning restarts at the last token boundary the edit cannot affect: before the tokens whose lookahead
+        reaches it and before errors on its line (a rejected string or character scans up to the end of line)
+        and stops at the first token starting where an old token started (shifted by the edit):
+        the rest of the source is the same, so are its tokens.
+        The error budget is shared with the errors kept around the relexed tokens,
+        tokens truncated by the budget are relexed up to the end (the old ones stop early).
+        :return: updated buffer and range of its tokens which were relexed
+        """
+        old = tokens.source
+        source = old[:offset] + inserted + old[offset + removed:]
+        delta = len(inserted) - removed
+        edit_end = offset + len(inserted)
+        old_starts = tokens.starts
+        old_count = len(tokens)
+
+        first = bisect_left(tokens.ends, offset - _LOOKAHEAD)
+        line_start = old.rfind("\n" if isinstance(old, str) else b"\n", 0, offset) + 1
+
+        for e in tokens.errors:
+            if line_start <= e.start < offset:
+                first = min(first, bisect_left(tokens.starts, e.start))
+                break
+
+        position = tokens.ends[first - 1] if first else 0
+
+        is_text = isinstance(source, str)
+        scanned = TokenBuffer(source, symbols=tokens.symbols, origin=tokens.origin)
+        end = len(source)
+        window = _RELEX_WINDOW
+        checked = 0
+        synced = None
+        budget = self.error_budget
+
+        if budget is not None:
+            budget -= sum(1 for e in tokens.errors if e.end <= position)
+
+        while synced is None:
+            text = source[position:position + window]
+            final = position + len(text) == end
+            classes = (text.encode("ascii", "replace") if is_text else text).translate(_CLASS_TABLE)
+            position = self._scan(text, classes, scanned, final=final, base=position, budget=budget)
+
+            if not tokens.truncated:
+                for index in range(checked, len(scanned)):
+                    start = scanned.starts[index]
+
+                    if start < edit_end:
+                        continue
+
+                    old_index = bisect_left(old_starts, start - delta)
+
+                    if old_index < old_count and old_starts[old_index] == start - delta:
+                        synced = index, old_index
+                        break
+
+            if synced is None and (final or scanned.truncated):
+                synced = len(scanned), old_count
+
+            checked = len(scanned)
+            window *= 2
+
+        count, old_index = synced
+
+        result = TokenBuffer(source, symbols=tokens.symbols, origin=tokens.origin)
+        result.kinds.extend(tokens.kinds[:first])
+        result.kinds.extend(scanned.kinds[:count])
+        result.kinds.extend(tokens.kinds[old_index:])
+        result.starts.extend(old_starts[:first])
+        result.starts.extend(scanned.starts[:count])
+        result.starts.extend(_shift(old_starts[old_index:], delta))
+        result.ends.extend(tokens.ends[:first])
+        result.ends.extend(scanned.ends[:count])
+        result.ends.extend(_shift(tokens.ends[old_index:], delta))
+        result.integers.extend(tokens.integers[:first])
+        result.integers.extend(scanned.integers[:count])
+        result.integers.extend(tokens.integers[old_index:])
+        result.reals.extend(tokens.reals[:first])
+        result.reals.extend(scanned.reals[:count])
+        result.reals.extend(tokens.reals[old_index:])
+
+        restart = tokens.ends[first - 1] if first else 0
+        resync = scanned.starts[count] if count < len(scanned) else end
+        result.errors.extend(e for e in tokens.errors if e.end <= restart)
+        result.errors.extend(e for e in scanned.errors if e.start < resync)
+
+        if old_index < old_count:
+            for e in tokens.errors:
+                if e.start >= old_starts[old_index]:
+                    line, col = result.locate(e.start + delta)
+                    result.errors.append(replace(e, start=e.start + delta, end=e.end + delta, line=line, col=col))
+
+        result.truncated = scanned.truncated
+
+        if self.error_budget is not None and len(result.errors) >= self.error_budget:
+            self._truncate(result, self.error_budget)
+
+        return result, range(first, first + count)
+
+    @staticmethod
+    def _truncate(tokens: TokenBuffer, budget: int) -> None:
+        """Cut tokens and errors after the error which spends the budget, as a full scan stops there"""
+        stop = tokens.errors[budget - 1].end
+        count = bisect_left(tokens.starts, stop)
+
+        del tokens.errors[budget:]
+
+        for column in (tokens.kinds, tokens.starts, tokens.ends, tokens.integers, tokens.reals):
+            del column[count:]
+
+        tokens.truncated = True
+
+    def _checkSymbols(self, symbols: Optional[SymbolTable]) -> SymbolTable:
+        if symbols is None:
+            return self.symbols()
+
+        if symbols.names[:symbols.keyword_count] != sorted(self.keywords):
+            raise ValueError("symbol table was made for other keywords")
+
+        return symbols
+
+    def _scan(
+            self,
+            text: str | bytes,
+            classes: bytes,
+            tokens: TokenBuffer,
+            *,
+            final: bool,
+            base: int = 0,
+            budget: Optional[int] = None
+    ) -> int:
+        """
+        Scan text (placed at `base` in token buffer source) into tokens
+        :param classes: character class of each text unit
+        :param final: source ends here, otherwise a token or an error run reaching the end is left pending
+        :param budget: errors this call may record (None - raise on the first one)
+        :return: source offset of the first unconsumed unit
+        """
+        table = _TABLE
+        accept = _ACCEPT
+        runs = _RUNS
+        single = _SINGLE
+        blank = _RUNS[_START]
+        symbols = tokens.symbols
+        ids = symbols.ids if isinstance(text, str) else symbols.binary_ids
+        keyword_count = symbols.keyword_count
+        identifier = Token.Type.identifier.value
+        keyword = Token.Type.keyword.value
+
+        integer_decoders = _INTEGER_DECODERS
+        real_decoders = _REAL_DECODERS
+
+        kinds = list[int]()
+        starts = list[int]()
+        ends = list[int]()
+        integers = list[int]()
+        reals = list[float]()
+        end = len(classes)
+        position = 0
+
+        try:
+            while (position := blank(classes, position).end()) < end:
+                if accepted := single[classes[position]]:
+                    kinds.append(accepted)
+                    starts.append(base + position)
+                    position += 1
+                    ends.append(base + position)
+                    integers.append(0)
+                    reals.append(0.0)
+                    continue
+
+                state = _START
+                token_end = position
+                i = position
+
+                while i < end:
+                    state = table[state + classes[i]]
+
+                    if not state:
+                        break
+
+                    i += 1
+
+                    if run := runs[state]:
+                        i = run(classes, i).end()
+
+                    if accept[state]:
+                        accepted = accept[state]
+                        token_end = i
+
+                if state and not final:
+                    return base + position
+
+                if accepted == _REJECT:
+                    if budget is None:
+                        line, col = tokens.locate(base + position)
+                        raise LexerError(f"unexpected character {text[position:position + 1]!r}", line=line, col=col)
+
+                    skipped = _UNKNOWN_RUN(classes, position + 1).end()
+
+                    if skipped == end and not final:
+                        return base + position
+
+                    line, col = tokens.locate(base + position)
+                    snippet = text[position:min(skipped, position + _SNIPPET_LENGTH)]
+                    tokens.errors.append(Diagnostic(
+                        start=base + position,
+                        end=base + skipped,
+                        line=line,
+                        col=col,
+                        message=f"unexpected characters {snippet if isinstance(snippet, str) else str(snippet, 'utf-8', 'replace')!r}"
+                    ))
+                    position = skipped
+                    budget -= 1
+
+                    if budget <= 0:
+                        tokens.truncated = True
+                        break
+
+                    continue
+
+                if accepted != _SKIP:
+                    integer = 0
+                    real = 0.0
+
+                    if accepted == identifier:
+                        name = text[position:token_end]
+                        integer = ids.get(name)
+
+                        if integer is None:
+                            integer = symbols.intern(name)
+
+                        elif integer < keyword_count:
+                            accepted = keyword
+
+                    elif decode := integer_decoders[accepted]:
+                        integer = decode(text[position:token_end])
+
+                        if integer > _INTEGER_MAX:
+                            line, col = tokens.locate(base + position)
+                            raise LexerError("integer literal out of range", line=line, col=col)
+
+                    elif decode := real_decoders[accepted]:
+                        real = decode(text[position:token_end])
+
+                    kinds.append(accepted)
+                    starts.append(base + position)
+                    ends.append(base + token_end)
+                    integers.append(integer)
+                    reals.append(real)
+
+                position = token_end
+
+            return base + end
+
+        finally:
+            tokens.kinds.extend(kinds)
+            tokens.starts.extend(starts)
+            tokens.ends.extend(ends)
+            tokens.integers.extend(integers)
+            tokens.reals.extend(reals)
@@ -0,0 +1,12 @@
+from enum import StrEnum
+
+
+class Operator(StrEnum):
+    """Operator"""
+
+    dot = "."
+    plus = "+"
+    minus = "-"
+    star = "*"
+    slash = "/"
+    cast = "as"
@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+from dataclasses import field
+from dataclasses import replace
+from hashlib import blake2b
+from typing import Final
+from typing import Optional
+from typing import final
+
+from bytelang._arena import NodeArena
+from bytelang._buffer import TokenBuffer
+from bytelang._cache import mapCache
+from bytelang._cache import writeCache
+from bytelang._diagnostic import Diagnostics
+from bytelang._lexer import Binary
+from bytelang._lexer import specKey
+from bytelang._parser import GRAMMAR_VERSION
+from bytelang._parser import Parser
+
+_VERSIONS: Final = f"arena {NodeArena.FORMAT}, grammar {GRAMMAR_VERSION}, tokens {specKey()}"
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class ParseCache:
+    """
+    Parsed modules (NodeArena images) in the on-disk cache directory
+
+    An entry is named by a hash of the source, the arena format, the grammar version,
+    the token spec and the lexer keywords, any change of them is a miss.
+    A hit maps the entry and reads the arena from it: no lexing, no parsing, no per-node work.
+    """
+
+    parser: Parser = field(default_factory=Parser)
+    """Parser of misses (bodies are always parsed: lazy blocks can not be stored)"""
+
+    def key(self, source: str | Binary) -> str:
+        """Entry name of source"""
+        digest = blake2b(f"{_VERSIONS}, keywords {' '.join(sorted(self.parser.lexer.keywords))}\n".encode(), digest_size=16)
+        digest.update(source.encode() if isinstance(source, str) else source)
+        return f"ast-{digest.hexdigest()}.arena"
+
+    def parse(self, source: str | Binary | TokenBuffer, *, diagnostics: Optional[Diagnostics] = None) -> NodeArena:
+        """
+        Arena of source from the cache, parsed and stored on a miss
+        :param source: text, raw UTF-8 or its tokens (scanned by the parser's lexer, a miss does not lex again)
+        :param diagnostics: see `Parser.parse`, a parse with syntax or lexer errors is not stored (a hit has none)
+        """
+        name = self.key(source.source if isinstance(source, TokenBuffer) else source)
+
+        if (data := mapCache(name)) is not None:
+            try:
+                return NodeArena.load(data)
+
+            except ValueError:
+                pass
+
+        tokens = source if isinstance(source, TokenBuffer) else self.parser.lexer.scan(source)
+        errors = None if diagnostics is None else (len(diagnostics), diagnostics.truncated)
+        arena = NodeArena()
+        replace(self.parser, lazy_bodies=False).parse(tokens, arena, diagnostics=diagnostics)
+
+        if not tokens.errors and (diagnostics is None or (len(diagnostics), diagnostics.truncated) == errors):
+            writeCache(name, arena.dump())
+
+        return arena
@@ -0,0 +1,1031 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field
+from functools import partial
+from gc import disable
+from gc import enable
+from gc import isenabled
+from itertools import compress
+from itertools import repeat
+from os import cpu_count
+from typing import Final
+from typing import Generic
+from typing import Iterable
+from typing import Iterator
+from typing import Mapping
+from typing import Optional
+from typing import Sequence
+from typing import TextIO
+from typing import final
+
+from bytelang._arena import NodeArena
+from bytelang._ast import Block
+from bytelang._ast import Declaration
+from bytelang._ast import LazyBlock
+from bytelang._ast import Module
+from bytelang._buffer import TokenBuffer
+from bytelang._builder import Builder
+from bytelang._builder import N
+from bytelang._builder import TreeBuilder
+from bytelang._diagnostic import Diagnostic
+from bytelang._diagnostic import Diagnostics
+from bytelang._lexer import Binary
+from bytelang._lexer import Lexer
+from bytelang._lexer import decodeString
+from bytelang._operator import Operator
+from bytelang._token import Token
+
+_T = Token.Type
+
+_END: Final = 0
+"""Kind past the last token (Token.Type values start at 1)"""
+
+_IDENTIFIER: Final = _T.identifier.value
+_KEYWORD: Final = _T.keyword.value
+_OPEN_ROUND: Final = _T.bracket_open_round.value
+_CLOSE_ROUND: Final = _T.bracket_close_round.value
+_OPEN_SQUARE: Final = _T.bracket_open_square.value
+_CLOSE_SQUARE: Final = _T.bracket_close_square.value
+_OPEN_FIGURE: Final = _T.bracket_open_figure.value
+_CLOSE_FIGURE: Final = _T.bracket_close_figure.value
+_COMMA: Final = _T.delimiter_comma.value
+_COLON: Final = _T.delimiter_colon.value
+_SEMICOLON: Final = _T.delimiter_semicolon.value
+_ASSIGN: Final = _T.delimiter_assign.value
+_ELLIPSIS: Final = _T.delimiter_ellipsis.value
+_DOT: Final = _T.operator_dot.value
+
+_OPERATOR_TOKENS: Final[Mapping[Operator, int]] = {
+    Operator.dot: _DOT,
+    Operator.plus: _T.operator_plus.value,
+    Operator.minus: _T.operator_minus.value,
+    Operator.star: _T.operator_star.value,
+    Operator.slash: _T.operator_slash.value,
+}
+"""Token kind of operator (cast is the keyword `as`)"""
+
+_BINARY_POWER: Final[Mapping[Operator, int]] = {
+    Operator.plus: 10,
+    Operator.minus: 10,
+    Operator.star: 20,
+    Operator.slash: 20,
+    Operator.cast: 30,
+}
+"""Binding power of infix operators, member access, calls and indexing bind tighter than any"""
+
+_PREFIX_POWER: Final = 40
+"""Binding power of prefix operators (-, *, []) - above infix, below postfix"""
+
+_GROUP_POWER: Final = -1
+"""Binding power of open brackets: no operator is reduced past them"""
+
+_INFIX: Final = {_OPERATOR_TOKENS[operator]: operator for operator in _BINARY_POWER if operator in _OPERATOR_TOKENS}
+
+_PREFIX: Final = {_OPERATOR_TOKENS[operator]: operator for operator in (Operator.minus, Operator.star)}
+
+_BINARY: Final = 0
+_UNARY: Final = 1
+_ARRAY: Final = 2
+_GROUP: Final = 3
+_INITIALIZER: Final = 4
+_CALL: Final = 5
+_INDEX: Final = 6
+_LENGTH: Final = 7
+
+_CLOSING_OF: Final = {
+    _GROUP: _T.bracket_close_round,
+    _INITIALIZER: _T.bracket_close_figure,
+    _CALL: _T.bracket_close_round,
+    _INDEX: _T.bracket_close_square,
+    _LENGTH: _T.bracket_close_square,
+}
+"""Token closing an open bracket entry of the expression stack"""
+
+_DECLARATION_KEYWORDS: Final = ("import", "pub", "const", "var", "fn", "macro")
+
+_MODIFIER_KEYWORDS: Final = ("pub", "fn", "macro")
+"""Declaration keywords after which another one continues the same declaration"""
+
+_OPENING: Final = frozenset(t.value for t in (_T.bracket_open_round, _T.bracket_open_square, _T.bracket_open_figure))
+_CLOSING: Final = frozenset(t.value for t in (_T.bracket_close_round, _T.bracket_close_square, _T.bracket_close_figure))
+
+GRAMMAR_VERSION: Final = 1
+"""Version of the syntax and of the nodes made for it (bump on any change: it keys cached parses)"""
+
+_GROUPS_PER_JOB: Final = 4
+"""Declaration groups per process (balances uneven groups)"""
+
+_STRING: Final = _T.literal_string.value
+
+_REALS: Final = frozenset(t.value for t in (_T.literal_number_real, _T.literal_number_real_exp))
+
+_LITERALS: Final = frozenset(t.value for t in (
+    _T.literal_string,
+    _T.literal_number_integer,
+    _T.literal_number_integer_character,
+    _T.literal_number_integer_hex,
+    _T.literal_number_integer_bin,
+    _T.literal_number_real,
+    _T.literal_number_real_exp,
+))
+
+
+class ParseError(Exception):
+    """Token sequence does not match the grammar"""
+
+    def __init__(self, message: str, *, line: int, col: int) -> None:
+        super().__init__(f"{line}:{col}: {message}")
+        self.message = message
+        self.line = line
+        self.col = col
+
+    def __reduce__(self):
+        return partial(ParseError, line=self.line, col=self.col), (self.message,)
+
+
+class _Recover(Exception):
+    """Unwinds a broken declaration whose error is already in the diagnostics sink"""
+
+
+def _group(boundaries: Sequence[int], count: int, parts: int) -> list[tuple[int, int]]:
+    """Token ranges of about `count / parts` tokens made of whole declarations"""
+    size = count / parts
+    groups = list[tuple[int, int]]()
+    begin = 0
+
+    for boundary in boundaries:
+        if boundary - begin >= size:
+            groups.append((begin, boundary))
+            begin = boundary
+
+    groups.append((begin, count))
+    return groups
+
+
+def _groupColumns(tokens: TokenBuffer, source: str | Binary, begin: int, end: int) -> tuple:
+    """Source slice, origin and token columns of a group (offsets are rebased by the worker)"""
+    base = tokens.starts[begin]
+    stop = tokens.starts[end] if end < len(tokens) else len(source)
+    text = source[base:stop]
+
+    return (
+        text if isinstance(text, (str, bytes)) else bytes(text),
+        base,
+        tokens.locate(base),
+        tokens.symbols,
+        tokens.kinds[begin:end],
+        tokens.starts[begin:end],
+        tokens.ends[begin:end],
+        tokens.integers[begin:end],
+        tokens.reals[begin:end],
+    )
+
+
+def _subBuffer(columns: tuple, origin: Optional[tuple[int, int]] = None) -> TokenBuffer:
+    """Token buffer of a group made by `_groupColumns` (at its place in the source unless `origin` is given)"""
+    source, base, group_origin, symbols, kinds, starts, ends, integers, reals = columns
+    tokens = TokenBuffer(source, symbols=symbols, origin=group_origin if origin is None else origin)
+    tokens.kinds.extend(kinds)
+    tokens.starts.extend(start - base for start in starts)
+    tokens.ends.extend(end - base for end in ends)
+    tokens.integers.extend(integers)
+    tokens.reals.extend(reals)
+    return tokens
+
+
+def _compactColumns(columns: tuple) -> tuple:
+    """Group columns made by `_groupColumns` with the names of its identifiers instead of the whole symbol table"""
+    source, base, origin, symbols, kinds, starts, ends, integers, reals = columns
+    used = list(set(compress(integers, map(_IDENTIFIER.__eq__, kinds))))
+    names = symbols.names
+    return source, base, origin, (used, [names[symbol] for symbol in used]), kinds, starts, ends, integers, reals
+
+
+def _parseGroup(
+        parser: "Parser",
+        columns: tuple,
+        limit: Optional[int] = None,
+        recover: bool = False,
+        tree: bool = True
+) -> tuple[tuple[Declaration, ...] | tuple[NodeArena, list[int]], Optional[Diagnostics]]:
+    """
+    Parse a group of declarations made by `_compactColumns` in a worker (errors go to its own sink if recovering)
+
+    Identifier ids are mapped into a table of the group's names only,
+    the finished declarations are sent back: dataclass nodes if `tree`, an arena and its declaration nodes otherwise.
+    """
+    source, base, origin, (used, names), kinds, starts, ends, integers, reals = columns
+    symbols = parser.lexer.symbols()
+    local = dict(zip(used, map(symbols.intern, names)))
+    integers = array("Q", integers)
+
+    for index in compress(range(len(kinds)), map(_IDENTIFIER.__eq__, kinds)):
+        integers[index] = local[integers[index]]
+
+    tokens = _subBuffer((source, base, origin, symbols, kinds, starts, ends, integers, reals))
+    diagnostics = Diagnostics(limit) if recover else None
+
+    if tree:
+        return tuple(parser.declarations(tokens, diagnostics=diagnostics)), diagnostics
+
+    arena = NodeArena()
+    return (arena, list(parser.declarations(tokens, arena, diagnostics=diagnostics))), diagnostics
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Parser:
+    """
+    Recursive descent parser walking token columns, expressions by table-driven precedence climbing
+
+    No Token objects are made: the parser reads kinds and symbol ids of a TokenBuffer by index,
+    line and column are resolved for declarations and errors only.
+    A stream source is lexed by chunks into buffers pulled on demand,
+    so lexing overlaps with parsing and stops at the first syntax error.
+    """
+
+    lexer: Lexer = field(default_factory=Lexer)
+    lazy_bodies: bool = False
+    """
+    Skim block bodies of functions by brace depth into LazyBlock (token range), parse them with `body`.
+    Over a TokenBuffer the range refers to it, a body of a stream source gets a buffer of its own.
+    """
+
+    def parse(
+            self,
+            source: str | Binary | TextIO | TokenBuffer,
+            builder: Optional[Builder[N]] = None,
+            *,
+            jobs: Optional[int] = 1,
+            diagnostics: Optional[Diagnostics] = None
+    ) -> Module | N:
+        """
+        Lex and parse source, a text stream is read only as far as the parser gets, a token buffer is not lexed again
+        :param jobs: processes parsing groups of top-level declarations of a text, binary or token source (None - all cores)
+        :param diagnostics: see `declarations`, lexer errors (`Lexer.error_budget`) are merged into it by position
+        """
+        if isinstance(source, (str, TokenBuffer)) or isinstance(source, Binary):
+            tokens = source if isinstance(source, TokenBuffer) else self.lexer.scan(source)
+
+            if jobs != 1:
+                module = self._parseParallel(tokens, builder, jobs or cpu_count() or 1, diagnostics)
+            else:
+                module = self.run(tokens, builder, diagnostics=diagnostics)
+
+            if diagnostics is not None:
+                diagnostics.merge(tokens.errors)
+
+            return module
+
+        if diagnostics is None:
+            return self.run(self.lexer.windows(source), builder)
+
+        errors = list[Diagnostic]()
+        module = self.run(self.lexer.windows(source, errors=errors), builder, diagnostics=diagnostics)
+        diagnostics.merge(errors)
+        return module
+
+    def run(
+            self,
+            tokens: TokenBuffer | Iterable[TokenBuffer],
+            builder: Optional[Builder[N]] = None,
+            *,
+            diagnostics: Optional[Diagnostics] = None
+    ) -> Module | N:
+        """Parse tokens into module node made by `builder` (dataclass nodes by default)"""
+        if builder is None:
+            builder = TreeBuilder()
+
+        return builder.module(tuple(self.declarations(tokens, builder, diagnostics=diagnostics)))
+
+    def declarations(
+            self,
+            tokens: TokenBuffer | Iterable[TokenBuffer],
+            builder: Optional[Builder[N]] = None,
+            *,
+            diagnostics: Optional[Diagnostics] = None
+    ) -> Iterator[Declaration | N]:
+        """
+        Parse top-level declarations one by one
+        :param tokens: buffer or consecutive buffers of a stream (`Lexer.windows`), pulled on demand
+        :param diagnostics: None - raise ParseError on the first error.
+        Otherwise an error is reported to the sink, the broken declaration is skipped up to the next one
+        (as `boundaries` splits them) and parsing goes on until the sink is full.
+        """
+        build = TreeBuilder() if builder is None else builder
+
+        if isinstance(tokens, TokenBuffer):
+            parse = _Parse(tokens, build, lazy=self.lazy_bodies, diagnostics=diagnostics)
+
+        else:
+            windows = iter(tokens)
+            first = next(windows, None)
+
+            if first is None:
+                return
+
+            parse = _Parse(first, build, windows=windows, lazy=self.lazy_bodies, diagnostics=diagnostics)
+
+        if diagnostics is None:
+            while parse.kind() != _END:
+                yield parse.declaration()
+
+            return
+
+        while parse.kind() != _END:
+            parse.start = parse.index
+            parse.depth = 0
+
+            try:
+                declaration = parse.declaration()
+
+            except _Recover:
+                parse.pins.clear()
+
+                if diagnostics.full:
+                    diagnostics.truncated = True
+                    return
+
+                parse.recover()
+                continue
+
+            yield declaration
+
+    def boundaries(self, tokens: TokenBuffer, begin: int = 0, end: Optional[int] = None) -> list[int]:
+        """
+        Indices of tokens starting top-level declarations
+
+        One pass over token kinds: a declaration keyword outside of any brackets starts a declaration
+        unless it continues one (`pub fn`, `fn macro`), no tokens are materialised.
+        Closing brackets of a broken declaration stop at depth 0, as in recovery.
+        """
+        symbols = tokens.symbols
+        integers = tokens.integers
+        starters = frozenset(symbols.get(keyword) for keyword in _DECLARATION_KEYWORDS)
+        joiners = frozenset(symbols.get(keyword) for keyword in _MODIFIER_KEYWORDS)
+        keyword = _T.keyword.value
+
+        boundaries = list[int]()
+        depth = 0
+        joined = False
+
+        for index, kind in enumerate(tokens.kinds[begin:end], begin):
+            if kind in _OPENING:
+                depth += 1
+
+            elif kind in _CLOSING:
+                depth = max(depth - 1, 0)
+
+            elif kind == keyword and depth == 0:
+                symbol = integers[index]
+
+                if symbol in starters and not joined:
+                    boundaries.append(index)
+
+                joined = symbol in joiners
+                continue
+
+            joined = False
+
+        return boundaries
+
+    def _parseParallel(self, tokens: TokenBuffer, builder: Optional[Builder[N]], jobs: int, diagnostics: Optional[Diagnostics]) -> Module | N:
+        """
+        Parse groups of declarations in a process pool, join them in source order
+
+        Workers send back finished dataclass declarations (default builder) or arenas merged into an arena builder,
+        only other builders get the tree replayed from a merged arena.
+        The cyclic garbage collector is paused meanwhile: nodes are acyclic, collections triggered
+        by unpickling them would only walk the growing tree (most of the time of receiving it).
+        """
+        groups = _group(self.boundaries(tokens), len(tokens), jobs * _GROUPS_PER_JOB)
+
+        if len(groups) < 2:
+            return self.run(tokens, builder, diagnostics=diagnostics)
+
+        tree = builder is None or isinstance(builder, TreeBuilder)
+        arena = builder if isinstance(builder, NodeArena) else NodeArena()
+        declarations = list[Declaration | int]()
+        source = tokens.source
+
+        collecting = isenabled()
+        disable()
+
+        try:
+            with ProcessPoolExecutor(min(jobs, len(groups))) as executor:
+                parts = executor.map(
+                    _parseGroup,
+                    repeat(self),
+                    (_compactColumns(_groupColumns(tokens, source, begin, end)) for begin, end in groups),
+                    repeat(None if diagnostics is None else diagnostics.limit),
+                    repeat(diagnostics is not None),
+                    repeat(tree),
+                )
+
+                for part, errors in parts:
+                    declarations.extend(part if tree else arena.extend(*part))
+
+                    if errors is not None:
+                        diagnostics.extend(errors)
+
+        finally:
+            if collecting:
+                enable()
+
+        if tree:
+            return (TreeBuilder() if builder is None else builder).module(tuple(declarations))
+
+        root = arena.module(declarations)
+
+        if arena is builder:
+            return root
+
+        return arena.replay(builder)
+
+    def body(self, block: LazyBlock, builder: Optional[Builder[N]] = None) -> Block | N:
+        """Parse skimmed function body"""
+        parse = _Parse(block.tokens, TreeBuilder() if builder is None else builder, begin=block.start, end=block.end)
+        return parse.block()
+
+
+@final
+class _Parse(Generic[N]):
+    """
+    State of one parser run: a cursor over token columns
+
+    Tokens of a stream come in buffers: when the cursor reaches the end of one, the next is merged
+    with the tokens still needed (the last consumed one and those of `pins`), indices shift then,
+    so an index returned by `next` is valid until the next lookahead.
+    """
+
+    def __init__(
+            self,
+            tokens: TokenBuffer,
+            build: Builder[N],
+            *,
+            windows: Optional[Iterator[TokenBuffer]] = None,
+            begin: int = 0,
+            end: Optional[int] = None,
+            lazy: bool = False,
+            diagnostics: Optional[Diagnostics] = None
+    ) -> None:
+        self.build: Final = build
+        self.lazy: Final = lazy
+        self.diagnostics: Final = diagnostics
+        """Sink of errors if recovering"""
+        self.streamed: Final = windows is not None
+        """Tokens come in buffers of a stream"""
+        self.windows = windows
+        """Buffers not pulled yet (None - no more)"""
+        self.pins: Final = list[int]()
+        """Indices of tokens kept when the next buffer is merged (start of a skimmed body)"""
+        self.start: Optional[int] = None
+        """Index of the first token of the declaration being parsed if recovering"""
+        self.depth = 0
+        """Bracket depth at `start` (tokens before it may be dropped by a merge)"""
+        self.index = begin
+        """Index of the current token"""
+        self.count = len(tokens) if end is None else end
+        """Index past the last token to parse"""
+        self._load(tokens)
+
+    # Tokens
+
+    def _load(self, tokens: TokenBuffer) -> None:
+        self.tokens = tokens
+        self.kinds = tokens.kinds
+        self.integers = tokens.integers
+        self.reals = tokens.reals
+        self.names = tokens.symbols.names
+
+    def kind(self, k: int = 0) -> int:
+        """Kind of the `k`-th token ahead of the cursor (0 - current), _END past the last one"""
+        if self.index + k < self.count or self._pull(k):
+            return self.kinds[self.index + k]
+
+        return _END
+
+    def next(self) -> int:
+        """Consume current token, return its index"""
+        index = self.index
+
+        if index >= self.count and not self._pull(0):
+            raise self.error("unexpected end of file", None)
+
+        self.index += 1
+        return self.index - 1
+
+    def current(self) -> Optional[int]:
+        """Index of the current token, None at the end"""
+        return None if self.kind() == _END else self.index
+
+    def symbol(self, index: int) -> str:
+        """Name of identifier or keyword"""
+        return self.names[self.integers[index]]
+
+    def literal(self, index: int) -> int | float | bytes:
+        """Value of literal, numbers are decoded by the lexer"""
+        kind = self.kinds[index]
+
+        if kind == _STRING:
+            return decodeString(self.tokens.lexeme(index))
+
+        if kind in _REALS:
+            return self.reals[index]
+
+        return self.integers[index]
+
+    def line(self, index: int) -> int:
+        return self.tokens.position(index)[0]
+
+    def checkKeyword(self, keyword: str) -> bool:
+        return self.kind() == _KEYWORD and self.names[self.integers[self.index]] == keyword
+
+    def accept(self, kind: int) -> bool:
+        if self.kind() == kind:
+            self.index += 1
+            return True
+
+        return False
+
+    def acceptKeyword(self, keyword: str) -> bool:
+        if self.checkKeyword(keyword):
+            self.index += 1
+            return True
+
+        return False
+
+    def expect(self, kind: int) -> int:
+        if self.kind() != kind:
+            raise self.error(f"expected {_T(kind).name}", self.current())
+
+        return self.next()
+
+    def expectKeyword(self, keyword: str) -> None:
+        if not self.acceptKeyword(keyword):
+            raise self.error(f"expected '{keyword}'", self.current())
+
+    def name(self) -> str:
+        return self.symbol(self.expect(_IDENTIFIER))
+
+    def error(self, message: str, index: Optional[int]) -> ParseError | _Recover:
+        """Error at token of `index` (None - at the end), the token is materialised only here"""
+        if index is None:
+            line, col = self.tokens.position(self.index - 1) if self.index else (1, 0)
+            got = "end of file"
+
+        else:
+            token = self.tokens[index]
+            line, col = token.line, token.col
+            got = token.lexeme or token.type.name
+
+        if self.diagnostics is not None:
+            self.diagnostics.report(line, col, "{}, got {}", message, got)
+            return _Recover()
+
+        return ParseError(f"{message}, got {got}", line=line, col=col)
+
+    def _pull(self, k: int) -> bool:
+        """Merge buffers of the stream until the `k`-th token ahead is in, False if the stream ends before it"""
+        while self.windows is not None:
+            window = next(self.windows, None)
+
+            if window is None:
+                self.windows = None
+                break
+
+            self._merge(window)
+
+            if self.index + k < self.count:
+                return True
+
+        return False
+
+    def _merge(self, window: TokenBuffer) -> None:
+        old = self.tokens
+        keep = max(min((self.index - 1, *self.pins)), 0)
+        base = old.starts[keep] if keep < len(old) else len(old.source)
+        shift = len(old.source) - base
+
+        tokens = TokenBuffer(old.source[base:] + window.source, symbols=old.symbols, origin=old.locate(base))
+        tokens.kinds.extend(old.kinds[keep:])
+        tokens.kinds.extend(window.kinds)
+        tokens.starts.extend(start - base for start in old.starts[keep:])
+        tokens.starts.extend(start + shift for start in window.starts)
+        tokens.ends.extend(end - base for end in old.ends[keep:])
+        tokens.ends.extend(end + shift for end in window.ends)
+        tokens.integers.extend(old.integers[keep:])
+        tokens.integers.extend(window.integers)
+        tokens.reals.extend(old.reals[keep:])
+        tokens.reals.extend(window.reals)
+
+        start = self.start
+
+        if start is not None and start < keep:
+            self.depth = self._depth(self.depth, start, keep)
+
+        if start is not None:
+            self.start = max(start - keep, 0)
+
+        self._load(tokens)
+        self.index -= keep
+        self.count = len(tokens)
+        self.pins[:] = (pin - keep for pin in self.pins)
+
+    def _depth(self, depth: int, begin: int, end: int) -> int:
+        """Bracket depth after tokens from `begin` to `end` (closing brackets of a broken declaration stop at 0)"""
+        for kind in self.kinds[begin:end]:
+            if kind in _OPENING:
+                depth += 1
+
+            elif kind in _CLOSING:
+                depth = max(depth - 1, 0)
+
+        return depth
+
+    def recover(self) -> None:
+        """
+        Skip the rest of a broken declaration: up to a declaration keyword outside of brackets opened after its start
+
+        The cursor only goes forward, brackets of the consumed part are counted from `start`,
+        so no tokens are kept for a rewind however long the declaration is.
+        """
+        if self.index == self.start:
+            self.next()
+
+        depth = self._depth(self.depth, self.start, self.index)
+        joined = self.kinds[self.index - 1] == _KEYWORD and self.symbol(self.index - 1) in _MODIFIER_KEYWORDS
+        self.start = None
+        kind = self.kind()
+
+        while kind != _END:
+            if kind == _KEYWORD and depth == 0 and not joined and self.symbol(self.index) in _DECLARATION_KEYWORDS:
+                return
+
+            index = self.next()
+
+            if kind == _KEYWORD:
+                joined = self.symbol(index) in _MODIFIER_KEYWORDS
+
+            else:
+                joined = False
+
+                if kind in _OPENING:
+                    depth += 1
+
+                elif kind in _CLOSING:
+                    depth = max(depth - 1, 0)
+
+            kind = self.kind()
+
+    # Declarations
+
+    def declaration(self) -> N:
+        if self.checkKeyword("import"):
+            line = self.line(self.next())
+            declaration = self.build.importDeclaration(self.name(), line)
+
+        else:
+            public = self.acceptKeyword("pub")
+
+            if self.checkKeyword("const"):
+                declaration = self.constant(public)
+
+            elif self.checkKeyword("var"):
+                declaration = self.variable(public)
+
+            elif self.checkKeyword("fn") or self.checkKeyword("macro"):
+                declaration = self.function(public)
+
+            else:
+                raise self.error("expected declaration", self.current())
+
+        self.accept(_SEMICOLON)
+        return declaration
+
+    def constant(self, public: bool) -> N:
+        line = self.line(self.next())
+        name = self.name()
+        value_type = self.expression() if self.accept(_COLON) else None
+        self.expect(_ASSIGN)
+        return self.build.constant(name, value_type, self.expression(), public, line)
+
+    def variable(self, public: bool) -> N:
+        line = self.line(self.next())
+        self.accept(_COLON)
+        name = self.name()
+        self.expect(_COLON)
+        value_type = self.expression()
+        value = self.expression() if self.accept(_ASSIGN) else None
+        return self.build.variable(name, value_type, value, public, line)
+
+    def function(self, public: bool) -> N:
+        line = self.line(self.index)
+        macro = self.acceptKeyword("macro")
+        self.expectKeyword("fn")
+        macro = self.acceptKeyword("macro") or macro
+        name = self.name()
+
+        self.expect(_OPEN_ROUND)
+        parameters = list[N]()
+
+        while not self.accept(_CLOSE_ROUND):
+            parameters.append(self.field(False))
+
+            if not self.accept(_COMMA):
+                self.expect(_CLOSE_ROUND)
+                break
+
+        result = None
+        body = None
+        native = None
+
+        if self.kind() != _ASSIGN and not (self.kind() == _OPEN_FIGURE and not macro):
+            result = self.expression()
+
+        if self.accept(_ASSIGN):
+            native = self.expression()
+
+        elif macro:
+            body = self.expression()
+
+        elif self.lazy and self.kind() == _OPEN_FIGURE:
+            body = self.skim()
+
+        else:
+            body = self.block()
+
+        return self.build.function(name, parameters, result, body, native, public, macro, line)
+
+    def field(self, public: bool) -> N:
+        name = self.name()
+        self.expect(_COLON)
+        return self.build.field(name, self.expression(), public)
+
+    def block(self) -> N:
+        self.expect(_OPEN_FIGURE)
+        statements = list[N]()
+
+        while not self.accept(_CLOSE_FIGURE):
+            statements.append(self.statement())
+            self.accept(_SEMICOLON)
+
+        return self.build.block(statements)
+
+    def skim(self) -> N:
+        """Skip block by brace depth (no nodes are built)"""
+        pins = self.pins
+        pins.append(self.index)
+        depth = 0
+
+        while True:
+            index = self.next()
+            kind = self.kinds[index]
+
+            if kind == _OPEN_FIGURE:
+                depth += 1
+
+            elif kind == _CLOSE_FIGURE:
+                depth -= 1
+
+                if depth == 0:
+                    break
+
+        start = pins.pop()
+
+        if not self.streamed:
+            return self.build.lazyBlock(self.tokens, start, self.index)
+
+        return self.build.lazyBlock(self.tokens.section(start, self.index), 0, self.index - start)
+
+    def statement(self) -> N:
+        if self.checkKeyword("const"):
+            return self.constant(False)
+
+        if self.checkKeyword("var"):
+            return self.variable(False)
+
+        return self.expression()
+
+    def structItem(self) -> N:
+        public = self.acceptKeyword("pub")
+
+        if self.checkKeyword("const"):
+            return self.constant(public)
+
+        if self.checkKeyword("var"):
+            return self.variable(public)
+
+        if self.checkKeyword("fn") or self.checkKeyword("macro"):
+            return self.function(public)
+
+        return self.field(public)
+
+    # Expressions
+
+    def expression(self) -> N:
+        """
+        Precedence climbing without recursion
+
+        Pending prefix and infix operators wait on a stack with their binding power,
+        open brackets are stack entries too: groups `(...)`, initializers `{...}`, call arguments,
+        indices and array lengths. An operand inside a bracket is reduced down to its entry,
+        so an expression of any length or nesting costs no Python stack.
+        """
+        pending = list[tuple[int, int, object, Optional[N]]]()
+        """(binding power, kind, payload, left operand), payload: operator, array length, call or initializer state, indexed target"""
+        opened = 0
+        """Bracket entries in `pending`"""
+        build = self.build
+
+        while True:
+            index = self.next()
+            kind = self.kinds[index]
+            prefix = _PREFIX.get(kind)
+
+            if prefix is not None:
+                pending.append((_PREFIX_POWER, _UNARY, prefix, None))
+                continue
+
+            if kind == _OPEN_SQUARE:
+                if self.accept(_CLOSE_SQUARE):
+                    pending.append((_PREFIX_POWER, _ARRAY, None, None))
+                else:
+                    pending.append((_GROUP_POWER, _LENGTH, None, None))
+                    opened += 1
+
+                continue
+
+            if kind == _OPEN_ROUND:
+                pending.append((_GROUP_POWER, _GROUP, None, None))
+                opened += 1
+                continue
+
+            if kind == _OPEN_FIGURE and self.kind() != _CLOSE_FIGURE:
+                pending.append((_GROUP_POWER, _INITIALIZER, [list[N](), self.itemName()], None))
+                opened += 1
+                continue
+
+            operand = self.primary(self.index - 1)
+            operand_next = False
+
+            while True:
+                kind = self.kind()
+
+                if kind == _OPEN_ROUND:
+                    self.index += 1
+
+                    if self.accept(_CLOSE_ROUND):
+                        operand = build.call(operand, list[N]())
+                        continue
+
+                    pending.append((_GROUP_POWER, _CALL, [operand, list[N]()], None))
+                    opened += 1
+                    operand_next = True
+                    break
+
+                if kind == _OPEN_SQUARE:
+                    self.index += 1
+                    pending.append((_GROUP_POWER, _INDEX, operand, None))
+                    opened += 1
+                    operand_next = True
+                    break
+
+                if kind == _DOT:
+                    self.index += 1
+                    operand = build.member(operand, self.name())
+                    continue
+
+                if not opened or kind not in _CLOSING and kind != _COMMA:
+                    break
+
+                operand = self._reduce(pending, operand, _GROUP_POWER + 1)
+                _, bracket, payload, _ = pending[-1]
+
+                if bracket == _GROUP and kind == _CLOSE_ROUND:
+                    self.index += 1
+
+                elif bracket == _CALL and (kind == _COMMA or kind == _CLOSE_ROUND):
+                    self.index += 1
+                    payload[1].append(operand)
+
+                    if kind == _COMMA and not self.accept(_CLOSE_ROUND):
+                        operand_next = True
+                        break
+
+                    operand = build.call(payload[0], payload[1])
+
+                elif bracket == _INDEX and kind == _CLOSE_SQUARE:
+                    self.index += 1
+                    operand = build.index(payload, operand)
+
+                elif bracket == _LENGTH and kind == _CLOSE_SQUARE:
+                    self.index += 1
+                    pending[-1] = (_PREFIX_POWER, _ARRAY, operand, None)
+                    opened -= 1
+                    operand_next = True
+                    break
+
+                elif bracket == _INITIALIZER and (kind == _COMMA or kind == _CLOSE_FIGURE):
+                    self.index += 1
+                    items = payload[0]
+                    items.append(build.initializerItem(payload[1], operand))
+
+                    if kind == _COMMA and not self.accept(_CLOSE_FIGURE):
+                        payload[1] = self.itemName()
+                        operand_next = True
+                        break
+
+                    operand = build.initializer(items)
+
+                else:
+                    break
+
+                pending.pop()
+                opened -= 1
+
+            if operand_next:
+                continue
+
+            infix = _INFIX.get(kind)
+
+            if infix is None and kind == _KEYWORD and self.symbol(self.index) == Operator.cast:
+                infix = Operator.cast
+
+            if infix is None:
+                if opened:
+                    self._reduce(pending, operand, _GROUP_POWER + 1)
+                    raise self.error(f"expected {_CLOSING_OF[pending[-1][1]].name}", self.current())
+
+                return self._reduce(pending, operand, 0)
+
+            self.index += 1
+            power = _BINARY_POWER[infix]
+            operand = self._reduce(pending, operand, power)
+            pending.append((power, _BINARY, infix, operand))
+
+    def _reduce(self, pending: list[tuple[int, int, object, Optional[N]]], operand: N, power: int) -> N:
+        """Apply pending operators binding at least as tight as `power` (left associative), open brackets stop it"""
+        build = self.build
+
+        while pending and pending[-1][0] >= power:
+            _, kind, payload, left = pending.pop()
+
+            if kind == _BINARY:
+                if payload is Operator.cast:
+                    operand = build.cast(left, operand)
+                else:
+                    operand = build.binaryOp(payload, left, operand)
+
+            elif kind == _UNARY:
+                operand = build.unaryOp(payload, operand)
+
+            else:
+                operand = build.arrayType(payload, operand)
+
+        return operand
+
+    def primary(self, index: int) -> N:
+        """Operand of consumed token of `index` (the token is put back if it starts no operand)"""
+        kind = self.kinds[index]
+
+        if kind == _IDENTIFIER:
+            return self.build.identifier(self.symbol(index))
+
+        if kind in _LITERALS:
+            return self.build.literal(_T(kind), self.literal(index))
+
+        if kind == _OPEN_FIGURE:
+            self.expect(_CLOSE_FIGURE)
+            return self.build.initializer(())
+
+        if kind == _ELLIPSIS:
+            return self.build.native()
+
+        if kind == _KEYWORD and self.symbol(index) == "struct":
+            return self.struct()
+
+        self.index = index
+        raise self.error("expected expression", index)
+
+    def itemName(self) -> Optional[str]:
+        """`name:` of initializer item"""
+        if self.kind() == _IDENTIFIER and self.kind(1) == _COLON:
+            name = self.symbol(self.index)
+            self.index += 2
+            return name
+
+        return None
+
+    def struct(self) -> N:
+        self.expect(_OPEN_FIGURE)
+        items = list[N]()
+
+        while not self.accept(_CLOSE_FIGURE):
+            items.append(self.structItem())
+
+            if not self.accept(_COMMA):
+                self.accept(_SEMICOLON)
+
+        return self.build.struct(items)
@@ -0,0 +1,51 @@
+from array import array
+from bisect import bisect_right
+from typing import Final
+from typing import final
+
+_WINDOW: Final = 0x100000
+
+
+@final
+class LineIndex:
+    """
+    Sorted line start offsets of a source
+
+    Line and column are resolved on demand by binary search (line from 1, column from 0)
+    """
+
+    def __init__(self) -> None:
+        self.starts: Final = array("I", (0,))
+
+    @classmethod
+    def of(cls, source: str | bytes | memoryview) -> "LineIndex":
+        """Build index of whole source (text or raw UTF-8)"""
+        index = cls()
+
+        if isinstance(source, (str, bytes)):
+            index.extend(source, 0)
+
+        else:
+            for offset in range(0, len(source), _WINDOW):
+                index.extend(bytes(source[offset:offset + _WINDOW]), offset)
+
+        return index
+
+    def extend(self, chunk: str | bytes, offset: int) -> None:
+        """Record line starts of chunk placed at offset in source"""
+        starts = self.starts
+        find = chunk.find
+        newline = "\n" if isinstance(chunk, str) else b"\n"
+        i = find(newline)
+
+        while i != -1:
+            starts.append(offset + i + 1)
+            i = find(newline, i + 1)
+
+    def resolve(self, offset: int) -> tuple[int, int]:
+        """Line and column of offset"""
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1]
+
+    def __len__(self) -> int:
+        return len(self.starts)
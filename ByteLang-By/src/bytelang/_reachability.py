@@ -0,0 +1,159 @@
+from dataclasses import dataclass
+from dataclasses import field
+from dataclasses import fields
+from dataclasses import replace
+from typing import Iterable
+from typing import Iterator
+from typing import Mapping
+from typing import Optional
+from typing import final
+
+from bytelang._ast import Call
+from bytelang._ast import Constant
+from bytelang._ast import Declaration
+from bytelang._ast import Function
+from bytelang._ast import Identifier
+from bytelang._ast import Import
+from bytelang._ast import LazyBlock
+from bytelang._ast import Member
+from bytelang._ast import Module
+from bytelang._ast import Node
+from bytelang._ast import Struct
+from bytelang._diagnostic import Diagnostics
+from bytelang._parser import ParseError
+from bytelang._parser import Parser
+
+Key = tuple[str, str]
+"""Module name and declaration path: `name` or `Struct.method`"""
+
+
+def _structOf(declaration: Node) -> Optional[Struct]:
+    """Struct made by a constant or a macro function"""
+    if isinstance(declaration, Constant) and isinstance(declaration.value, Struct):
+        return declaration.value
+
+    if isinstance(declaration, Function) and isinstance(declaration.body, Struct):
+        return declaration.body
+
+    return None
+
+
+def _index(module: Module) -> dict[str, Node]:
+    """Declarations of module by path, struct items as `Struct.item`"""
+    index = dict[str, Node]()
+
+    for declaration in module.declarations:
+        if isinstance(declaration, Import):
+            continue
+
+        index[declaration.name] = declaration
+        struct = _structOf(declaration)
+
+        if struct is not None:
+            for item in struct.items:
+                if isinstance(item, Function):
+                    index[f"{declaration.name}.{item.name}"] = item
+
+    return index
+
+
+def references(root: Node) -> Iterator[tuple[str, str | None]]:
+    """
+    Names used by node: (name, member) for `name.member` and `name(...).member`, (name, None) otherwise
+
+    Nested functions (struct methods) are not entered, they are reached by member access.
+    """
+    stack: list[object] = [getattr(root, item.name) for item in fields(root)]
+
+    while stack:
+        node = stack.pop()
+
+        if isinstance(node, tuple):
+            stack.extend(node)
+
+        elif isinstance(node, Identifier):
+            yield node.name, None
+
+        elif isinstance(node, Member):
+            target = node.target.callee if isinstance(node.target, Call) else node.target
+
+            if isinstance(target, Identifier):
+                yield target.name, node.name
+
+            stack.append(node.target)
+
+        elif isinstance(node, Node) and not isinstance(node, (Function, LazyBlock)):
+            stack.extend(getattr(node, item.name) for item in fields(node))
+
+
+@final
+@dataclass(frozen=True, kw_only=True)
+class Reachability:
+    """
+    Declarations reachable from an entry function
+
+    Bodies skimmed by the parser (LazyBlock) are parsed when their function is reached,
+    so the cost follows what a program uses, not what it imports.
+    References are resolved by name only: unknown names (executor natives, locals) are skipped.
+    """
+
+    parser: Parser = field(default_factory=lambda: Parser(lazy_bodies=True))
+
+    def run(self, modules: Mapping[str, Module], module: str, entry: str = "main") -> dict[Key, Declaration]:
+        """Reachable declarations, functions with parsed bodies, in order of discovery"""
+        if entry not in _index(modules[module]):
+            raise KeyError(f"{module}: no entry point '{entry}'")
+
+        return self.reach(modules, ((module, entry),))
+
+    def reach(self, modules: Mapping[str, Module], roots: Iterable[Key], diagnostics: Optional[Diagnostics] = None) -> dict[Key, Declaration]:
+        """
+        Declarations reachable from any of roots (unknown roots are skipped), in order of discovery
+        :param diagnostics: sink of body syntax errors (None - `ParseError` is raised),
+        a function whose body has errors is reached with its LazyBlock and nothing is reached through it
+        """
+        indices = {name: _index(source) for name, source in modules.items()}
+        imports = {
+            name: frozenset(declaration.name for declaration in source.declarations if isinstance(declaration, Import))
+            for name, source in modules.items()
+        }
+        reached = dict[Key, Declaration]()
+        pending = [key for key in reversed(tuple(roots)) if key[1] in indices[key[0]]]
+
+        while pending:
+            key = pending.pop()
+
+            if key in reached:
+                continue
+
+            current, path = key
+            declaration = indices[current][path]
+
+            if isinstance(declaration, Function) and isinstance(declaration.body, LazyBlock):
+                try:
+                    declaration = replace(declaration, body=self.parser.body(declaration.body))
+
+                except ParseError as error:
+                    if diagnostics is None:
+                        raise
+
+                    diagnostics.report(error.line, error.col, "{}", error.message)
+                    reached[key] = declaration
+                    continue
+
+            reached[key] = declaration
+            index = indices[current]
+
+            for name, member in references(declaration):
+                if member is not None:
+                    if name in imports[current] and name in indices and member in indices[name]:
+                        pending.append((name, member))
+                        continue
+
+                    if f"{name}.{member}" in index:
+                        pending.append((current, f"{name}.{member}"))
+
+                if name in index:
+                    pending.append((current, name))
+
+        return reached
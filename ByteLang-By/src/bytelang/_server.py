@@ -0,0 +1,167 @@
+import json
+from os import stat
+from os import unlink
+from pathlib import Path
+from socket import AF_UNIX
+from socket import SOCK_STREAM
+from socket import socket
+from typing import Final
+from typing import Iterable
+from typing import Optional
+from typing import TextIO
+from typing import final
+
+from bytelang._bundle import Bundle
+from bytelang._compiler import CompiledModule
+from bytelang._compiler import Compiler
+
+_SOURCE_SUFFIX: Final = ".bl"
+
+
+@final
+class Server:
+    """
+    Compile server: the compiler, sources and results stay warm between requests
+
+    Protocol: one JSON object per line each way.
+    Request `{"id": any, "method": name, "params": {...}}`, response `{"id": ..., "result": ...}` or `{"id": ..., "error": message}`.
+    Methods:
+    `compile` - paths (files and directories of `.bl` files, a file may be a bundle), output (file of linked data), jobs;
+    `ping`; `shutdown` - answer and stop serving.
+    A source file is read again only if its mtime or size changed, the compiler reuses results of unchanged modules.
+    """
+
+    def __init__(self, compiler: Optional[Compiler] = None) -> None:
+        self.compiler: Final = compiler or Compiler()
+        self._files = dict[Path, tuple[tuple[int, int], list[tuple[str, bytes, int]]]]()
+        """File: (mtime, size), its modules (name, source, first line)"""
+        self._results = dict[str, CompiledModule]()
+
+    def handle(self, request: dict) -> dict:
+        """Response to a request, any failure of the request is an error response (the server keeps serving)"""
+        identifier = request.get("id")
+        method = request.get("method")
+        params = request.get("params") or {}
+
+        try:
+            if method == "compile":
+                result = self.compile(params["paths"], output=params.get("output"), jobs=params.get("jobs", 1))
+            elif method in ("ping", "shutdown"):
+                result = method
+            else:
+                raise ValueError(f"unknown method: {method}")
+
+        except Exception as error:
+            return {"id": identifier, "error": f"{type(error).__name__}: {error}"}
+
+        return {"id": identifier, "result": result}
+
+    def compile(self, paths: Iterable[str], *, output: Optional[str] = None, jobs: Optional[int] = 1) -> dict:
+        """Compile modules of paths, link them and report diagnostics as `path:line:col: message`"""
+        sources = dict[str, bytes]()
+        origins = dict[str, tuple[Path, int]]()
+
+        for file in self._expand(paths):
+            for name, source, line in self._read(file):
+                if name in sources:
+                    raise ValueError(f"module '{name}' of {file} is already defined in {origins[name][0]}")
+
+                sources[name] = source
+                origins[name] = file, line
+
+        results = self.compiler.run(sources, jobs=jobs)
+        program = Compiler.link(results)
+
+        if output is not None:
+            Path(output).write_bytes(program.data)
+
+        recompiled = [name for name, result in results.items() if self._results.get(name) is not result]
+        self._results = results
+
+        return {
+            "modules": list(results),
+            "recompiled": recompiled,
+            "diagnostics": [
+                f"{origins[name][0]}:{diagnostic.line + origins[name][1] - 1}:{diagnostic.col}: {diagnostic.message}"
+                for name, result in results.items()
+                for diagnostic in result.diagnostics
+            ],
+            "size": len(program.data),
+            "symbols": program.symbols,
+        }
+
+    def serveStream(self, lines: Iterable[str], output: TextIO) -> bool:
+        """Answer requests of lines until they end (True) or a shutdown request (False)"""
+        for line in lines:
+            if not line.strip():
+                continue
+
+            try:
+                request = json.loads(line)
+
+                if not isinstance(request, dict):
+                    raise ValueError("request is not an object")
+
+            except ValueError as error:
+                response = {"id": None, "error": f"ValueError: {error}"}
+                request = {}
+
+            else:
+                response = self.handle(request)
+
+            output.write(json.dumps(response) + "\n")
+            output.flush()
+
+            if request.get("method") == "shutdown":
+                return False
+
+        return True
+
+    def serveSocket(self, path: str) -> None:
+        """Answer connections to a Unix socket one by one until a shutdown request"""
+        with socket(AF_UNIX, SOCK_STREAM) as listener:
+            listener.bind(path)
+            listener.listen()
+
+            try:
+                while True:
+                    connection, _ = listener.accept()
+
+                    with connection, connection.makefile("rw", encoding="utf-8") as stream:
+                        if not self.serveStream(stream, stream):
+                            return
+
+            finally:
+                unlink(path)
+
+    @staticmethod
+    def _expand(paths: Iterable[str]) -> list[Path]:
+        files = list[Path]()
+
+        for path in map(Path, paths):
+            files.extend(sorted(path.glob(f"*{_SOURCE_SUFFIX}")) if path.is_dir() else (path,))
+
+        return files
+
+    def _read(self, file: Path) -> list[tuple[str, bytes, int]]:
+        """Modules of source file, read again only if it changed"""
+        status = stat(file)
+        version = status.st_mtime_ns, status.st_size
+        cached = self._files.get(file)
+
+        if cached is None or cached[0] != version:
+            bundle = Bundle.split(file.read_bytes(), file.name.removesuffix(_SOURCE_SUFFIX))
+            cached = self._files[file] = version, [(module.name, module.source, module.line) for module in bundle.modules]
+
+        return cached[1]
+
+
+def callServer(path: str, method: str, **params: object) -> dict:
+    """Send one request to a server on a Unix socket, return its response"""
+    with socket(AF_UNIX, SOCK_STREAM) as connection:
+        connection.connect(path)
+
+        with connection.makefile("rw", encoding="utf-8") as stream:
+            stream.write(json.dumps({"id": 0, "method": method, "params": params}) + "\n")
+            stream.flush()
+            return json.loads(stream.readline())
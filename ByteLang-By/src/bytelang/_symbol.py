@@ -0,0 +1,57 @@
+from typing import Final
+from typing import Iterable
+from typing import Optional
+from typing import final
+
+
+@final
+class SymbolTable:
+    """
+    Interned identifiers of a compilation: name <-> dense integer id
+
+    Keywords are interned first, so a symbol is a keyword if `id < keyword_count`
+    """
+
+    def __init__(self, keywords: Iterable[str] = ()) -> None:
+        self.names: Final = list[str]()
+        self.ids: Final = dict[str, int]()
+        self.binary_ids: Final = dict[bytes, int]()
+        """Same ids keyed by UTF-8 names (binary sources)"""
+
+        for keyword in sorted(keywords):
+            self.intern(keyword)
+
+        self.keyword_count: Final = len(self.names)
+
+    def intern(self, name: str | bytes) -> int:
+        """Id of name, added if new"""
+        if isinstance(name, bytes):
+            name = str(name, "utf-8")
+
+        symbol = self.ids.get(name)
+
+        if symbol is None:
+            symbol = len(self.names)
+            self.names.append(name)
+            self.ids[name] = symbol
+            self.binary_ids[name.encode()] = symbol
+
+        return symbol
+
+    def get(self, name: str) -> Optional[int]:
+        """Id of name if interned"""
+        return self.ids.get(name)
+
+    def name(self, symbol: int) -> str:
+        """Name of id"""
+        return self.names[symbol]
+
+    def isKeyword(self, symbol: int) -> bool:
+        """Symbol is a keyword"""
+        return symbol < self.keyword_count
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.ids
@@ -0,0 +1,184 @@
+from bisect import bisect_left
+from bisect import bisect_right
+from dataclasses import replace
+from itertools import accumulate
+from itertools import pairwise
+from operator import itemgetter
+from typing import Final
+from typing import Optional
+from typing import final
+
+from bytelang._ast import Declaration
+from bytelang._ast import Module
+from bytelang._buffer import TokenBuffer
+from bytelang._diagnostic import Diagnostic
+from bytelang._diagnostic import Diagnostics
+from bytelang._lexer import Binary
+from bytelang._parser import Parser
+
+
+@final
+class SyntaxTree:
+    """
+    Parse of a module which follows source edits
+
+    Declarations are kept position independent (green): each is parsed from its own tokens,
+    so lines (and columns of its first line) inside it start at 1 (at 0), and only its width in tokens is stored.
+    Absolute positions (red) come from the current token buffer through the widths.
+    An edit relexes the changed tokens and reparses only the declarations they touch,
+    every other declaration object is reused as is.
+    A broken declaration is left out (its tokens count in the width of the one before it)
+    and its errors are kept by the index of its first token, see `diagnostics`.
+    Tokens before the first declaration (all broken) are its lead.
+    """
+
+    def __init__(self, source: str | Binary, parser: Optional[Parser] = None) -> None:
+        self.parser: Final = parser or Parser()
+        self.tokens = self.parser.lexer.scan(source)
+        self._lead, self.declarations, self.widths, self._errors = self._parse(self.tokens, 0, len(self.tokens))
+        self._starts = self._offsets()
+
+    @property
+    def module(self) -> Module:
+        """Module of green declarations"""
+        return Module(declarations=tuple(self.declarations))
+
+    @property
+    def diagnostics(self) -> list[Diagnostic]:
+        """Syntax errors of the source in source order"""
+        diagnostics = list[Diagnostic]()
+
+        for index, errors in self._errors:
+            line, col = self.tokens.position(index)
+            diagnostics.extend(replace(error, line=error.line + line - 1, col=error.col + col if error.line == 1 else error.col) for error in errors)
+
+        return diagnostics
+
+    def start(self, index: int) -> int:
+        """Index of the first token of declaration"""
+        return self._starts[index]
+
+    def line(self, index: int) -> int:
+        """Line of declaration in the source (add `line - 1` to lines inside it)"""
+        return self.tokens.position(self._starts[index])[0]
+
+    def edit(self, offset: int, removed: int, inserted: str | bytes) -> range:
+        """
+        Replace `removed` source units at `offset` with `inserted`
+
+        Syntax errors do not stop an edit: broken declarations are left out and their errors go to `diagnostics`.
+        :return: indices of the reparsed declarations
+        """
+        old = self.tokens
+        tokens, relexed = self.parser.lexer.relex(old, offset, removed, inserted)
+        delta = len(tokens) - len(old)
+
+        touched = max(bisect_right(old.starts, offset) - 1, 0)
+        low = min(relexed.start, touched)
+        high = max(relexed.stop - delta, touched + 1)
+
+        first = max(bisect_right(self._starts, low) - 1, 0)
+
+        if first and self._broken(self._starts[first]):
+            # error recovery before the edited start may go on over it once it is no declaration start
+            first = bisect_left(self._starts, self._starts[first]) - 1
+
+        stop = max(bisect_left(self._starts, high), first + 1)
+        stop = min(stop, len(self.declarations))
+
+        begin = self._starts[first] if first else 0
+        end = self._end(stop, delta, len(tokens))
+        following = self._following(tokens, begin, end)
+
+        if following != end:
+            stop = bisect_left(self._starts, following - delta)
+            end = self._end(stop, delta, len(tokens))
+
+        lead, declarations, widths, errors = self._parse(tokens, begin, end)
+
+        if first:
+            self.widths[first - 1] += lead
+        else:
+            self._lead = lead
+
+        self.tokens = tokens
+        self.declarations[first:stop] = declarations
+        self.widths[first:stop] = widths
+        self._errors = [
+            *(error for error in self._errors if error[0] < begin),
+            *errors,
+            *((index + delta, error) for index, error in self._errors if index >= end - delta),
+        ]
+        self._starts = self._offsets()
+        return range(first, first + len(declarations))
+
+    def _broken(self, begin: int) -> bool:
+        """Whether the tokens parsed last before declaration start `begin` had syntax errors"""
+        previous = self._starts[bisect_left(self._starts, begin) - 1]
+        position = bisect_left(self._errors, begin, key=itemgetter(0))
+        return position > 0 and self._errors[position - 1][0] >= previous
+
+    def _offsets(self) -> list[int]:
+        return list(accumulate(self.widths, initial=self._lead))[:-1]
+
+    def _end(self, stop: int, delta: int, size: int) -> int:
+        """Index of the first token after declarations up to `stop` in the edited buffer"""
+        return self._starts[stop] + delta if stop < len(self.declarations) else size
+
+    def _following(self, tokens: TokenBuffer, begin: int, end: int) -> int:
+        """
+        First declaration start at or after `end` scanning from `begin` (end of tokens if none)
+
+        It is `end` unless the edit left brackets open: then the declarations after it are a part of the edited one.
+        The scan goes on in doubling steps, so it reads about as far as the next declaration start.
+        """
+        step = end - begin + 1
+
+        while end < len(tokens):
+            stop = min(end + step, len(tokens))
+            boundaries = self.parser.boundaries(tokens, begin, stop)
+            position = bisect_left(boundaries, end)
+
+            if position < len(boundaries):
+                return boundaries[position]
+
+            if stop == len(tokens):
+                break
+
+            step *= 2
+
+        return len(tokens)
+
+    def _parse(self, tokens: TokenBuffer, begin: int, end: int) -> tuple[int, list[Declaration], list[int], list[tuple[int, tuple[Diagnostic, ...]]]]:
+        """
+        Parse declarations of token range one by one, each from its own position independent buffer
+        :return: tokens before the first declaration, declarations, their widths, errors by first token of their part
+        """
+        boundaries = self.parser.boundaries(tokens, begin, end)
+
+        if begin < end and (not boundaries or boundaries[0] != begin):
+            boundaries.insert(0, begin)
+
+        lead = 0
+        declarations = list[Declaration]()
+        widths = list[int]()
+        errors = list[tuple[int, tuple[Diagnostic, ...]]]()
+
+        for first, stop in pairwise((*boundaries, end)):
+            diagnostics = Diagnostics()
+            parsed = tuple(self.parser.declarations(tokens.section(first, stop, origin=(1, 0)), diagnostics=diagnostics))
+
+            if len(diagnostics):
+                errors.append((first, tuple(diagnostics)))
+
+            if parsed:
+                declarations.extend(parsed)
+                widths.extend((stop - first,) + (0,) * (len(parsed) - 1))
+
+            elif widths:
+                widths[-1] += stop - first
+
+            else:
+                lead += stop - first
+
+        return lead, declarations, widths, errors
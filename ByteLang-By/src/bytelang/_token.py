@@ -26,7 +26,7 @@ class Token:
         """ 0x67 """
 
         literal_number_integer_bin = auto()
-        """ 0x1010 """
+        """ 0b1010 """
 
         literal_number_real = auto()
         """ -123.456 """
@@ -56,8 +56,45 @@ class Token:
 
         # delimiters
 
+        delimiter_comma = auto()
+        """ , """
 
+        delimiter_colon = auto()
+        """ : """
 
+        delimiter_semicolon = auto()
+        """ ; """
+
+        delimiter_assign = auto()
+        """ = """
+
+        delimiter_ellipsis = auto()
+        """ ... """
+
+        # operators
+
+        operator_dot = auto()
+        """ . """
+
+        operator_plus = auto()
+        """ + """
+
+        operator_minus = auto()
+        """ - """
+
+        operator_star = auto()
+        """ * """
+
+        operator_slash = auto()
+        """ / """
+
+        # words
+
+        identifier = auto()
+        """ name """
+
+        keyword = auto()
+        """ const """
     type: Type
 
     line: int
@@ -0,0 +1,126 @@
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from bytelang import Bundle
+from bytelang import Diagnostics
+from bytelang import Lexer
+from bytelang import NodeArena
+from bytelang import NodeKind
+from bytelang import Operator
+from bytelang import ParseCache
+from bytelang import Parser
+from bytelang import TreeBuilder
+
+_EXAMPLES = Path(__file__).parents[2]
+
+
+def _generated(count: int) -> str:
+    return "".join(
+        f"pub const table_{i}: [4]u8 = {{{i}, 0x{i:X}, 'a', {i}.5}}\n"
+        f"fn macro Point{i}(T: type) type struct {{ x: *T, y: [{i}]T, pub fn macro zero() Self {{x: 0, y: -{i}}} }}\n"
+        f"fn f{i}(a: i16, b: i16) i16 {{ var: r: i16 = a * {i} + b / 2 as i16; call(Point{i}(i16).zero, r) }}\n"
+        for i in range(count)
+    )
+
+
+def test_replay_matches_tree():
+    parser = Parser()
+    sources = [
+        (_EXAMPLES / "composite-types.bl").read_text("utf-8"),
+        *(module.source for module in Bundle.split((_EXAMPLES / "user-fn-example.bl").read_text("utf-8")).modules),
+        _generated(20),
+    ]
+
+    for source in sources:
+        arena = NodeArena()
+        root = parser.parse(source, arena)
+
+        assert root == arena.root
+        assert arena.replay(TreeBuilder()) == parser.parse(source)
+
+
+def test_navigation():
+    arena = NodeArena()
+    Parser().parse("pub const x: i16 = -a + 2\nfn f() = ...\n", arena)
+    constant, function = arena.children(arena.root)
+
+    assert arena.kind(constant) is NodeKind.constant
+    assert (arena.value(constant), arena.line(constant), arena.flags[constant] & NodeArena.PUBLIC) == ("x", 1, NodeArena.PUBLIC)
+
+    value_type, value = arena.children(constant)
+    assert (arena.kind(value_type), arena.value(value_type)) == (NodeKind.identifier, "i16")
+    assert (arena.kind(value), arena.operator(value)) == (NodeKind.binary_op, Operator.plus)
+
+    assert [arena.kind(node) for node in arena.walk(value)] == [
+        NodeKind.binary_op, NodeKind.unary_op, NodeKind.identifier, NodeKind.literal
+    ]
+    assert arena.literalValue(list(arena.walk(value))[-1]) == 2
+    assert [arena.kind(node) for node in arena.children(function)] == [NodeKind.native]
+    assert arena.flags[function] == NodeArena.ABSENT << 1 | NodeArena.ABSENT << 2
+    assert arena.line(value) == 0
+
+
+def test_smaller_than_tree():
+    parser = Parser()
+    tokens = Lexer().scan(_generated(100))
+
+    tracemalloc.start()
+    tree = parser.run(tokens)
+    tree_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    arena = NodeArena()
+    parser.run(tokens, arena)
+    arena_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert tree is not None
+    assert tree_size >= 5 * arena_size
+
+
+def test_dump_and_load():
+    source = _generated(20)
+    arena = NodeArena()
+    Parser().parse(source, arena)
+    loaded = NodeArena.load(arena.dump())
+
+    assert loaded.root == arena.root and loaded.nbytes == arena.nbytes
+    assert loaded.replay(TreeBuilder()) == Parser().parse(source)
+
+    merged = NodeArena()
+    root, = merged.extend(loaded, [loaded.root])
+    assert merged.replay(TreeBuilder(), root) == Parser().parse(source)
+
+    with pytest.raises(ValueError):
+        NodeArena.load(arena.dump()[:-1])
+
+
+def test_parse_cache(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    monkeypatch.setenv("BYTELANG_CACHE_DIR", str(tmp_path))
+    source = _generated(20)
+    cache = ParseCache(parser=Parser(lazy_bodies=True))
+    expected = Parser().parse(source)
+
+    assert cache.parse(source).replay(TreeBuilder()) == expected
+    entry, = tmp_path.iterdir()
+
+    monkeypatch.setattr(Parser, "parse", None)
+    assert cache.parse(source.encode()).replay(TreeBuilder()) == expected
+
+    entry.write_bytes(b"garbage")
+    monkeypatch.undo()
+    monkeypatch.setenv("BYTELANG_CACHE_DIR", str(tmp_path))
+    assert cache.parse(source).replay(TreeBuilder()) == expected
+    assert cache.key(source) != ParseCache(parser=Parser(lexer=Lexer(keywords=frozenset()))).key(source)
+
+    cache = ParseCache(parser=Parser(lexer=Lexer(error_budget=10)))
+    broken = "const a = 1\n@@\n"
+    diagnostics = Diagnostics()
+    cache.parse(broken)
+    cache.parse(broken, diagnostics=diagnostics)
+
+    assert [str(d) for d in diagnostics] == ["2:0: unexpected characters '@@'"]
+    assert len(list(tmp_path.iterdir())) == 1
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+
+from bytelang import Bundle
+from bytelang import Diagnostics
+from bytelang import Lexer
+from bytelang import Parser
+
+_EXAMPLE = Path(__file__).parents[2] / "user-fn-example.bl"
+
+
+def test_split_example():
+    source = _EXAMPLE.read_text(encoding="utf-8")
+    bundle = Bundle.split(source)
+
+    assert [m.name for m in bundle.modules] == ["math", "mem", "stack", "func", "sketch"]
+
+    for module in bundle.modules:
+        assert source[module.offset:module.offset + len(module.source)] == module.source
+        assert source.splitlines()[module.line - 2] == f"//!{module.name}.bl"
+
+
+def test_split_preamble_and_binary():
+    source = "const a = 1\n//!b.bl\nconst b = 2\n"
+    text = Bundle.split(source, "main")
+    binary = Bundle.split(source.encode(), "main")
+
+    assert [(m.name, m.source, m.line) for m in text.modules] == [("main", "const a = 1\n", 1), ("b", "const b = 2\n", 3)]
+    assert [(m.name, m.source.decode(), m.line) for m in binary.modules] == [(m.name, m.source, m.line) for m in text.modules]
+
+
+@pytest.mark.parametrize("jobs", (1, 2))
+def test_lex_maps_positions_to_bundle(jobs: int):
+    source = _EXAMPLE.read_text(encoding="utf-8")
+    whole = [(t.type, t.line, t.col, t.lexeme) for t in Lexer().run(source)]
+    buffers = Bundle.split(source).lex(Lexer(), jobs=jobs)
+
+    assert [(t.type, t.line, t.col, t.lexeme) for tokens in buffers.values() for t in tokens] == whole
+
+
+@pytest.mark.parametrize("jobs", (1, 2))
+def test_lex_shares_symbols(jobs: int):
+    buffers = Bundle.split("const a = b\n//!m.bl\nconst b = a\n", "main").lex(Lexer(), jobs=jobs)
+    main, other = buffers.values()
+
+    assert main.symbols is other.symbols
+    assert [main.integers[i] for i in (1, 3)] == [other.integers[i] for i in (3, 1)]
+
+
+@pytest.mark.parametrize("jobs", (1, 2))
+def test_parse_reports_lexer_errors(jobs: int):
+    bundle = Bundle.split("//!a.bl\nconst a = 1\nconst = 2 @@\n//!b.bl\n@@ const b = 1\n")
+    diagnostics = Diagnostics()
+    modules = bundle.parse(Parser(lexer=Lexer(error_budget=10)), jobs=jobs, diagnostics=diagnostics)
+
+    assert [str(d) for d in diagnostics] == [
+        "3:6: expected identifier, got delimiter_assign", "3:10: unexpected characters '@@'", "5:0: unexpected characters '@@'"
+    ]
+    assert [len(module.declarations) for module in modules.values()] == [1, 1]
+
+
+def test_duplicate_modules_are_rejected():
+    with pytest.raises(ValueError, match="'m' is defined twice"):
+        Bundle.split("//!m.bl\nconst a = 1\n//!m.bl\nconst a = 2\n")
+
+
+@pytest.mark.parametrize("jobs", (1, 2))
+def test_parse_maps_lines_to_bundle(jobs: int):
+    source = _EXAMPLE.read_text(encoding="utf-8")
+    bundle = Bundle.split(source)
+    modules = bundle.parse(Parser(), jobs=jobs)
+
+    assert list(modules) == [m.name for m in bundle.modules]
+
+    for module in bundle.modules:
+        alone = Parser().parse(module.source)
+        lines = [d.line for d in modules[module.name].declarations]
+        assert lines == [d.line + module.line - 1 for d in alone.declarations]
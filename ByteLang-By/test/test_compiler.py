@@ -0,0 +1,179 @@
+from pathlib import Path
+
+import pytest
+
+from bytelang import Compiler
+from bytelang import Lexer
+from bytelang import Parser
+
+
+def _program() -> dict[str, str]:
+    return {
+        "math": "pub const scale = 4\nconst hidden = 1\npub fn twice(x: i16) i16 = ...\n",
+        "geometry": "import math\npub const Point = struct { x: i16, y: i16 }\npub var origin: Point = {math.scale, -math.scale}\n",
+        "main": "import geometry\nimport math\nvar corners: [2]geometry.Point = {{1, 2}, {3, math.scale}}\nfn main() void {}\n",
+        "tools": "import math\nconst unused = 0\n",
+    }
+
+
+def test_compile_order_and_results():
+    compiler = Compiler()
+    sources = _program()
+
+    assert compiler.graph(sources) == {"math": (), "geometry": ("math",), "main": ("geometry", "math"), "tools": ("math",)}
+    results = compiler.run(sources)
+
+    assert list(results) == ["math", "geometry", "main", "tools"]
+    assert results["geometry"].data == b"\4\0\xfc\xff"
+    assert results["main"].data == b"\1\0\2\0\3\0\4\0"
+    assert results["math"].interface.constants == {"scale": 4}
+    assert results["math"].interface.functions == frozenset({"twice"})
+    assert all(not result.diagnostics for result in results.values())
+
+
+def test_only_changed_interfaces_recompile():
+    compiler = Compiler()
+    sources = _program()
+    first = compiler.run(sources)
+
+    sources["math"] += "const other = 2\n"
+    second = compiler.run(sources)
+    assert second["math"] is not first["math"]
+    assert second["math"].interface.digest == first["math"].interface.digest
+    assert all(second[name] is first[name] for name in ("geometry", "main", "tools"))
+
+    sources["math"] = sources["math"].replace("scale = 4", "scale = 5")
+    third = compiler.run(sources)
+    assert all(third[name] is not second[name] for name in ("math", "geometry", "main", "tools"))
+    assert third["main"].data == b"\1\0\2\0\3\0\5\0"
+
+    sources["geometry"] += "const local = 1\n"
+    fourth = compiler.run(sources)
+    assert [name for name in fourth if fourth[name] is not third[name]] == ["geometry"]
+
+
+def test_errors_are_collected():
+    results = Compiler().run({
+        "a": "import b\nimport missing\nconst x = b.y + 1\nvar v: u8 = 300\nconst = 1\nconst ok = 1\n",
+        "b": "pub const y = 2\n",
+    })
+
+    assert results["a"].constants == {"x": 3, "ok": 1}
+    assert [(d.line, d.message) for d in results["a"].diagnostics] == [
+        (5, "expected identifier, got delimiter_assign"),
+        (2, "unknown module 'missing'"),
+        (4, "v: 300 does not fit u8"),
+    ]
+
+    results = Compiler().run({"a": "const x = 1\nconst y = $\nvar v: u8 = x\n", "b": "$$ import a\nvar w: u8 = 2\n"})
+    assert results["a"].constants == {"x": 1} and results["a"].data == b"\1"
+    assert [str(d) for d in results["a"].diagnostics] == ["2:10: unexpected characters '$'", "3:0: expected expression, got var"]
+    assert results["b"].imports == ("a",) and results["b"].data == b"\2"
+
+    results = Compiler().run({"a": "const x = y\nconst y = x\nvar v: u8 = 1\n", "b": "import a\nvar w: u8 = 2\n"})
+    assert [(d.line, d.message) for d in results["a"].diagnostics] == [(1, "x: circular constant"), (2, "y: circular constant")]
+    assert Compiler.link(results).data == b"\1\2"
+
+
+def test_import_cycles_are_reported():
+    sources = {
+        "a": "import b\nconst x = 1\n",
+        "b": "import a\nimport c\nvar w: u8 = c.k\n",
+        "c": "pub const k = 3\n",
+        "d": "import d\nimport a\nvar z: u8 = 1\n",
+    }
+    assert Compiler.cycles(Compiler().graph(sources)) == [("a", "b"), ("d",)]
+
+    results = Compiler().run(sources)
+    assert {name: [str(d) for d in result.diagnostics] for name, result in results.items()} == {
+        "a": ["1:0: import cycle through 'b'"],
+        "c": [],
+        "b": ["1:0: import cycle through 'a'"],
+        "d": ["1:0: import cycle through 'd'"],
+    }
+    assert results["b"].data == b"\3" and results["d"].data == b"\1"
+    assert Compiler().run(sources, jobs=2) == results
+
+    with pytest.raises(ValueError):
+        Compiler.order(Compiler().graph(sources))
+
+
+def test_lexer_errors_are_reported():
+    results = Compiler().run({"a": "import b\nconst x = 0x10000000000000000\n", "b": "pub const y = 1\n"})
+
+    assert [str(d) for d in results["a"].diagnostics] == ["2:10: integer literal out of range"]
+    assert results["a"].imports == () and results["b"].data == b""
+
+
+def test_only_reachable_bodies_are_checked():
+    source = (
+        "fn unused() { ) }\n"
+        "fn helper() { ) }\n"
+        "pub fn api() { helper(); Shape.area() }\n"
+        "const Shape = struct { fn area() { ) } fn spare() { ) } }\n"
+    )
+    results = Compiler().run({"a": source})
+
+    assert [str(d) for d in results["a"].diagnostics] == ["2:14: expected expression, got bracket_close_round", "4:35: expected expression, got bracket_close_round"]
+    assert results["a"].interface.functions == {"api"} and "Shape" not in results["a"].constants
+    assert Compiler().run({"a": source, "b": "pub const y = 1\n"}, jobs=2) == {**results, "b": Compiler().run({"b": "pub const y = 1\n"})["b"]}
+
+
+def _fleet(count: int) -> dict[str, str]:
+    sources = {"base": "pub const Cell = struct { id: u16, value: i32 }\npub const size = 8\n"}
+
+    for i in range(count):
+        imports = "import base\n" + (f"import unit{i // 2}\n" if i else "")
+        sources[f"unit{i}"] = (
+            f"{imports}pub const id = {i} * base.size\n"
+            f"pub var cells: [2]base.Cell = {{{{id, -{i}}}, {{{i}, 0x{i:X}}}}}\n"
+        )
+
+    return sources
+
+
+def test_parallel_output_is_identical():
+    sources = _fleet(12)
+    serial = Compiler().run(sources)
+
+    compiler = Compiler()
+    parallel = compiler.run(sources, jobs=2)
+    assert list(parallel) == list(serial) and parallel == serial
+    assert Compiler.link(parallel) == Compiler.link(serial)
+    assert Compiler.link(serial).symbols["unit3.cells"] == 12 * (list(serial).index("unit3") - 1)
+
+    sources["unit1"] += "const local = 0\n"
+    again = compiler.run(sources, jobs=2)
+    assert [name for name in again if again[name] is not parallel[name]] == ["unit1"]
+
+    sources["base"] = sources["base"].replace("size = 8", "size = 9")
+    serial = Compiler().run(sources)
+    assert compiler.run(sources, jobs=2) == serial
+    compiler.close()
+    assert compiler.run(sources, jobs=2) == serial
+    compiler.close()
+
+
+def test_modules_are_lexed_once(monkeypatch: pytest.MonkeyPatch):
+    sources = _program()
+    calls = list[object]()
+    scan = Lexer.scan
+    monkeypatch.setattr(Lexer, "scan", lambda self, source, *args, **kwargs: calls.append(source) or scan(self, source, *args, **kwargs))
+
+    Compiler().run(sources)
+    assert sorted(calls) == sorted(sources.values())
+
+
+def test_parse_cache(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    monkeypatch.setenv("BYTELANG_CACHE_DIR", str(tmp_path))
+    sources = {**_program(), "broken": "const = 1\nvar v: u8 = 2\n"}
+    expected = Compiler().run(sources)
+
+    assert Compiler(cache=True).run(sources) == expected
+    assert len(list(tmp_path.iterdir())) == len(sources) - 1
+
+    calls = list[object]()
+    parse = Parser.parse
+    monkeypatch.setattr(Parser, "parse", lambda self, source, *args, **kwargs: calls.append(source) or parse(self, source, *args, **kwargs))
+    assert Compiler(cache=True).run(sources) == expected
+    assert [tokens.source for tokens in calls] == [sources["broken"]]
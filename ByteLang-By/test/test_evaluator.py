@@ -0,0 +1,92 @@
+import pytest
+
+from bytelang import ArrayOf
+from bytelang import Diagnostics
+from bytelang import EvaluationError
+from bytelang import Evaluator
+from bytelang import NodeArena
+from bytelang import Parser
+from bytelang import PointerTo
+from bytelang import Record
+
+
+def _constants(source: str, evaluator: Evaluator = Evaluator()) -> dict:
+    return evaluator.constants(Parser().parse(source))
+
+
+def test_constants():
+    values = _constants(
+        "const b = a * 2 + 'a'\n"
+        "const a = -7 / 2 + 0x10\n"
+        "const r = 1.5 * a\n"
+        "const w = 300 as u8\n"
+        "const n = 255 as i8\n"
+        "const Pair = struct { first: u8, second: *[2]i16, const zero = 0 }\n"
+        "const s = \"a\\n\"\n"
+    )
+    u8 = Evaluator().builtins()["u8"]
+    i16 = Evaluator().builtins()["i16"]
+
+    assert values["a"] == 13 and values["b"] == 26 + 97 and values["r"] == 19.5
+    assert values["w"] == 44 and values["n"] == -1
+    assert values["Pair"] == Record(fields=(("first", u8), ("second", PointerTo(target=ArrayOf(length=2, element=i16)))))
+    assert values["s"] == b"a\n"
+
+
+def test_pack():
+    evaluator = Evaluator()
+    values = _constants(
+        "const Point = struct { x: i16, y: i16 }\n"
+        "const Shape = struct { name: [4]u8, points: [2]Point, origin: *Point }\n"
+        "const shape = {points: {{1, -1}, {y: 2, x: 3}}, name: \"ab\", origin: 0x1234}\n"
+    )
+
+    assert evaluator.sizeOf(values["Shape"]) == 14
+    assert evaluator.pack(values["Shape"], values["shape"]) == b"ab\0\0" + b"\1\0\xff\xff\3\0\2\0" + b"\x34\x12"
+
+    with pytest.raises(EvaluationError):
+        evaluator.pack(values["Point"], ((None, 1),))
+
+    with pytest.raises(EvaluationError):
+        evaluator.pack(values["Point"], ((None, 1), (None, 70000)))
+
+
+def test_errors():
+    with pytest.raises(EvaluationError) as error:
+        _constants("const a = b\nconst b = c\nconst c = a\n")
+
+    assert "circular" in str(error.value)
+
+    diagnostics = Diagnostics()
+    values = Evaluator().constants(Parser().parse("const a = 1 / 0\nconst b = a + 1\nconst c: u8 = 256\nconst d = 2\n"), diagnostics)
+
+    assert values == {"d": 2}
+    assert [(d.line, d.message) for d in diagnostics] == [(1, "a: division by zero"), (3, "c: 256 does not fit u8")]
+
+    diagnostics = Diagnostics()
+    values = Evaluator().constants(Parser().parse("const a = b\nconst b = a + 1\nconst c = b\nconst d = 2\nconst e = e\n"), diagnostics)
+
+    assert values == {"d": 2}
+    assert [(d.line, d.message) for d in diagnostics] == [(1, "a: circular constant"), (2, "b: circular constant"), (5, "e: circular constant")]
+
+    diagnostics = Diagnostics()
+    values = Evaluator().constants(Parser().parse("const a = 1e400 as i32\nconst b = (0.0 * 1e400) as u8\nconst c = 1e400 as f64\n"), diagnostics)
+
+    assert values == {"c": float("inf")}
+    assert [(d.line, d.message) for d in diagnostics] == [(1, "a: inf does not fit i32"), (2, "b: nan does not fit u8")]
+
+
+def test_deep_nesting_does_not_recurse():
+    depth = 3000
+    values = _constants(
+        f"const T = {'[1]' * depth}u8\n"
+        f"const t = {'{' * depth}7{'}' * depth}\n"
+    )
+    evaluator = Evaluator()
+
+    assert evaluator.sizeOf(values["T"]) == 1
+    assert evaluator.pack(values["T"], values["t"]) == b"\7"
+
+    arena = NodeArena()
+    Parser().parse(f"const t = {'{x: ' * depth}1{'}' * depth}", arena)
+    assert len(arena) == 2 * depth + 3
@@ -0,0 +1,336 @@
+import mmap
+from io import StringIO
+from pathlib import Path
+from random import Random
+
+import pytest
+
+from bytelang import Lexer
+from bytelang import LexerError
+from bytelang import LineIndex
+from bytelang import Token
+from bytelang import _lexer
+
+T = Token.Type
+
+
+def _types(source: str | bytes | mmap.mmap) -> list[Token.Type]:
+    return [token.type for token in Lexer().run(source)]
+
+
+def _lexemes(source: str | bytes) -> list[str]:
+    return [token.lexeme for token in Lexer().run(source)]
+
+
+def test_literals():
+    assert _types("\"str\" 123 'A' 0x67 0b1010 123.456 12e-34 1.5E+7") == [
+        T.literal_string,
+        T.literal_number_integer,
+        T.literal_number_integer_character,
+        T.literal_number_integer_hex,
+        T.literal_number_integer_bin,
+        T.literal_number_real,
+        T.literal_number_real_exp,
+        T.literal_number_real_exp,
+    ]
+
+
+def test_escapes():
+    assert _lexemes(r"'\'' '\n' " + r'"a\"b"') == [r"'\''", r"'\n'", r'"a\"b"']
+
+
+def test_brackets():
+    assert _types("()[]{}") == [
+        T.bracket_open_round,
+        T.bracket_close_round,
+        T.bracket_open_square,
+        T.bracket_close_square,
+        T.bracket_open_figure,
+        T.bracket_close_figure,
+    ]
+
+
+def test_delimiters_and_operators():
+    assert _types(", : ; = ... . + - * /") == [
+        T.delimiter_comma,
+        T.delimiter_colon,
+        T.delimiter_semicolon,
+        T.delimiter_assign,
+        T.delimiter_ellipsis,
+        T.operator_dot,
+        T.operator_plus,
+        T.operator_minus,
+        T.operator_star,
+        T.operator_slash,
+    ]
+
+
+def test_keywords():
+    tokens = Lexer().run("pub const pi = 4")
+    assert [t.type for t in tokens] == [T.keyword, T.keyword, T.identifier, T.delimiter_assign, T.literal_number_integer]
+    assert [t.lexeme for t in tokens] == ["pub", "const", "pi", None, "4"]
+
+
+def test_maximal_munch_backtracks():
+    assert _types("1.x") == [T.literal_number_integer, T.operator_dot, T.identifier]
+    assert _types("0x") == [T.literal_number_integer, T.identifier]
+    assert _types("1e+a") == [T.literal_number_integer, T.identifier, T.operator_plus, T.identifier]
+    assert _types("..") == [T.operator_dot, T.operator_dot]
+
+
+def test_comments_and_positions():
+    tokens = Lexer().run("// Комментарий\nconst  x = 1 // хвост\n  y")
+    assert [(t.lexeme, t.line, t.col) for t in tokens if t.lexeme] == [("const", 2, 0), ("x", 2, 7), ("1", 2, 11), ("y", 3, 2)]
+
+
+def test_unexpected_character():
+    with pytest.raises(LexerError) as e:
+        Lexer().run("x\n  ж")
+
+    assert (e.value.line, e.value.col) == (2, 2)
+
+
+def test_unterminated_string():
+    with pytest.raises(LexerError):
+        Lexer().run('"abc')
+
+
+def test_buffer_index_walk():
+    buffer = Lexer().scan("var x: u8 = 0x10")
+    assert len(buffer) == 6
+    assert [buffer.kind(i) for i in range(len(buffer))] == _types("var x: u8 = 0x10")
+    assert buffer.lexeme(5) == "0x10"
+    assert (buffer.starts[1], buffer.ends[1]) == (4, 5)
+
+
+def test_buffer_materialises_tokens():
+    source = "a\n  b c\n\nd"
+    buffer = Lexer().scan(source)
+    assert list(buffer) == [buffer[i] for i in range(len(buffer))] == Lexer().run(source)
+    assert buffer[-1] == Token(type=T.identifier, line=4, col=0, lexeme="d")
+    assert buffer[1:3] == (buffer[1], buffer[2])
+
+
+def test_line_index():
+    lines = LineIndex.of("ab\ncd\n\nef")
+    assert list(lines.starts) == [0, 3, 6, 7]
+    assert [lines.resolve(offset) for offset in (0, 1, 3, 6, 8)] == [(1, 0), (1, 1), (2, 0), (3, 0), (4, 1)]
+
+
+def test_positions_are_lazy():
+    buffer = Lexer().scan("a\nb")
+    assert "lines" not in vars(buffer)
+    assert buffer.position(1) == (2, 0)
+
+
+@pytest.mark.parametrize("chunk_size", (1, 2, 3, 7, 0x10000))
+def test_streaming_matches_whole_source(chunk_size: int):
+    source = open(Path(__file__).parents[2] / "user-fn-example.bl", encoding="utf-8").read()
+    assert list(Lexer().tokens(StringIO(source), chunk_size=chunk_size)) == Lexer().run(source)
+
+
+def test_streaming_error_position():
+    with pytest.raises(LexerError) as e:
+        list(Lexer().tokens(StringIO("abc\n  def ?"), chunk_size=2))
+
+    assert (e.value.line, e.value.col) == (2, 6)
+
+
+def test_binary_source_matches_text():
+    source = "// Комментарий\nconst c = 'ж' // хвост\nvar s: []u8 = \"привет\" 0x1F\n"
+    data = source.encode()
+    expected = [(t.type, t.line, t.lexeme) for t in Lexer().run(source)]
+
+    for binary in (data, bytearray(data), memoryview(data)):
+        assert [(t.type, t.line, t.lexeme) for t in Lexer().run(binary)] == expected
+
+
+def test_binary_offsets_are_bytes():
+    data = "// ж\nx".encode()
+    buffer = Lexer().scan(data)
+    assert (buffer.starts[0], buffer.ends[0]) == (len(data) - 1, len(data))
+    assert buffer.position(0) == (2, 0)
+
+
+def test_mmap_source(tmp_path: Path):
+    path = tmp_path / "module.bl"
+    path.write_text("pub fn ret() = ... // Восстанавливаем SP\n", encoding="utf-8")
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        assert _types(m) == _types(path.read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("window", (1, 2, 5))
+def test_binary_window_boundaries(monkeypatch: pytest.MonkeyPatch, window: int):
+    source = "const s = \"строка\" 12.5e-3 // ы\nx"
+    monkeypatch.setattr(_lexer, "_WINDOW", window)
+    assert _lexemes(source.encode()) == _lexemes(source)
+    assert _types(source.encode()) == _types(source)
+
+
+@pytest.mark.parametrize("offset, removed, inserted", (
+    (0, 0, "x"),
+    (4, 1, "yy"),
+    (10, 0, "."),
+    (10, 2, ""),
+    (12, 0, "e+"),
+    (15, 0, "\n"),
+    (17, 0, "// "),
+    (17, 3, '""'),
+    (30, 0, " 0b1"),
+))
+def test_relex_matches_full_scan(offset: int, removed: int, inserted: str):
+    source = "var x: u8 = 1 x 2 \n y + 3.5\n"
+    lexer = Lexer()
+    updated, changed = lexer.relex(lexer.scan(source), offset, removed, inserted)
+    expected = lexer.scan(source[:offset] + inserted + source[offset + removed:])
+
+    assert updated.source == expected.source
+    assert list(updated) == list(expected)
+    assert changed.start <= changed.stop <= len(updated)
+
+
+def test_relex_stops_at_resynchronisation():
+    source = "const a = 1\n" * 1000
+    lexer = Lexer()
+    updated, changed = lexer.relex(lexer.scan(source), 6, 1, "b")
+
+    assert updated.lexeme(1) == "b"
+    assert len(changed) < 10
+
+
+def test_literal_values():
+    source = "123 0x1F 0b101 'A' '\\n' '\\'' 'ж' 1.5 12e-3 0xFFFFFFFFFFFFFFFF x"
+    expected_integers = [123, 0x1F, 0b101, ord("A"), ord("\n"), ord("'"), ord("ж"), 0, 0, (1 << 64) - 1]
+    expected_reals = [0, 0, 0, 0, 0, 0, 0, 1.5, 12e-3, 0, 0]
+
+    for s in (source, source.encode()):
+        buffer = Lexer().scan(s)
+        assert list(buffer.integers[:-1]) == expected_integers
+        assert list(buffer.reals) == expected_reals
+
+
+def test_integer_literal_out_of_range():
+    with pytest.raises(LexerError):
+        Lexer().run("0x10000000000000000")
+
+
+def test_identifiers_are_interned():
+    lexer = Lexer()
+    symbols = lexer.symbols()
+    first = lexer.scan("const a = b", symbols)
+    second = lexer.scan(b"var b = a", symbols)
+
+    assert symbols.isKeyword(first.symbol(0)) and symbols.name(first.symbol(0)) == "const"
+    assert first.symbol(1) == second.symbol(3) == symbols.get("a")
+    assert first.symbol(3) == second.symbol(1) == symbols.get("b")
+    assert not symbols.isKeyword(symbols.get("a"))
+    assert len(symbols) == symbols.keyword_count + 2
+
+
+def test_symbol_table_of_other_keywords():
+    with pytest.raises(ValueError):
+        Lexer().scan("x", Lexer(keywords=frozenset(("x",))).symbols())
+
+
+def test_error_runs_are_merged():
+    buffer = Lexer(error_budget=10).scan("a ?!@ b\n  жжж c")
+
+    assert [buffer.lexeme(i) for i in range(len(buffer))] == ["a", "b", "c"]
+    assert [(e.start, e.end, e.line, e.col) for e in buffer.errors] == [(2, 5, 1, 2), (10, 13, 2, 2)]
+    assert not buffer.truncated
+
+
+def test_error_budget_stops_lexing():
+    data = bytes(range(256)) * 1000
+    buffer = Lexer(error_budget=5).scan(data)
+
+    assert len(buffer.errors) == 5
+    assert buffer.truncated
+    assert buffer.errors[-1].end < 256 * 5
+
+
+def test_streaming_error_budget():
+    errors = []
+    tokens = list(Lexer(error_budget=2).tokens(StringIO("a ? b ? c ? d"), errors=errors, chunk_size=3))
+
+    assert [t.lexeme for t in tokens] == ["a", "b"]
+    assert [(e.line, e.col) for e in errors] == [(1, 2), (1, 6)]
+
+
+def test_error_runs_are_not_split():
+    source = "a ###### b ж# c ##"
+    expected = Lexer(error_budget=10).scan(source)
+
+    for chunk_size in (1, 2, 3, 4, 7):
+        errors = []
+        tokens = list(Lexer(error_budget=10).tokens(StringIO(source), errors=errors, chunk_size=chunk_size))
+
+        assert tokens == list(expected)
+        assert [(e.line, e.col, e.message) for e in errors] == [(e.line, e.col, e.message) for e in expected.errors]
+
+
+def _relexMatchesScan(lexer: Lexer, source: str, offset: int, removed: int, inserted: str, binary: bool) -> None:
+    edited = source[:offset] + inserted + source[offset + removed:]
+
+    if binary:
+        offset, removed = len(source[:offset].encode()), len(source[offset:offset + removed].encode())
+        source, inserted, edited = source.encode(), inserted.encode(), edited.encode()
+
+    try:
+        expected = lexer.scan(edited)
+        updated, _ = lexer.relex(lexer.scan(source), offset, removed, inserted)
+    except LexerError:
+        return
+
+    assert list(updated) == list(expected), edited
+    assert updated.errors == expected.errors, edited
+    assert updated.truncated == expected.truncated, edited
+
+
+def test_budgeted_edits_match_full_scan(monkeypatch: pytest.MonkeyPatch):
+    lexer = Lexer(error_budget=100)
+    _relexMatchesScan(lexer, '...")const]x,ax0;', 15, 1, '" $=', False)
+    _relexMatchesScan(lexer, "=[xé0const(.\t0b;0x0x/'[", 18, 0, "@", False)
+    _relexMatchesScan(lexer, "é;(b...);xb#]/]", 2, 1, "#", False)
+
+    monkeypatch.setattr(_lexer, "_WINDOW", 3)
+    monkeypatch.setattr(_lexer, "_RELEX_WINDOW", 2)
+    generator = Random(7)
+    pieces = ("a", "b1", " ", "\n", "\t", "#", "$", "ж", "12", "0x", "0b", "0x0x", "1e", ".", "...", "//", '"', "'", "\\", "?!", "const", ";", "(")
+
+    for _ in range(1500):
+        lexer = Lexer(error_budget=generator.choice((1, 2, 4, 100)))
+        source = "".join(generator.choice(pieces) for _ in range(generator.randrange(40)))
+        offset = generator.randrange(len(source) + 1)
+        removed = generator.randrange(min(len(source) - offset, 6) + 1)
+        inserted = "".join(generator.choice(pieces) for _ in range(generator.randrange(4)))
+        _relexMatchesScan(lexer, source, offset, removed, inserted, generator.random() < 0.5)
+
+        edited = source[:offset] + inserted + source[offset + removed:]
+        errors = []
+        whole = lexer.scan(edited)
+        assert list(lexer.tokens(StringIO(edited), errors=errors, chunk_size=2)) == list(whole)
+        assert [(e.line, e.col, e.message) for e in errors] == [(e.line, e.col, e.message) for e in whole.errors]
+
+
+def test_relex_keeps_errors():
+    lexer = Lexer(error_budget=10)
+    source = "? a\nb ? c"
+    updated, _ = lexer.relex(lexer.scan(source), 2, 0, "x\n")
+    expected = lexer.scan("? xa\nb ? c".replace("xa", "x\na"))
+
+    assert list(updated) == list(expected)
+    assert updated.errors == expected.errors
+
+
+@pytest.mark.parametrize("offset, removed, inserted", ((0, 1, "x"), (2, 1, "y"), (0, 2, ""), (4, 0, "# "), (12, 1, "")))
+def test_relex_error_budget_matches_full_scan(offset: int, removed: int, inserted: str):
+    lexer = Lexer(error_budget=3)
+    source = "a # b # c # d # e"
+    updated, _ = lexer.relex(lexer.scan(source), offset, removed, inserted)
+    expected = lexer.scan(source[:offset] + inserted + source[offset + removed:])
+
+    assert list(updated) == list(expected)
+    assert updated.errors == expected.errors
+    assert updated.truncated == expected.truncated
@@ -0,0 +1,319 @@
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+from bytelang import ArrayType
+from bytelang import BinaryOp
+from bytelang import Block
+from bytelang import Bundle
+from bytelang import Call
+from bytelang import Cast
+from bytelang import Constant
+from bytelang import Diagnostics
+from bytelang import Field
+from bytelang import Function
+from bytelang import Identifier
+from bytelang import Import
+from bytelang import Index
+from bytelang import Initializer
+from bytelang import InitializerItem
+from bytelang import Lexer
+from bytelang import Literal
+from bytelang import Member
+from bytelang import Native
+from bytelang import NodeArena
+from bytelang import Operator
+from bytelang import ParseError
+from bytelang import Parser
+from bytelang import Struct
+from bytelang import Token
+from bytelang import TreeBuilder
+from bytelang import UnaryOp
+from bytelang import Variable
+
+_EXAMPLES = Path(__file__).parents[2]
+
+_SOURCE = """
+import math
+
+pub const pi: f32 = 3.14;
+
+var: x: i16 = 20
+
+const Pair = struct {
+    pub a: i16,
+    b: u8;
+    pub fn macro one() Pair {a: 1, b: 1}
+}
+
+pub macro fn sum(a: i16, b: i16,) i16 = ...
+
+fn main() void {
+    var: d: i32
+    push(d)
+    call(sum, {1, 2})
+}
+"""
+
+
+def _integer(value: int) -> Literal:
+    return Literal(type=Token.Type.literal_number_integer, value=value)
+
+
+def test_declarations():
+    i16 = Identifier(name="i16")
+
+    assert Parser().parse(_SOURCE).declarations == (
+        Import(name="math", line=2),
+        Constant(name="pi", type=Identifier(name="f32"), value=Literal(type=Token.Type.literal_number_real, value=3.14), public=True, line=4),
+        Variable(name="x", type=i16, value=_integer(20), line=6),
+        Constant(name="Pair", type=None, value=Struct(items=(
+            Field(name="a", type=i16, public=True),
+            Field(name="b", type=Identifier(name="u8")),
+            Function(
+                name="one",
+                parameters=(),
+                result=Identifier(name="Pair"),
+                body=Initializer(items=(InitializerItem(name="a", value=_integer(1)), InitializerItem(name="b", value=_integer(1)))),
+                public=True,
+                macro=True,
+                line=11
+            ),
+        )), line=8),
+        Function(
+            name="sum",
+            parameters=(Field(name="a", type=i16), Field(name="b", type=i16)),
+            result=i16,
+            body=None,
+            native=Native(),
+            public=True,
+            macro=True,
+            line=14
+        ),
+        Function(name="main", parameters=(), result=Identifier(name="void"), body=Block(statements=(
+            Variable(name="d", type=Identifier(name="i32"), value=None, line=17),
+            Call(callee=Identifier(name="push"), arguments=(Identifier(name="d"),)),
+            Call(callee=Identifier(name="call"), arguments=(
+                Identifier(name="sum"),
+                Initializer(items=(InitializerItem(name=None, value=_integer(1)), InitializerItem(name=None, value=_integer(2)))),
+            )),
+        )), line=16),
+    )
+
+
+def test_sources_agree():
+    parser = Parser()
+    expected = parser.parse(_SOURCE)
+
+    assert parser.parse(_SOURCE.encode()) == expected
+    assert parser.parse(StringIO(_SOURCE)) == expected
+
+
+class _CountingReader(StringIO):
+    reads = 0
+
+    def read(self, size: int = -1) -> str:
+        self.reads += 1
+        return super().read(size)
+
+
+def test_pipeline_stops_at_first_error():
+    source = _CountingReader("const a = 1\nconst = 2\n" + "var x: i16 = 1\n" * 100000)
+
+    with pytest.raises(ParseError) as error:
+        Parser().parse(source)
+
+    assert (error.value.line, error.value.col) == (2, 6)
+    assert source.reads == 1
+    assert source.tell() < len(source.getvalue())
+
+
+def test_declarations_are_pulled():
+    declarations = Parser().declarations(Parser().lexer.windows(StringIO("import a\nimport b\nfn\n")))
+
+    assert next(declarations) == Import(name="a", line=1)
+    assert next(declarations) == Import(name="b", line=2)
+
+    with pytest.raises(ParseError, match="end of file"):
+        next(declarations)
+
+
+@pytest.mark.parametrize("chunk_size", (1, 7, 64))
+def test_stream_buffers_are_merged(chunk_size: int):
+    parser = Parser()
+    source = _SOURCE + _generated(20)
+    windows = parser.lexer.windows(StringIO(source), chunk_size=chunk_size)
+
+    assert parser.run(windows) == parser.parse(source)
+
+
+def _expression(source: str):
+    return Parser().parse(f"const x = {source}").declarations[0].value
+
+
+def _name(name: str) -> Identifier:
+    return Identifier(name=name)
+
+
+def test_operator_precedence():
+    a, b, c = _name("a"), _name("b"), _name("c")
+
+    assert _expression("a + b * c") == BinaryOp(operator=Operator.plus, left=a, right=BinaryOp(operator=Operator.star, left=b, right=c))
+    assert _expression("a - b - c") == BinaryOp(operator=Operator.minus, left=BinaryOp(operator=Operator.minus, left=a, right=b), right=c)
+    assert _expression("(a + b) / c") == BinaryOp(operator=Operator.slash, left=BinaryOp(operator=Operator.plus, left=a, right=b), right=c)
+    assert _expression("-a * b") == BinaryOp(operator=Operator.star, left=UnaryOp(operator=Operator.minus, operand=a), right=b)
+    assert _expression("a as i16 + b") == BinaryOp(operator=Operator.plus, left=Cast(value=a, type=_name("i16")), right=b)
+    assert _expression("*a.b[c]") == UnaryOp(operator=Operator.star, operand=Index(target=Member(target=a, name="b"), index=c))
+
+
+def test_postfix_and_types():
+    assert _expression("Point(i32).zero()") == Call(callee=Member(target=Call(callee=_name("Point"), arguments=(_name("i32"),)), name="zero"), arguments=())
+    assert _expression("[4]*u8") == ArrayType(length=_integer(4), element=UnaryOp(operator=Operator.star, operand=_name("u8")))
+    assert _expression("[]u8") == ArrayType(length=None, element=_name("u8"))
+    assert _expression("(f)(a)") == Call(callee=_name("f"), arguments=(_name("a"),))
+
+
+def test_literal_values():
+    assert _expression("0x1F") == Literal(type=Token.Type.literal_number_integer_hex, value=31)
+    assert _expression("'\\n'") == Literal(type=Token.Type.literal_number_integer_character, value=10)
+    assert _expression("2e3") == Literal(type=Token.Type.literal_number_real_exp, value=2000.0)
+    assert _expression('"a\\tb"') == Literal(type=Token.Type.literal_string, value=b"a\tb")
+
+
+@pytest.mark.parametrize("source, position", (("(a + b", (1, 15)), ("a + ", (1, 12)), ("a * )", (1, 14))))
+def test_expression_errors(source: str, position: tuple[int, int]):
+    with pytest.raises(ParseError) as error:
+        _expression(source)
+
+    assert (error.value.line, error.value.col) == position
+
+
+def test_long_expressions_do_not_recurse():
+    terms = 20000
+    node = _expression(" + ".join(f"a{i} * {i}" for i in range(terms)))
+    count = 0
+
+    while isinstance(node, BinaryOp) and node.operator is Operator.plus:
+        node = node.left
+        count += 1
+
+    assert count == terms - 1
+    assert _expression("(" * terms + "-a" + ")" * terms) == UnaryOp(operator=Operator.minus, operand=_name("a"))
+
+
+@pytest.mark.parametrize("opening, closing, inner", (
+        ("f(", ")", lambda node: node.arguments[-1]),
+        ("x[", "]", lambda node: node.index),
+        ("[", "]u8", lambda node: node.length),
+))
+def test_nested_brackets_do_not_recurse(opening: str, closing: str, inner):
+    depth = 3000
+    node = _expression(opening * depth + "a" + closing * depth)
+
+    for _ in range(depth):
+        node = inner(node)
+
+    assert node == _name("a")
+
+
+def test_examples():
+    assert len(Parser().parse((_EXAMPLES / "composite-types.bl").read_text("utf-8")).declarations) == 8
+
+    bundle = Bundle.split((_EXAMPLES / "user-fn-example.bl").read_text("utf-8"))
+    assert [len(Parser().parse(module.source).declarations) for module in bundle.modules] == [1, 1, 4, 2, 7]
+
+
+def _generated(count: int) -> str:
+    return "".join(
+        f"pub const c{i}: [2]u8 = {{{i}, 0x{i:X}}}\n"
+        f"pub fn macro Box{i}(T: type) type struct {{ value: T, fn get(self: *Self) T {{ load(self.value) }} }}\n"
+        f"fn f{i}(a: i16) i16 {{\n    var: r: i16 = a * {i}\n    call(Box{i}(i16).get, r)\n}}\n"
+        for i in range(count)
+    )
+
+
+def test_boundaries():
+    source = "import a\npub fn macro f() T = ...\nconst s = struct { const x = 1 pub fn g() {} }\nvar: v: i16\n"
+    tokens = Parser().lexer.scan(source)
+
+    assert [tokens[i].line for i in Parser().boundaries(tokens)] == [1, 2, 3, 4]
+
+
+@pytest.mark.parametrize("lazy_bodies", (False, True))
+def test_parallel_matches_serial(lazy_bodies: bool):
+    parser = Parser(lazy_bodies=lazy_bodies)
+    source = _generated(200)
+    serial = parser.parse(source)
+
+    parallel = parser.parse(source, jobs=2)
+    assert len(parallel.declarations) == len(serial.declarations)
+
+    if lazy_bodies:
+        assert [parser.body(d.body) for d in parallel.declarations[2::3]] == [parser.body(d.body) for d in serial.declarations[2::3]]
+    else:
+        assert parallel == serial
+        assert parser.parse(source.encode(), jobs=2) == serial
+
+        arena = NodeArena()
+        root = parser.parse(source, arena, jobs=2)
+        assert root == arena.root
+        assert arena.replay(TreeBuilder()) == serial
+
+
+def test_parallel_reports_first_error():
+    source = _generated(100) + "const = 1\n" + _generated(100) + "var x = 1\n"
+
+    with pytest.raises(ParseError) as error:
+        Parser().parse(source, jobs=2)
+
+    assert (error.value.line, error.value.col) == (601, 6)
+
+
+def test_recovery_reports_all_errors():
+    source = (
+        "const a = 1\n"
+        "fn f() { var: x: u8 = ; const y = 2 }\n"
+        "const b = )\n"
+        "pub fn g() u8 { 1 + }\n"
+        "import ok ?\n"
+        "var: c: = 3\n"
+    )
+    diagnostics = Diagnostics()
+    module = Parser(lexer=Lexer(error_budget=10)).parse(source, diagnostics=diagnostics)
+
+    assert [declaration.name for declaration in module.declarations] == ["a", "ok"]
+    assert [(d.line, d.col) for d in diagnostics] == [(2, 22), (3, 10), (4, 20), (5, 10), (6, 8)]
+    assert diagnostics[0].message == "expected expression, got delimiter_semicolon"
+    assert not diagnostics.truncated
+
+
+@pytest.mark.parametrize("chunk_size", (1, 16))
+def test_recovery_over_stream_buffers(chunk_size: int):
+    source = "const a = (1 +\n" + "b * (c + d) +\n" * 200 + "e) + ]\nfn f() {}\nconst = 2\npub var: x: u8\n"
+    parser = Parser()
+    expected = Diagnostics()
+    module = parser.parse(source, diagnostics=expected)
+
+    diagnostics = Diagnostics()
+    assert parser.run(parser.lexer.windows(StringIO(source), chunk_size=chunk_size), diagnostics=diagnostics) == module
+    assert list(diagnostics) == list(expected)
+    assert [(d.line, d.col) for d in diagnostics] == [(202, 5), (204, 6)]
+    assert [declaration.name for declaration in module.declarations] == ["f", "x"]
+
+
+def test_recovery_limit_and_parallel():
+    source = _generated(100) + "const = 1\n" + _generated(100) + "var x = 1\n" + _generated(100)
+    serial = Diagnostics()
+    module = Parser().parse(source, diagnostics=serial)
+
+    assert [(d.line, d.col) for d in serial] == [(601, 6), (1202, 6)]
+    assert len(module.declarations) == 900
+
+    parallel = Diagnostics()
+    assert Parser().parse(source, diagnostics=parallel, jobs=2) == module
+    assert list(parallel) == list(serial)
+
+    limited = Diagnostics(limit=1)
+    assert len(Parser().parse(source, diagnostics=limited).declarations) == 300
+    assert len(limited) == 1 and limited.truncated
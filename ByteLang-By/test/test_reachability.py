@@ -0,0 +1,76 @@
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+from bytelang import Block
+from bytelang import Bundle
+from bytelang import Function
+from bytelang import LazyBlock
+from bytelang import NodeArena
+from bytelang import NodeKind
+from bytelang import ParseError
+from bytelang import Parser
+from bytelang import Reachability
+
+_EXAMPLES = Path(__file__).parents[2]
+
+
+def test_lazy_bodies():
+    source = (_EXAMPLES / "composite-types.bl").read_text("utf-8")
+    eager = Parser().parse(source)
+    lazy_parser = Parser(lazy_bodies=True)
+
+    for lazy in (lazy_parser.parse(source), lazy_parser.parse(StringIO(source))):
+        main = lazy.declarations[-1]
+
+        assert isinstance(main.body, LazyBlock)
+        assert lazy_parser.body(main.body) == eager.declarations[-1].body
+        assert lazy.declarations[:-1] != eager.declarations[:-1]
+
+    arena = NodeArena()
+    lazy_parser.parse(source, arena)
+    lazy_blocks = [node for node in arena.walk() if arena.kind(node) is NodeKind.lazy_block]
+
+    assert len(lazy_blocks) == 3
+    assert lazy_parser.body(arena.deferred(lazy_blocks[-1])) == eager.declarations[-1].body
+
+
+def test_lazy_body_errors_are_deferred():
+    parser = Parser(lazy_bodies=True)
+    module = parser.parse("fn broken() { a + }\nfn main() {}\n")
+
+    with pytest.raises(ParseError) as error:
+        parser.body(module.declarations[0].body)
+
+    assert (error.value.line, error.value.col) == (1, 18)
+
+    with pytest.raises(ParseError, match="end of file"):
+        parser.parse("fn f() { {}")
+
+
+def test_reachable_from_main():
+    parser = Parser(lazy_bodies=True)
+    sources = {module.name: module.source for module in Bundle.split((_EXAMPLES / "user-fn-example.bl").read_text("utf-8")).modules}
+    sources["sketch"] += "fn unused() { ) }\n"
+    modules = {name: parser.parse(source) for name, source in sources.items()}
+
+    reached = Reachability(parser=parser).run(modules, "sketch")
+
+    assert sorted(reached) == [
+        ("func", "call"), ("func", "ret"),
+        ("math", "add"),
+        ("mem", "load"),
+        ("sketch", "calc"), ("sketch", "main"), ("sketch", "x"),
+        ("stack", "alloc"), ("stack", "push_const"), ("stack", "push_var"),
+    ]
+    assert isinstance(reached["sketch", "calc"].body, Block)
+
+
+def test_struct_methods_reached_by_member():
+    parser = Parser(lazy_bodies=True)
+    module = parser.parse((_EXAMPLES / "composite-types.bl").read_text("utf-8"))
+    reached = Reachability().run({"main": module}, "main")
+
+    assert sorted(path for _, path in reached) == ["Point", "Point.distance", "Point.zero", "main", "p1", "p2"]
+    assert all(not isinstance(node.body, LazyBlock) for node in reached.values() if isinstance(node, Function))
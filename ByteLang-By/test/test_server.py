@@ -0,0 +1,92 @@
+import json
+import os
+from io import StringIO
+from pathlib import Path
+from threading import Thread
+from time import sleep
+
+from bytelang import Server
+from bytelang import callServer
+from bytelang.__main__ import main
+
+
+def _write(path: Path, text: str, mtime: int) -> None:
+    path.write_text(text, "utf-8")
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_compile_reuses_unchanged_sources(tmp_path: Path):
+    _write(tmp_path / "math.bl", "pub const scale = 4\n", 1)
+    _write(tmp_path / "app.bl", "import math\nvar v: u16 = math.scale\n//!extra.bl\nimport math\nvar w: u8 = 300\n", 1)
+    server = Server()
+
+    first = server.handle({"id": 1, "method": "compile", "params": {"paths": [str(tmp_path)], "output": str(tmp_path / "out.bin")}})
+    assert first["id"] == 1
+    assert first["result"]["modules"] == ["math", "app", "extra"]
+    assert first["result"]["diagnostics"] == [f"{tmp_path / 'app.bl'}:5:0: w: 300 does not fit u8"]
+    assert (tmp_path / "out.bin").read_bytes() == b"\4\0"
+
+    second = server.compile([str(tmp_path)])
+    assert second["recompiled"] == []
+
+    _write(tmp_path / "math.bl", "pub const scale = 5\n", 2)
+    assert server.compile([str(tmp_path)])["recompiled"] == ["math", "app", "extra"]
+    assert "error" in server.handle({"id": 2, "method": "compile", "params": {"paths": [str(tmp_path / "missing.bl")]}})
+
+
+def test_stdio_protocol():
+    output = StringIO()
+    lines = ['{"id": 1, "method": "ping"}\n', "\n", "not json\n", '{"id": 2, "method": "shutdown"}\n', '{"id": 3, "method": "ping"}\n']
+
+    assert not Server().serveStream(lines, output)
+    assert [json.loads(line) for line in output.getvalue().splitlines()] == [
+        {"id": 1, "result": "ping"},
+        {"id": None, "error": "ValueError: Expecting value: line 1 column 1 (char 0)"},
+        {"id": 2, "result": "shutdown"},
+    ]
+
+
+def test_failed_request_keeps_serving(monkeypatch):
+    server = Server()
+
+    def fail(*args, **kwargs):
+        raise RecursionError("maximum recursion depth exceeded")
+
+    monkeypatch.setattr(server.compiler, "run", fail)
+    output = StringIO()
+    lines = ['{"id": 1, "method": "compile", "params": {"paths": []}}\n', '{"id": 2, "method": "ping"}\n']
+
+    assert server.serveStream(lines, output)
+    assert [json.loads(line) for line in output.getvalue().splitlines()] == [
+        {"id": 1, "error": "RecursionError: maximum recursion depth exceeded"},
+        {"id": 2, "result": "ping"},
+    ]
+
+
+def test_socket_server_and_client(tmp_path: Path):
+    socket = str(tmp_path / "server.sock")
+    source = tmp_path / "main.bl"
+    _write(source, "var v: [2]u8 = {1, 2}\n", 1)
+
+    server = Server()
+    thread = Thread(target=server.serveSocket, args=(socket,))
+    thread.start()
+
+    try:
+        for _ in range(500):
+            try:
+                assert callServer(socket, "ping")["result"] == "ping"
+                break
+
+            except (FileNotFoundError, ConnectionRefusedError):
+                sleep(0.01)
+
+        assert main(["compile", str(source), "--server", socket, "--output", str(tmp_path / "out.bin")]) == 0
+        assert (tmp_path / "out.bin").read_bytes() == b"\1\2"
+        assert callServer(socket, "compile", paths=[str(source)])["result"]["recompiled"] == []
+
+    finally:
+        callServer(socket, "shutdown")
+        thread.join()
+
+    assert not os.path.exists(socket)
@@ -0,0 +1,108 @@
+from bytelang import Function
+from bytelang import SyntaxTree
+
+
+def _module(count: int) -> str:
+    return "import stack\n\n" + "".join(
+        f"// f{i}\n"
+        f"fn f{i}(a: i16) i16 {{\n"
+        f"    var: r: i16 = a * {i}\n"
+        f"    stack.push_var(r)\n"
+        f"}}\n\n"
+        for i in range(count)
+    )
+
+
+def _edit(tree: SyntaxTree, source: str, offset: int, removed: int, inserted: str) -> tuple[range, str]:
+    reparsed = tree.edit(offset, removed, inserted)
+    source = source[:offset] + inserted + source[offset + removed:]
+
+    fresh = SyntaxTree(source)
+
+    assert tree.tokens.source == source
+    assert tree.declarations == fresh.declarations
+    assert tree.diagnostics == fresh.diagnostics
+    assert [tree.line(i) for i in range(len(tree.declarations))] == [fresh.line(i) for i in range(len(fresh.declarations))]
+    return reparsed, source
+
+
+def test_edit_reparses_only_enclosing_declaration():
+    source = _module(500)
+    tree = SyntaxTree(source)
+    before = list(tree.declarations)
+
+    offset = source.index("a * 250")
+    reparsed, source = _edit(tree, source, offset, 1, "b")
+
+    assert reparsed == range(251, 252)
+    assert tree.declarations[251].body.statements[0].value.left.name == "b"
+    assert all(tree.declarations[i] is before[i] for i in range(len(before)) if i != 251)
+
+
+def test_edit_lines_are_relative():
+    source = _module(20)
+    tree = SyntaxTree(source)
+    unchanged = tree.declarations[15]
+
+    reparsed, source = _edit(tree, source, source.index("fn f3"), 0, "\n\n")
+
+    assert tree.declarations[15] is unchanged
+    assert tree.line(15) == 4 + 14 * 6 + 2
+    assert isinstance(unchanged, Function) and unchanged.body.statements[0].line == 2
+    assert len(reparsed) == 1
+
+
+def test_edit_adds_and_removes_declarations():
+    source = _module(10)
+    tree = SyntaxTree(source)
+
+    offset = source.index("// f5")
+    reparsed, source = _edit(tree, source, offset, 0, "const c = 1\nvar v: i16 = c\n")
+    assert len(tree.declarations) == 13
+    assert len(reparsed) >= 2
+
+    offset = source.index("const c")
+    _, source = _edit(tree, source, offset, len("const c = 1\n"), "")
+    assert len(tree.declarations) == 12
+
+    _, source = _edit(tree, source, len(source), 0, "fn g() = ...\n")
+    assert tree.declarations[-1].name == "g"
+
+
+def test_broken_edit_is_applied():
+    source = _module(10)
+    tree = SyntaxTree(source)
+    names = ["stack", *(f"f{i}" for i in range(10))]
+
+    offset = source.index("stack.push_var(r)\n}\n\n// f7")
+    reparsed, source = _edit(tree, source, offset, 0, "g(")
+    assert [declaration.name for declaration in tree.declarations] == names[:7]
+    assert [str(d) for d in tree.diagnostics] == ["43:0: expected bracket_close_round, got bracket_close_figure"]
+    assert len(reparsed) == 0
+
+    reparsed, source = _edit(tree, source, offset + len("g(stack.push_var(r)"), 0, ")")
+    assert [declaration.name for declaration in tree.declarations] == names and not tree.diagnostics
+    assert reparsed == range(6, 11)
+
+    declarations = list(tree.declarations)
+    reparsed, source = _edit(tree, source, source.index("a * 7"), 1, ")")
+    assert [d.line for d in tree.diagnostics] == [2 + 7 * 6 + 3]
+    assert tree.declarations == declarations[:8] + declarations[9:]
+
+    _, source = _edit(tree, source, 0, 0, "const = 1\n")
+    assert [d.line for d in tree.diagnostics] == [1, 3 + 7 * 6 + 3]
+    assert tree.line(0) == 2 and tree.start(0) == 3
+
+    _, source = _edit(tree, source, source.index(") * 7"), 1, "a")
+    _, source = _edit(tree, source, 0, len("const = 1\n"), "")
+    assert tree.declarations == declarations and not tree.diagnostics
+
+    source = "var y: (*u8)\nconst a;import a"
+    tree = SyntaxTree(source)
+    _, source = _edit(tree, source, source.rindex("t a"), 3, "")
+    assert [str(d) for d in tree.diagnostics] == ["2:7: expected delimiter_assign, got delimiter_semicolon"]
+
+    source = "fn f() = ...\nimport a\n=const b =  import importxconst a;)"
+    tree = SyntaxTree(source)
+    _, source = _edit(tree, source, source.index("\n="), 2, "")
+    assert [str(d) for d in tree.diagnostics] == ["2:14: expected declaration, got b", "2:39: expected declaration, got a"]